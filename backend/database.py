@@ -99,6 +99,77 @@ class Visit(Base):
     timestamp = Column(DateTime, default=datetime.utcnow)
 
 
+class SiteBuild(Base):
+    """Entradas (con hash) de la última publicación de cada sitio."""
+    __tablename__ = "site_builds"
+
+    site_id = Column(Integer, primary_key=True)
+    model_type = Column(String(50))
+    dependencies_json = Column(Text, default="{}")  # {"template:cocina/index.html": "<sha256>", ...}
+    built_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class SiteAsset(Base):
+    """Archivo de uploads/ que usa un sitio; lo no referenciado se recolecta."""
+    __tablename__ = "site_assets"
+
+    site_id = Column(Integer, primary_key=True)
+    filename = Column(String(255), primary_key=True, index=True)
+
+
+class RemoteAsset(Base):
+    """Índice URL remota → archivo en uploads/ para no volver a descargar en cada publicación."""
+    __tablename__ = "remote_assets"
+
+    url_hash = Column(String(40), primary_key=True)  # sha1 de la URL
+    url = Column(Text, nullable=False)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(100))
+    size = Column(Integer)
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+    # Revalidación HTTP: validadores del origen, TTL propio y última comprobación
+    etag = Column(String(255))
+    last_modified = Column(String(100))
+    max_age = Column(Integer)
+    checked_at = Column(DateTime)
+
+
+class AssetFailure(Base):
+    """URL remota que falló al descargarse y cuándo se puede volver a intentar."""
+    __tablename__ = "asset_failures"
+
+    url_hash = Column(String(40), primary_key=True)  # sha1 de la URL
+    url = Column(Text, nullable=False)
+    failures = Column(Integer, default=0)
+    last_error = Column(Text)
+    failed_at = Column(DateTime, default=datetime.utcnow)
+    retry_after = Column(DateTime, index=True)
+
+
+class AssetAlias(Base):
+    """Nombre anterior de un archivo de uploads/ (id de subida) → archivo direccionado por contenido."""
+    __tablename__ = "asset_aliases"
+
+    alias = Column(String(255), primary_key=True)
+    filename = Column(String(255), nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+
+
+class ProcessedUpload(Base):
+    """Resultado del procesamiento en segundo plano de una subida: versión optimizada y miniatura."""
+    __tablename__ = "processed_uploads"
+
+    filename = Column(String(255), primary_key=True)  # original en uploads/
+    processed_filename = Column(String(255))  # None si el original ya era mejor
+    thumbnail = Column(String(255))
+    width = Column(Integer)
+    height = Column(Integer)
+    original_bytes = Column(Integer)
+    processed_bytes = Column(Integer)
+    exif_stripped = Column(Boolean, default=False)
+    processed_at = Column(DateTime, default=datetime.utcnow)
+
+
 class User(Base):
     """Usuarios del sistema con rol fijo y asignación opcional a un sitio."""
     __tablename__ = "users"
@@ -135,7 +206,7 @@ def init_db():
     """Inicializar base de datos, roles fijos y superadmin."""
     import bcrypt
 
-    Base.metadata.create_all(bind=engine)
+    ensure_tables()
     ensure_user_audit_columns()
     ensure_site_dns_columns()
 
@@ -225,6 +296,13 @@ def seed_superadmin_user(db, bcrypt_module):
         raise
 
 
+def ensure_tables(bind=None):
+    """Crea las tablas que falten sin tocar las existentes (los scripts pueden correr sin init_db())."""
+    bind = bind or engine
+    Base.metadata.create_all(bind=bind)
+    ensure_remote_asset_columns(bind)
+
+
 def ensure_user_audit_columns():
     """Garantiza que la tabla users tenga las columnas de activación/expiración y avatar."""
     if engine.dialect.name != "sqlite":
@@ -265,6 +343,32 @@ def ensure_site_dns_columns():
             conn.commit()
 
 
+def ensure_remote_asset_columns(bind=None):
+    """Agrega a remote_assets los campos de revalidación si la tabla es anterior a ellos."""
+    bind = bind or engine
+    if bind.dialect.name != "sqlite":
+        return
+
+    with bind.connect() as conn:
+        existing = {row[1] for row in conn.execute(text("PRAGMA table_info(remote_assets)"))}
+        if not existing:
+            return
+        statements = [
+            f"ALTER TABLE remote_assets ADD COLUMN {column} {ddl}"
+            for column, ddl in (
+                ("etag", "VARCHAR(255)"),
+                ("last_modified", "VARCHAR(100)"),
+                ("max_age", "INTEGER"),
+                ("checked_at", "DATETIME"),
+            )
+            if column not in existing
+        ]
+        for statement in statements:
+            conn.execute(text(statement))
+        if statements:
+            conn.commit()
+
+
 if __name__ == "__main__":
     init_db()
     print("✅ Base de datos inicializada")
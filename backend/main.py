@@ -2,7 +2,7 @@ from fastapi import FastAPI, Depends, HTTPException, status, Request, UploadFile
 from fastapi import BackgroundTasks
 from fastapi.security import OAuth2PasswordRequestForm
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, RedirectResponse, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
@@ -15,7 +15,6 @@ import os
 import re
 import shutil
 import time
-import uuid
 import unicodedata
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
@@ -62,9 +61,38 @@ from backend.auth import (
 )
 from backend.api_schemas import UserCreate, UserPasswordUpdate, UserUpdate
 from backend.utils.github_api import GitHubPublisher
-from backend.utils.template_engine import TemplateEngine
-from backend.utils.asset_manager import ensure_local_asset
-from backend.template_helpers import normalize_drive_image, normalize_local_asset
+from backend.utils.template_engine import DEFAULT_SUPPORTERS, TemplateEngine
+from backend.utils.render_pool import RenderPool, RenderPoolBusy, RenderTimeout
+from backend.utils.minifier import optimize_site_files
+from backend.utils.css_optimizer import optimize_stylesheets
+from backend.utils.image_variants import ensure_variants_for
+from backend.utils.fingerprint import fingerprint_site, local_asset_files
+from backend.utils.image_metadata import image_metadata_index
+from backend.utils.upload_processing import DEFAULT_MAX_DIMENSION, UploadProcessor
+from backend.utils.asset_inliner import DEFAULT_INLINE_MAX_BYTES, inline_small_assets
+from backend.utils.build_deps import forget_dependencies, record_dependencies, site_dependencies
+from backend.utils.artifact_store import artifact_store
+from backend.utils.local_origin import local_origin
+from backend.utils.asset_manager import (
+    DEFAULT_DOWNLOAD_WORKERS,
+    DEFAULT_DOWNLOADS_PER_HOST,
+    ensure_local_assets,
+    cached_filename,
+    UploadTooLarge,
+    host_breaker,
+    remote_asset_index,
+    resolve_upload,
+    store_upload,
+    upload_path,
+)
+from backend.utils.asset_refs import forget_site_assets, sync_site_assets
+from backend.utils.uploads_static import UploadsStaticFiles
+from backend.template_helpers import (
+    normalize_drive_image,
+    normalize_local_asset,
+    optimize_logo_url,
+    url_cache_stats,
+)
 from backend.services.user_service import (
     OWNER_ROLE,
     SUPERADMIN_ROLE,
@@ -75,6 +103,7 @@ from backend.services.user_service import (
 )
 from backend.routers.users import router as users_router
 from backend.routers.roles import router as roles_router
+from backend.middleware.body_limit import BodySizeLimitMiddleware
 from backend.middleware.rate_limiter import RateLimitStore, RateLimiterMiddleware
 
 # Helpers para configurar características opcionales
@@ -105,6 +134,39 @@ RATE_LIMIT_WHITELIST = [
 rate_limit_store = RateLimitStore()
 RATE_LIMIT_WHITELIST_SET = set(RATE_LIMIT_WHITELIST)
 
+# Pool de renderizado para vistas previas (process | thread)
+RENDER_POOL_MODE = os.getenv("RENDER_POOL_MODE", "process")
+RENDER_POOL_WORKERS = _int_env("RENDER_POOL_WORKERS", 2)
+RENDER_MAX_PENDING = _int_env("RENDER_MAX_PENDING", 16)
+RENDER_TIMEOUT_SECONDS = _int_env("RENDER_TIMEOUT_SECONDS", 15)
+
+# Minificar HTML/CSS/JS antes de subir los archivos a GitHub Pages
+SITE_MINIFY_ENABLED = _bool_env("SITE_MINIFY_ENABLED", True)
+# Purgar CSS no usado, incrustar CSS crítico y diferir hojas de estilo
+SITE_CSS_PURGE_ENABLED = _bool_env("SITE_CSS_PURGE_ENABLED", True)
+# Generar derivados WebP por ancho (srcset) para las imágenes locales
+SITE_RESPONSIVE_IMAGES_ENABLED = _bool_env("SITE_RESPONSIVE_IMAGES_ENABLED", True)
+# Renombrar CSS/JS/imágenes por hash de contenido para cachearlos como inmutables
+SITE_FINGERPRINT_ENABLED = _bool_env("SITE_FINGERPRINT_ENABLED", True)
+# Placeholders difuminados (LQIP) para hero y galería mientras cargan las imágenes
+SITE_IMAGE_PLACEHOLDERS_ENABLED = _bool_env("SITE_IMAGE_PLACEHOLDERS_ENABLED", True)
+# Incrustar como data URI imágenes locales y hojas de estilo de hasta N bytes (0 desactiva)
+SITE_INLINE_MAX_BYTES = _int_env("SITE_INLINE_MAX_BYTES", DEFAULT_INLINE_MAX_BYTES)
+ASSET_DOWNLOAD_WORKERS = _int_env("ASSET_DOWNLOAD_WORKERS", DEFAULT_DOWNLOAD_WORKERS)
+ASSET_DOWNLOADS_PER_HOST = _int_env("ASSET_DOWNLOADS_PER_HOST", DEFAULT_DOWNLOADS_PER_HOST)
+# Subidas del editor: tamaño máximo (el frontend también lo valida) y bloque de escritura
+UPLOAD_MAX_BYTES = 5 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 1024 * 1024
+# Margen para los delimitadores y cabeceras multipart al comparar con Content-Length
+UPLOAD_MULTIPART_OVERHEAD = 64 * 1024
+UPLOAD_TOO_LARGE_DETAIL = "La imagen es muy grande. Tamaño máximo: 5MB"
+# Procesar las subidas en segundo plano (EXIF, dimensiones, recompresión, miniatura)
+UPLOAD_PROCESSING_ENABLED = _bool_env("UPLOAD_PROCESSING_ENABLED", True)
+UPLOAD_PROCESSING_WORKERS = _int_env("UPLOAD_PROCESSING_WORKERS", 1)
+UPLOAD_MAX_DIMENSION = _int_env("UPLOAD_MAX_DIMENSION", DEFAULT_MAX_DIMENSION)
+# Servir los sitios pre-renderizados en /sites/{slug}/ (staging / respaldo de GitHub Pages)
+SITE_LOCAL_ORIGIN_ENABLED = _bool_env("SITE_LOCAL_ORIGIN_ENABLED", False)
+
 
 # Inicializar app
 app = FastAPI(
@@ -116,6 +178,15 @@ app = FastAPI(
 app.include_router(users_router)
 app.include_router(roles_router)
 
+# Rechazar subidas demasiado grandes antes de leer el formulario; los cuerpos sin
+# Content-Length (chunked) los corta store_upload mientras los escribe
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    paths=["/api/upload-image"],
+    max_bytes=UPLOAD_MAX_BYTES + UPLOAD_MULTIPART_OVERHEAD,
+    detail=UPLOAD_TOO_LARGE_DETAIL,
+)
+
 # CORS
 app.add_middleware(
     CORSMiddleware,
@@ -139,14 +210,25 @@ frontend_path = Path(__file__).parent.parent / "frontend"
 uploads_path = Path(__file__).parent.parent / "uploads"
 uploads_path.mkdir(exist_ok=True)
 app.mount("/static", StaticFiles(directory=frontend_path / "static"), name="static")
-app.mount("/uploads", StaticFiles(directory=uploads_path), name="uploads")
-app.mount("/images", StaticFiles(directory=uploads_path), name="images")
+app.mount("/uploads", UploadsStaticFiles(directory=uploads_path), name="uploads")
+app.mount("/images", UploadsStaticFiles(directory=uploads_path), name="images")
 
 templates = Jinja2Templates(directory=str(frontend_path))
 templates.env.globals["normalize_drive_image"] = normalize_drive_image
 
 # Inicializar servicios
 template_engine = TemplateEngine()
+render_pool = RenderPool(
+    mode=RENDER_POOL_MODE,
+    max_workers=RENDER_POOL_WORKERS,
+    max_pending=RENDER_MAX_PENDING,
+    timeout_seconds=RENDER_TIMEOUT_SECONDS,
+)
+upload_processor = UploadProcessor(
+    mode=RENDER_POOL_MODE,
+    max_workers=UPLOAD_PROCESSING_WORKERS,
+    max_dimension=UPLOAD_MAX_DIMENSION,
+)
 
 # Cargar datos semilla y modelos de negocio
 with open(Path(__file__).parent / "seed_data.json", 'r', encoding='utf-8') as f:
@@ -428,25 +510,8 @@ def _serialize_site_for_publish(site: Site) -> dict:
     }
 
 
-def _execute_publish_pipeline(site_payload: dict) -> dict:
-    try:
-        publisher = GitHubPublisher()
-    except ValueError as exc:
-        raise PublishPipelineError(str(exc), status_code=400) from exc
-    except Exception as exc:
-        raise PublishPipelineError(str(exc), status_code=500) from exc
-
-    desired_repo = _preferred_repo_name(site_payload)
-    repo_result = publisher.create_repository(
-        repo_name=desired_repo,
-        description=site_payload.get("description") or ""
-    )
-
-    if not repo_result.get("success"):
-        raise PublishPipelineError(repo_result.get("error", "Error al crear repositorio"))
-
-    repo_name = repo_result["repo_name"]
-
+def _build_site_data(site_payload: dict) -> dict:
+    """Contexto de ``generate_site`` a partir de ``_serialize_site_for_publish`` (sin localizar assets)."""
     gallery_items = _coerce_list(site_payload.get("gallery_raw") or [])
     products_items = _coerce_list(site_payload.get("products_raw") or [])
     supporter_items = _canonicalize_supporter_logos(
@@ -455,7 +520,7 @@ def _execute_publish_pipeline(site_payload: dict) -> dict:
         or []
     )
 
-    site_data = {
+    return {
         "id": site_payload.get("id"),
         "name": site_payload.get("name"),
         "description": site_payload.get("description"),
@@ -480,10 +545,120 @@ def _execute_publish_pipeline(site_payload: dict) -> dict:
         "supporter_logos_json": json.dumps(supporter_items),
     }
 
+
+def _publish_options() -> dict:
+    """Opciones del pipeline que cambian los archivos publicados."""
+    return {
+        "minify": SITE_MINIFY_ENABLED,
+        "css_purge": SITE_CSS_PURGE_ENABLED,
+        "responsive_images": SITE_RESPONSIVE_IMAGES_ENABLED,
+        "fingerprint": SITE_FINGERPRINT_ENABLED,
+        "placeholders": SITE_IMAGE_PLACEHOLDERS_ENABLED,
+        "inline_max_bytes": SITE_INLINE_MAX_BYTES,
+    }
+
+
+def _site_dependencies(model_type: str, site_data: dict) -> dict:
+    """Dependencias de un sitio; las imágenes remotas ya descargadas (p. ej. logos de
+    aliados, que no quedan guardados en la BD) cuentan por su archivo local."""
+    return site_dependencies(
+        template_engine,
+        model_type,
+        site_data,
+        {f"images/{filename}" for filename in _site_asset_files(site_data)},
+        options=_publish_options(),
+    )
+
+
+def _render_site_bundle(model_type: str, site_data: dict) -> tuple[dict, dict, list]:
+    """Renderizar y optimizar un sitio ya localizado: ``(archivos, assets binarios, reporte)``."""
+    asset_manifest = _collect_local_assets(site_data)
+    if SITE_RESPONSIVE_IMAGES_ENABLED:
+        asset_manifest |= ensure_variants_for(asset_manifest)
+    if SITE_IMAGE_PLACEHOLDERS_ENABLED:
+        placeholder_sources = [site_data.get("hero_image"), *site_data.get("gallery_images", [])]
+        image_metadata_index.ensure_placeholders(
+            source for source in placeholder_sources if isinstance(source, str)
+        )
+
+    site_files = template_engine.generate_site(model_type, site_data)
+    if not site_files.get("index.html"):
+        site_files["index.html"] = """<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"UTF-8\"><title>Site en construcción</title></head><body><h1>Se está generando el sitio</h1></body></html>"""
+    site_files.setdefault(".nojekyll", "")
+
+    if SITE_CSS_PURGE_ENABLED:
+        site_files, css_report = optimize_stylesheets(site_files)
+        if css_report:
+            print(
+                f"✂️ styles.css: {css_report.original_bytes} → {css_report.purged_bytes} bytes "
+                f"({css_report.removed_rules} reglas sin uso, {css_report.critical_bytes} bytes críticos en línea)"
+            )
+
+    if SITE_INLINE_MAX_BYTES > 0:
+        inlined = inline_small_assets(site_files, asset_manifest, max_bytes=SITE_INLINE_MAX_BYTES)
+        site_files = inlined.files
+        asset_manifest = inlined.assets
+        if inlined.inlined:
+            print(f"📎 {len(inlined.inlined)} assets incrustados como data URI: {', '.join(inlined.inlined)}")
+
+    optimization_report = []
+    if SITE_MINIFY_ENABLED:
+        site_files, optimization = optimize_site_files(site_files)
+        optimization_report = [entry.as_dict() for entry in optimization]
+        for entry in optimization:
+            print(
+                f"🗜️ {entry.path}: {entry.original_bytes} → {entry.optimized_bytes} bytes "
+                f"(-{entry.saved_bytes}, gzip {entry.gzip_bytes})"
+            )
+
+    if SITE_FINGERPRINT_ENABLED:
+        fingerprinted = fingerprint_site(site_files, asset_manifest)
+        site_files = fingerprinted.files
+        asset_files = fingerprinted.asset_files
+    else:
+        asset_files = local_asset_files(asset_manifest)
+    return site_files, asset_files, optimization_report
+
+
+def _refresh_local_origin(site_payload: dict) -> None:
+    """Re-renderizar un sitio en el origen local (sin descargar assets ni publicar)."""
+    try:
+        site_data = _build_site_data(site_payload)
+        site_files, asset_files, _report = _render_site_bundle(site_payload["model_type"], site_data)
+        local_origin.write(_preferred_repo_name(site_payload), site_files, asset_files)
+    except Exception as exc:  # pylint: disable=broad-except
+        print(f"⚠️ No se pudo actualizar el origen local del sitio {site_payload.get('id')}: {exc}")
+
+
+def _execute_publish_pipeline(site_payload: dict) -> dict:
+    try:
+        publisher = GitHubPublisher()
+    except ValueError as exc:
+        raise PublishPipelineError(str(exc), status_code=400) from exc
+    except Exception as exc:
+        raise PublishPipelineError(str(exc), status_code=500) from exc
+
+    desired_repo = _preferred_repo_name(site_payload)
+    repo_result = publisher.create_repository(
+        repo_name=desired_repo,
+        description=site_payload.get("description") or ""
+    )
+
+    if not repo_result.get("success"):
+        raise PublishPipelineError(repo_result.get("error", "Error al crear repositorio"))
+
+    repo_name = repo_result["repo_name"]
+
+    site_data = _build_site_data(site_payload)
+    gallery_items = site_data["gallery_images"]
+    products_items = site_data["products"]
+    supporter_items = _coerce_list(site_data["supporter_logos_json"])
+
     asset_updates = {}
     gallery_update = None
     products_update = None
 
+    _prefetch_assets_for_publish(site_data)
     site_data["hero_image"], changed = _localize_asset_for_publish(site_data["hero_image"])
     if changed:
         asset_updates["hero_image"] = site_data["hero_image"]
@@ -507,22 +682,44 @@ def _execute_publish_pipeline(site_payload: dict) -> dict:
     if products_changed:
         products_update = localized_products
 
-    asset_manifest = _collect_local_assets(site_data)
-
-    site_files = template_engine.generate_site(site_payload["model_type"], site_data)
-    if not site_files.get("index.html"):
-        site_files["index.html"] = """<!DOCTYPE html><html lang=\"es\"><head><meta charset=\"UTF-8\"><title>Site en construcción</title></head><body><h1>Se está generando el sitio</h1></body></html>"""
-    site_files.setdefault(".nojekyll", "")
-
+    # Hash de las entradas del render, con el contenido tal como queda guardado en la BD
+    persisted_payload = {**site_payload, **asset_updates}
+    if gallery_update is not None:
+        persisted_payload["gallery_raw"] = gallery_update
+    if products_update is not None:
+        persisted_payload["products_raw"] = products_update
+
+    # Logos de aliados: se descargan las miniaturas para servirlas (o incrustarlas) localmente
+    supporter_items = _localize_supporters_for_publish(supporter_items)
+    site_data["supporter_logos_json"] = json.dumps(supporter_items)
+    if not supporter_items:
+        for key, _name, url in DEFAULT_SUPPORTERS:
+            site_data[key], _changed = _localize_asset_for_publish(optimize_logo_url(url))
+
+    # Ya con todo localizado, para que los logos descargados cuenten como dependencias
+    dependencies = _site_dependencies(site_payload["model_type"], _build_site_data(persisted_payload))
+
+    site_files, asset_files, optimization_report = _render_site_bundle(site_payload["model_type"], site_data)
+
+    # Lo que se publica es exactamente el artefacto guardado (permite volver a él)
+    artifact = artifact_store.save(
+        site_payload["id"],
+        site_files,
+        asset_files,
+        metadata={"repo_name": repo_name, "model_type": site_payload.get("model_type")},
+    )
     publish_result = publisher.publish_site(
         repo_name=repo_name,
-        site_files=site_files,
+        site_files=artifact_store.read_files(artifact),
         custom_domain=site_payload.get("custom_domain"),
-        asset_files=asset_manifest,
+        asset_files=artifact_store.asset_paths(artifact),
     )
 
     if not publish_result.get("success"):
         raise PublishPipelineError(publish_result.get("error", "Error al publicar sitio"))
+    artifact_store.set_current(site_payload["id"], artifact.version)
+    if SITE_LOCAL_ORIGIN_ENABLED:
+        local_origin.write(repo_name, artifact_store.read_files(artifact), artifact_store.asset_paths(artifact))
 
     cname_value = _build_repo_cname(repo_name)
 
@@ -534,6 +731,9 @@ def _execute_publish_pipeline(site_payload: dict) -> dict:
         "gallery_update": gallery_update,
         "products_update": products_update,
         "cname_value": cname_value,
+        "optimization_report": optimization_report,
+        "dependencies": dependencies,
+        "artifact_version": artifact.version,
     }
 
 
@@ -556,42 +756,104 @@ def _get_preview_image(site):
     return _canonicalize_asset_value(getattr(site, "logo_url", ""))
 
 
+def _localize_assets_for_publish(values) -> list[tuple[str, bool]]:
+    """Localizar varios assets a la vez (descargas en paralelo), en el mismo orden recibido."""
+    canonical_values = [_canonicalize_asset_value(value) for value in values]
+    pending = [value for value in canonical_values if value and not value.startswith("images/")]
+    downloads = iter(ensure_local_assets(
+        pending,
+        max_workers=ASSET_DOWNLOAD_WORKERS,
+        per_host=ASSET_DOWNLOADS_PER_HOST,
+    ))
+
+    results = []
+    for canonical in canonical_values:
+        if not canonical or canonical.startswith("images/"):
+            results.append((canonical, False))
+            continue
+        local_path, _downloaded = next(downloads)
+        if local_path and local_path != canonical:
+            results.append((local_path, True))
+        else:
+            results.append((canonical, False))
+    return results
+
+
 def _localize_asset_for_publish(value):
-    canonical = _canonicalize_asset_value(value)
-    if not canonical:
-        return canonical, False
-    if canonical.startswith("images/"):
-        return canonical, False
-    local_path, downloaded = ensure_local_asset(canonical)
-    if local_path and local_path != canonical:
-        return local_path, True
-    return canonical, False
+    return _localize_assets_for_publish([value])[0]
 
 
 def _localize_gallery_for_publish(value):
-    gallery_items = []
-    changed = False
-    for item in _coerce_list(value):
-        localized, was_downloaded = _localize_asset_for_publish(item)
-        gallery_items.append(localized)
-        if was_downloaded:
-            changed = True
-    return gallery_items, changed
+    localized = _localize_assets_for_publish(_coerce_list(value))
+    gallery_items = [item for item, _changed in localized]
+    return gallery_items, any(changed for _item, changed in localized)
 
 
 def _localize_products_for_publish(value):
-    products = []
-    changed = False
-    for item in _coerce_list(value):
-        if not isinstance(item, dict):
+    entries = [item.copy() for item in _coerce_list(value) if isinstance(item, dict)]
+    localized = _localize_assets_for_publish([entry.get("image") for entry in entries])
+    for entry, (image, _changed) in zip(entries, localized):
+        entry["image"] = image
+    return entries, any(changed for _image, changed in localized)
+
+
+def _site_asset_values(site_data: dict) -> list:
+    """Todas las imágenes que usa un sitio (en bruto, locales o remotas)."""
+    values = [site_data.get("hero_image"), site_data.get("about_image"), site_data.get("logo_url")]
+    values.extend(_coerce_list(site_data.get("gallery_images")))
+    values.extend(item.get("image") for item in _coerce_list(site_data.get("products")) if isinstance(item, dict))
+    supporter_items = _coerce_list(site_data.get("supporter_logos_json"))
+    values.extend(optimize_logo_url(item.get("url")) for item in supporter_items if isinstance(item, dict))
+    if not supporter_items:
+        values.extend(optimize_logo_url(url) for _key, _name, url in DEFAULT_SUPPORTERS)
+    return values
+
+
+def _prefetch_assets_for_publish(site_data: dict) -> None:
+    """Descargar en un solo lote todas las imágenes remotas del sitio.
+
+    Los pasos de localización posteriores las encuentran en el índice de uploads,
+    así que el tiempo total queda cerca del de la descarga más lenta.
+    """
+    _localize_assets_for_publish(_site_asset_values(site_data))
+
+
+def _site_asset_files(site_data: dict) -> set[str]:
+    """Archivos de uploads/ que usa el sitio, incluidas descargas que no quedan guardadas
+    en la BD (logos de aliados); no hace peticiones de red."""
+    filenames = set()
+    for value in _site_asset_values(site_data):
+        canonical = _canonicalize_asset_value(value)
+        if not canonical:
+            continue
+        if canonical.startswith("images/"):
+            name = canonical.split("/", 1)[1]
+            # Nombre anterior (alias): cuenta el archivo por contenido al que apunta
+            filenames.add(resolve_upload(name) or name)
             continue
+        filename = cached_filename(canonical) if canonical.startswith(("http://", "https://")) else None
+        if filename:
+            filenames.add(filename)
+    return filenames
+
+
+def _site_asset_refs(site_payload: dict) -> set[str]:
+    return _site_asset_files(_build_site_data(site_payload))
+
+
+def _sync_site_asset_refs(db: Session, site: Site) -> None:
+    sync_site_assets(db, site.id, _site_asset_refs(_serialize_site_for_publish(site)))
+
+
+def _localize_supporters_for_publish(value):
+    supporters = []
+    for item in _coerce_list(value):
         entry = item.copy()
-        localized, was_downloaded = _localize_asset_for_publish(entry.get("image"))
-        entry["image"] = localized
-        products.append(entry)
-        if was_downloaded:
-            changed = True
-    return products, changed
+        localized, _downloaded = _localize_asset_for_publish(optimize_logo_url(entry.get("url")))
+        if localized:
+            entry["url"] = entry["image"] = localized
+        supporters.append(entry)
+    return supporters
 
 
 def _collect_local_assets(site_data: dict) -> set[str]:
@@ -615,6 +877,12 @@ def _collect_local_assets(site_data: dict) -> set[str]:
         if isinstance(product, dict):
             _add(product.get("image"))
 
+    for supporter in _coerce_list(site_data.get("supporter_logos_json")):
+        if isinstance(supporter, dict):
+            _add(supporter.get("url"))
+    for key, _name, _url in DEFAULT_SUPPORTERS:
+        _add(site_data.get(key))
+
     return assets
 
 
@@ -980,6 +1248,8 @@ async def create_site(
     db.add(site)
     db.commit()
     db.refresh(site)
+    _sync_site_asset_refs(db, site)
+    db.commit()
 
     owner_payload = _create_owner_account(db, site)
     owner_user = owner_payload["user"]
@@ -999,6 +1269,7 @@ async def create_site(
 async def update_site(
     site_id: int,
     request: Request,
+    background_tasks: BackgroundTasks,
     db: Session = Depends(get_db),
     _authorized_user: User = Depends(require_owner_of_site)
 ):
@@ -1034,8 +1305,12 @@ async def update_site(
         if hasattr(site, key) and key != "id":
             setattr(site, key, value)
     
+    _sync_site_asset_refs(db, site)
     db.commit()
     db.refresh(site)
+
+    if SITE_LOCAL_ORIGIN_ENABLED:
+        background_tasks.add_task(_refresh_local_origin, _serialize_site_for_publish(site))
     
     return {
         "id": site.id,
@@ -1106,7 +1381,11 @@ async def preview_site(request: Request, _current_user: User = Depends(get_curre
     site_data["supporter_logos_json"] = json.dumps(supporter_payload)
 
     try:
-        files = template_engine.generate_site(model_type, site_data)
+        files = await render_pool.render(model_type, site_data)
+    except RenderPoolBusy as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "2"})
+    except RenderTimeout as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except FileNotFoundError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except Exception as exc:
@@ -1137,6 +1416,10 @@ async def delete_site(
         except:
             pass
     
+    forget_dependencies(db, site.id)
+    forget_site_assets(db, site.id)
+    artifact_store.forget(site.id)
+    local_origin.remove(_preferred_repo_name(_serialize_site_for_publish(site)))
     db.delete(site)
     db.commit()
     
@@ -1178,6 +1461,8 @@ async def publish_site(
     cname_value = publish_output.get("cname_value")
     if cname_value and (not site.cname_record or site.cname_record == DEFAULT_CNAME_TARGET):
         site.cname_record = cname_value
+    record_dependencies(db, site.id, site.model_type, publish_output.get("dependencies"))
+    _sync_site_asset_refs(db, site)
     db.commit()
 
     return {
@@ -1231,6 +1516,8 @@ async def publish_site_async(
             site2.github_repo = result["repo_name"]
             site2.github_url = result.get("pages_url")
             site2.is_published = True
+            record_dependencies(db2, site2.id, site2.model_type, result.get("dependencies"))
+            _sync_site_asset_refs(db2, site2)
             db2.commit()
         finally:
             db2.close()
@@ -1240,8 +1527,130 @@ async def publish_site_async(
     return {"message": "Publicación asíncrona iniciada"}
 
 
+@app.get("/api/sites/{site_id}/artifacts")
+async def list_site_artifacts(
+    site_id: int,
+    db: Session = Depends(get_db),
+    _admin_user: User = Depends(require_admin_or_superadmin),
+):
+    """Listar las versiones publicadas guardadas en el almacén de artefactos."""
+    site = db.query(Site).filter(Site.id == site_id).first()
+    if not site:
+        raise HTTPException(status_code=404, detail="Sitio no encontrado")
+
+    current = artifact_store.current_version(site_id)
+    versions = []
+    for version in reversed(artifact_store.versions(site_id)):
+        manifest = artifact_store.load_manifest(site_id, version)
+        if manifest:
+            versions.append({
+                "version": manifest.version,
+                "created_at": manifest.created_at,
+                "digest": manifest.digest,
+                "files": len(manifest.files) + len(manifest.assets),
+                "current": manifest.version == current,
+            })
+    return {"current": current, "versions": versions}
+
+
+@app.post("/api/sites/{site_id}/rollback")
+async def rollback_site(
+    site_id: int,
+    version: Optional[int] = None,
+    db: Session = Depends(get_db),
+    _admin_user: User = Depends(require_admin_or_superadmin),
+):
+    """Volver a publicar una versión anterior subiendo solo los archivos que difieren."""
+    site = db.query(Site).filter(Site.id == site_id).first()
+    if not site:
+        raise HTTPException(status_code=404, detail="Sitio no encontrado")
+    if not site.github_repo:
+        raise HTTPException(status_code=400, detail="El sitio no ha sido publicado")
+
+    current_version = artifact_store.current_version(site_id)
+    if version is None:
+        previous = [v for v in artifact_store.versions(site_id) if current_version is None or v < current_version]
+        version = previous[-1] if previous else None
+    target = artifact_store.load_manifest(site_id, version) if version is not None else None
+    if not target:
+        raise HTTPException(status_code=404, detail="Versión no encontrada")
+
+    diff = artifact_store.diff(artifact_store.load_manifest(site_id), target)
+    if diff.files or diff.assets:
+        try:
+            publisher = GitHubPublisher()
+        except Exception as exc:
+            raise HTTPException(status_code=500, detail=str(exc)) from exc
+        result = await run_in_threadpool(
+            publisher.publish_site,
+            repo_name=site.github_repo,
+            site_files=diff.files,
+            custom_domain=site.custom_domain,
+            asset_files=diff.assets,
+        )
+        if not result.get("success"):
+            raise HTTPException(status_code=500, detail=result.get("error", "Error al publicar la versión"))
+
+    artifact_store.set_current(site_id, target.version)
+    # Lo publicado ya no corresponde al contenido actual: la próxima reconstrucción lo republica
+    forget_dependencies(db, site_id)
+    db.commit()
+
+    return {
+        "message": f"Sitio restaurado a la versión {target.version}",
+        "version": target.version,
+        "uploaded": sorted([*diff.files, *diff.assets]),
+        "stale": diff.removed,
+    }
+
+
+# ============= ORIGEN LOCAL =============
+
+@app.get("/sites/{slug}", include_in_schema=False)
+async def local_origin_root(slug: str):
+    if not SITE_LOCAL_ORIGIN_ENABLED:
+        raise HTTPException(status_code=404, detail="No encontrado")
+    # Las rutas relativas del sitio (styles.css, images/...) necesitan la barra final
+    return RedirectResponse(url=f"/sites/{slug}/", status_code=308)
+
+
+@app.get("/sites/{slug}/{path:path}", include_in_schema=False)
+async def serve_local_origin(slug: str, path: str, request: Request):
+    """Servir archivos pre-renderizados desde disco con ETag y variantes comprimidas."""
+    if not SITE_LOCAL_ORIGIN_ENABLED:
+        raise HTTPException(status_code=404, detail="No encontrado")
+
+    resolved = local_origin.resolve(slug, path, request.headers.get("accept-encoding", ""))
+    if resolved is None:
+        raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+    headers = {
+        "ETag": resolved.etag,
+        "Cache-Control": resolved.cache_control,
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if resolved.etag in {tag.strip() for tag in if_none_match.split(",")} or if_none_match.strip() == "*":
+        return Response(status_code=304, headers=headers)
+    if resolved.encoding:
+        headers["Content-Encoding"] = resolved.encoding
+    return FileResponse(resolved.path, media_type=resolved.media_type, headers=headers)
+
+
 # ============= API STATS =============
 
+@app.get("/api/stats/url-cache")
+async def get_url_cache_stats(_admin_user: User = Depends(require_admin_or_superadmin)):
+    """Tasa de acierto de la memoización de los helpers de URL (por proceso)."""
+    return url_cache_stats()
+
+
+@app.get("/api/stats/asset-hosts")
+async def get_asset_host_status(_admin_user: User = Depends(require_admin_or_superadmin)):
+    """Hosts de imágenes remotas con el circuito abierto (descargas omitidas temporalmente)."""
+    return {"open_hosts": host_breaker.list_open_hosts()}
+
+
 @app.get("/api/stats/{site_id}")
 async def get_stats(
     site_id: int,
@@ -1362,6 +1771,15 @@ async def get_dashboard_stats(
 
 # ============= API UPLOAD =============
 
+def _enqueue_upload_processing(filename: str) -> bool:
+    """Encolar el procesamiento de una subida; un fallo no afecta a la subida ya guardada."""
+    try:
+        return upload_processor.submit(filename) is not None
+    except Exception as exc:  # pylint: disable=broad-except
+        print(f"⚠️ No se pudo encolar el procesamiento de {filename}: {exc}")
+        return False
+
+
 @app.post("/api/upload-image")
 async def upload_image(
     file: UploadFile = File(...),
@@ -1376,47 +1794,42 @@ async def upload_image(
         if site_id is None or current_user.site_id != site_id:
             raise HTTPException(status_code=403, detail="Solo puedes subir imágenes para tu sitio")
 
-    # Validar tipo de archivo
-    allowed_types = [
-        "image/jpeg",
-        "image/jpg",
-        "image/png",
-        "image/gif",
-        "image/webp",
-        "image/svg+xml"
-    ]
+    # Validar tipo de archivo; la extensión guardada sale del tipo, nunca del nombre recibido
+    allowed_types = {
+        "image/jpeg": "jpg",
+        "image/jpg": "jpg",
+        "image/png": "png",
+        "image/gif": "gif",
+        "image/webp": "webp",
+        "image/svg+xml": "svg",
+    }
     if file.content_type not in allowed_types:
         raise HTTPException(
             status_code=400,
             detail="Tipo de archivo no permitido. Usa: JPG, PNG, GIF, WebP o SVG"
         )
     
-    # Validar tamaño (máximo 5MB)
-    file_size = 0
-    chunk_size = 1024 * 1024  # 1MB chunks
-    temp_file = await file.read()
-    file_size = len(temp_file)
-    
-    if file_size > 5 * 1024 * 1024:  # 5MB
+    # Validar tamaño (máximo 5MB): Starlette ya conoce el tamaño recibido
+    if file.size is not None and file.size > UPLOAD_MAX_BYTES:
         raise HTTPException(
             status_code=400,
-            detail="La imagen es muy grande. Tamaño máximo: 5MB"
+            detail=UPLOAD_TOO_LARGE_DETAIL
         )
-    
+
     try:
-        # Generar nombre único
-        file_extension = file.filename.split(".")[-1]
-        unique_filename = f"{uuid.uuid4().hex}.{file_extension}"
-        
-        # Crear carpeta uploads si no existe
-        uploads_dir = Path(__file__).parent.parent / "uploads"
-        uploads_dir.mkdir(exist_ok=True)
-        
-        # Guardar archivo
-        file_path = uploads_dir / unique_filename
-        with open(file_path, "wb") as buffer:
-            buffer.write(temp_file)
-        
+        # Por bloques y con el hash calculado al vuelo; el nombre por contenido
+        # hace que la misma imagen subida dos veces se guarde (y publique) una vez
+        file_extension = allowed_types[file.content_type]
+        unique_filename, file_size = await store_upload(
+            file.read, file_extension, UPLOAD_MAX_BYTES, chunk_size=UPLOAD_CHUNK_SIZE
+        )
+        file_path = upload_path(unique_filename)
+        # La versión optimizada y la miniatura se generan después, sin demorar la respuesta
+        # (en un hilo: la primera subida crea el pool de procesos)
+        processing = UPLOAD_PROCESSING_ENABLED and await run_in_threadpool(
+            _enqueue_upload_processing, unique_filename
+        )
+
         # Retornar URL relativa (será subida al repo después)
         return {
             "success": True,
@@ -1424,9 +1837,15 @@ async def upload_image(
             "url": f"/images/{unique_filename}",
             "local_path": str(file_path),
             "size": file_size,
-            "type": file.content_type
+            "type": file.content_type,
+            "processing": processing
         }
         
+    except UploadTooLarge:
+        raise HTTPException(
+            status_code=400,
+            detail=UPLOAD_TOO_LARGE_DETAIL
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
@@ -1434,6 +1853,29 @@ async def upload_image(
         )
 
 
+@app.get("/api/upload-image/{filename}")
+async def upload_image_status(
+    filename: str,
+    current_user: User = Depends(get_current_user)
+):
+    """Estado del procesamiento en segundo plano de una imagen subida (versión optimizada y miniatura)."""
+    if filename.startswith(".") or not upload_path(filename).is_file():
+        raise HTTPException(status_code=404, detail="Imagen no encontrada")
+
+    result = remote_asset_index.processed(filename)
+    processed = result or {}
+    return {
+        "filename": filename,
+        "processed": result is not None,
+        "url": f"/images/{processed.get('filename') or filename}",
+        "thumbnail_url": f"/images/{processed['thumbnail']}" if processed.get("thumbnail") else None,
+        "width": processed.get("width"),
+        "height": processed.get("height"),
+        "original_bytes": processed.get("original_bytes"),
+        "processed_bytes": processed.get("processed_bytes"),
+    }
+
+
 # ============= STARTUP =============
 
 @app.on_event("startup")
@@ -1444,6 +1886,13 @@ async def startup_event():
     print(f"📊 Panel disponible en: http://localhost:8000")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Liberar los workers de los pools de renderizado y de procesamiento de imágenes"""
+    render_pool.shutdown()
+    upload_processor.shutdown()
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(
@@ -0,0 +1,34 @@
+"""Reject oversized request bodies before Starlette parses them."""
+from __future__ import annotations
+
+from typing import Iterable
+
+from starlette.middleware.base import BaseHTTPMiddleware
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+
+
+class BodySizeLimitMiddleware(BaseHTTPMiddleware):
+    """Answer 400 when ``Content-Length`` exceeds ``max_bytes`` on the given paths.
+
+    The check runs before the multipart form is read, so an oversized upload is
+    never spooled to disk. Bodies without ``Content-Length`` (chunked) pass
+    through; the endpoint keeps its own limit while streaming them.
+    """
+
+    def __init__(self, app, paths: Iterable[str], max_bytes: int, detail: str) -> None:
+        super().__init__(app)
+        self.paths = {path.rstrip("/") for path in paths}
+        self.max_bytes = max(max_bytes, 0)
+        self.detail = detail
+
+    async def dispatch(self, request: Request, call_next) -> Response:
+        if request.method in ("POST", "PUT", "PATCH") and request.url.path.rstrip("/") in self.paths:
+            declared = request.headers.get("content-length", "")
+            if declared.isdigit() and int(declared) > self.max_bytes:
+                return JSONResponse(
+                    status_code=400,
+                    content={"detail": self.detail},
+                    headers={"Connection": "close"},
+                )
+        return await call_next(request)
@@ -1,9 +1,54 @@
 """Helper functions for template rendering."""
 from __future__ import annotations
 
+from functools import lru_cache, wraps
 from urllib.parse import parse_qs, parse_qsl, urlencode, urlparse, urlunparse
 
 LOCAL_ASSET_HOSTS = {"localhost", "127.0.0.1"}
+# Entradas por helper; los listados repiten unas pocas URLs miles de veces
+URL_CACHE_SIZE = 4096
+
+_URL_CACHES: dict = {}
+
+
+def _memoize_url(func):
+    """Memoización acotada para helpers puros cuyo primer argumento es una URL.
+
+    Los valores que no son ``str`` (``None``, dicts mal formados) no se cachean.
+    """
+    cached = lru_cache(maxsize=URL_CACHE_SIZE)(func)
+
+    @wraps(func)
+    def wrapper(url, *args, **kwargs):
+        if not isinstance(url, str):
+            return func(url, *args, **kwargs)
+        return cached(url, *args, **kwargs)
+
+    wrapper.cache_info = cached.cache_info
+    wrapper.cache_clear = cached.cache_clear
+    _URL_CACHES[func.__name__] = wrapper
+    return wrapper
+
+
+def url_cache_stats() -> dict[str, dict]:
+    """Aciertos, fallos, tamaño y tasa de acierto de cada helper memoizado."""
+    stats = {}
+    for name, helper in _URL_CACHES.items():
+        info = helper.cache_info()
+        lookups = info.hits + info.misses
+        stats[name] = {
+            "hits": info.hits,
+            "misses": info.misses,
+            "size": info.currsize,
+            "max_size": info.maxsize,
+            "hit_rate": round(info.hits / lookups, 4) if lookups else 0.0,
+        }
+    return stats
+
+
+def clear_url_caches() -> None:
+    for helper in _URL_CACHES.values():
+        helper.cache_clear()
 
 
 def _merge_query_params(url: str, new_params: dict[str, str | int]) -> str:
@@ -21,6 +66,7 @@ def _merge_query_params(url: str, new_params: dict[str, str | int]) -> str:
     return urlunparse(parsed._replace(query=urlencode(query)))
 
 
+@_memoize_url
 def _extract_drive_id(cleaned_url: str) -> str:
     if not cleaned_url:
         return ""
@@ -46,6 +92,7 @@ def _extract_drive_id(cleaned_url: str) -> str:
     return ""
 
 
+@_memoize_url
 def normalize_drive_image(url: str | None) -> str:
     """Convert public Google Drive links into embeddable URLs.
 
@@ -76,6 +123,7 @@ def extract_drive_id(url: str | None) -> str:
     return _extract_drive_id(url.strip())
 
 
+@_memoize_url
 def optimize_media_url(url: str | None, *, max_width: int = 1280, quality: int = 80) -> str:
     """Normaliza y agrega parámetros de optimización a imágenes pesadas (Unsplash, Picsum, etc.)."""
     normalized = normalize_drive_image(url)
@@ -101,6 +149,7 @@ def optimize_media_url(url: str | None, *, max_width: int = 1280, quality: int =
     return normalized
 
 
+@_memoize_url
 def optimize_logo_url(url: str | None, *, max_width: int = 420) -> str:
     """Genera versiones livianas (miniaturas) para logos, especialmente desde Google Drive."""
     if not url or not isinstance(url, str):
@@ -128,6 +177,7 @@ def supporter_initials(label: str | None) -> str:
     return f"{first}{last}".upper()
 
 
+@_memoize_url
 def normalize_local_asset(url: str | None) -> str:
     """Quita prefijos de localhost/127 y barras iniciales para assets servidos desde /images."""
     if not url or not isinstance(url, str):
@@ -0,0 +1,255 @@
+"""Almacén en disco, direccionado por contenido, de los renders publicados.
+
+Cada archivo generado (HTML/CSS/JS) y cada asset binario se guarda una sola vez
+en ``objects/<aa>/<sha256>``; cada publicación deja un manifiesto versionado
+``sites/<site_id>/<versión>.json`` que solo apunta a esos objetos. Volver a una
+versión anterior es releer su manifiesto y subir lo que difiere de la actual.
+
+Se conservan las últimas ``ARTIFACT_KEEP_VERSIONS`` versiones de cada sitio (más
+la publicada); los objetos que ya ningún manifiesto usa se eliminan. Los assets
+de uploads/ se enlazan (hardlink) en vez de copiarse cuando el sistema de
+archivos lo permite.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+from typing import Mapping
+
+from backend.utils.asset_manager import STORAGE_DIR, content_hash
+
+ARTIFACTS_DIRNAME = "artifacts"
+CURRENT_FILENAME = "CURRENT"
+ARTIFACT_KEEP_VERSIONS = int(os.getenv("ARTIFACT_KEEP_VERSIONS", 10))
+
+
+@dataclass
+class ArtifactManifest:
+    site_id: int
+    version: int
+    digest: str
+    created_at: str
+    files: dict[str, str] = field(default_factory=dict)
+    assets: dict[str, str] = field(default_factory=dict)
+    metadata: dict = field(default_factory=dict)
+
+
+@dataclass
+class ArtifactDiff:
+    files: dict[str, str] = field(default_factory=dict)
+    assets: dict[str, Path] = field(default_factory=dict)
+    removed: list[str] = field(default_factory=list)
+
+    @property
+    def empty(self) -> bool:
+        return not (self.files or self.assets or self.removed)
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_name, target)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+
+
+class ArtifactStore:
+    """Manifiestos versionados por sitio sobre objetos direccionados por contenido."""
+
+    def __init__(self, root: Path | None = None, keep_versions: int | None = None):
+        self.root = root or (STORAGE_DIR / ARTIFACTS_DIRNAME)
+        self.keep_versions = max(keep_versions if keep_versions is not None else ARTIFACT_KEEP_VERSIONS, 1)
+        self._lock = Lock()
+
+    def _object_path(self, digest: str) -> Path:
+        return self.root / "objects" / digest[:2] / digest
+
+    def _site_dir(self, site_id: int) -> Path:
+        return self.root / "sites" / str(site_id)
+
+    def _put_bytes(self, data: bytes) -> str:
+        digest = hashlib.sha256(data).hexdigest()
+        target = self._object_path(digest)
+        if not target.exists():
+            _write_atomic(target, data)
+        return digest
+
+    def _put_file(self, path: Path) -> str:
+        digest = content_hash(path)
+        target = self._object_path(digest)
+        if target.exists():
+            return digest
+        target.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            # uploads/ nunca se reescribe en sitio (nombres por contenido): basta con enlazar
+            os.link(path, target)
+            return digest
+        except FileExistsError:
+            return digest
+        except OSError:
+            pass  # Otro sistema de archivos o sin soporte de hardlinks: se copia
+        fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+        os.close(fd)
+        try:
+            shutil.copyfile(path, temp_name)
+            os.replace(temp_name, target)
+        except BaseException:
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+            raise
+        return digest
+
+    def versions(self, site_id: int) -> list[int]:
+        site_dir = self._site_dir(site_id)
+        if not site_dir.exists():
+            return []
+        return sorted(int(path.stem) for path in site_dir.glob("*.json") if path.stem.isdigit())
+
+    def save(
+        self,
+        site_id: int,
+        files: Mapping[str, str | bytes],
+        asset_files: Mapping[str, Path] | None = None,
+        metadata: dict | None = None,
+    ) -> ArtifactManifest:
+        """Guardar un render; si es idéntico a la última versión se reutiliza esa versión.
+
+        Tras guardar se descartan las versiones que exceden ``keep_versions``.
+        """
+        with self._lock:
+            # Bajo el lock: la limpieza no debe borrar objetos de un render a medio guardar
+            file_digests = {
+                path: self._put_bytes(content if isinstance(content, bytes) else str(content).encode("utf-8"))
+                for path, content in sorted(files.items())
+            }
+            asset_digests = {
+                path: self._put_file(Path(source)) for path, source in sorted((asset_files or {}).items())
+            }
+            digest = hashlib.sha256(
+                json.dumps({"files": file_digests, "assets": asset_digests}, sort_keys=True).encode("utf-8")
+            ).hexdigest()
+
+            versions = self.versions(site_id)
+            if versions:
+                latest = self.load_manifest(site_id, versions[-1])
+                if latest and latest.digest == digest:
+                    return latest
+
+            manifest = ArtifactManifest(
+                site_id=site_id,
+                version=(versions[-1] + 1) if versions else 1,
+                digest=digest,
+                created_at=datetime.utcnow().isoformat(timespec="seconds"),
+                files=file_digests,
+                assets=asset_digests,
+                metadata=metadata or {},
+            )
+            payload = json.dumps(asdict(manifest), sort_keys=True, indent=2).encode("utf-8")
+            _write_atomic(self._site_dir(site_id) / f"{manifest.version}.json", payload)
+            if self._prune_versions(site_id):
+                self._collect_objects()
+        return manifest
+
+    def _prune_versions(self, site_id: int) -> int:
+        """Borrar los manifiestos más antiguos que ``keep_versions`` (nunca el publicado)."""
+        current = self.current_version(site_id)
+        stale = [version for version in self.versions(site_id)[: -self.keep_versions] if version != current]
+        for version in stale:
+            try:
+                (self._site_dir(site_id) / f"{version}.json").unlink()
+            except FileNotFoundError:
+                pass
+        return len(stale)
+
+    def _collect_objects(self) -> int:
+        """Eliminar los objetos que ya no aparecen en ningún manifiesto."""
+        referenced: set[str] = set()
+        for manifest_path in (self.root / "sites").glob("*/*.json"):
+            try:
+                with open(manifest_path, "r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+            except (OSError, json.JSONDecodeError):
+                # Ante un manifiesto ilegible no se borra nada
+                return 0
+            referenced.update(data.get("files", {}).values())
+            referenced.update(data.get("assets", {}).values())
+
+        removed = 0
+        for path in (self.root / "objects").glob("*/*"):
+            if path.is_file() and not path.name.endswith(".tmp") and path.name not in referenced:
+                path.unlink()
+                removed += 1
+        return removed
+
+    def forget(self, site_id: int) -> None:
+        """Olvidar todas las versiones de un sitio eliminado (SQLite puede reutilizar su id)."""
+        with self._lock:
+            shutil.rmtree(self._site_dir(site_id), ignore_errors=True)
+            self._collect_objects()
+
+    def load_manifest(self, site_id: int, version: int | None = None) -> ArtifactManifest | None:
+        """Leer un manifiesto; sin ``version`` se usa la versión publicada actualmente."""
+        if version is None:
+            version = self.current_version(site_id)
+            if version is None:
+                return None
+        try:
+            with open(self._site_dir(site_id) / f"{version}.json", "r", encoding="utf-8") as handle:
+                return ArtifactManifest(**json.load(handle))
+        except (FileNotFoundError, json.JSONDecodeError, TypeError):
+            return None
+
+    def current_version(self, site_id: int) -> int | None:
+        try:
+            value = (self._site_dir(site_id) / CURRENT_FILENAME).read_text(encoding="utf-8").strip()
+        except FileNotFoundError:
+            return None
+        return int(value) if value.isdigit() else None
+
+    def set_current(self, site_id: int, version: int) -> None:
+        """Marcar la versión que quedó publicada (solo tras una publicación exitosa)."""
+        _write_atomic(self._site_dir(site_id) / CURRENT_FILENAME, str(version).encode("utf-8"))
+
+    def read_files(self, manifest: ArtifactManifest) -> dict[str, str]:
+        return {
+            path: self._object_path(digest).read_bytes().decode("utf-8")
+            for path, digest in manifest.files.items()
+        }
+
+    def asset_paths(self, manifest: ArtifactManifest) -> dict[str, Path]:
+        return {path: self._object_path(digest) for path, digest in manifest.assets.items()}
+
+    def diff(self, base: ArtifactManifest | None, target: ArtifactManifest) -> ArtifactDiff:
+        """Lo que hay que subir para pasar de ``base`` (lo publicado) a ``target``."""
+        base_files = base.files if base else {}
+        base_assets = base.assets if base else {}
+        result = ArtifactDiff()
+        for path, digest in target.files.items():
+            if base_files.get(path) != digest:
+                result.files[path] = self._object_path(digest).read_bytes().decode("utf-8")
+        for path, digest in target.assets.items():
+            if base_assets.get(path) != digest:
+                result.assets[path] = self._object_path(digest)
+        result.removed = sorted(
+            (set(base_files) | set(base_assets)) - (set(target.files) | set(target.assets))
+        )
+        return result
+
+
+artifact_store = ArtifactStore()
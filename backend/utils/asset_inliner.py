@@ -0,0 +1,147 @@
+"""Incrustación de assets pequeños como data URIs en los sitios publicados.
+
+Logos, íconos y favicons de pocos KB cuestan una petición cada uno; por debajo
+de un umbral configurable se embeben directamente en el HTML/CSS. Las hojas de
+estilo pequeñas se incrustan en un ``<style>``. La forma codificada de cada
+archivo se memoriza mientras no cambien su mtime ni su tamaño.
+"""
+from __future__ import annotations
+
+import base64
+import mimetypes
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+from threading import Lock
+from typing import Iterable
+
+from backend.utils.asset_manager import UPLOADS_DIR, publish_path
+
+DEFAULT_INLINE_MAX_BYTES = 4096
+TEXT_SUFFIXES = (".html", ".css")
+
+_IMG_TAG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_ATTR_REF_RE = re.compile(r"(\s(?:src|href)=)([\"'])(?:\./)?(images/[^\"'?#]+)\2", re.IGNORECASE)
+_CSS_URL_RE = re.compile(r"url\(\s*([\"']?)(?:\./)?(images/[^\"')?#]+)\1\s*\)", re.IGNORECASE)
+_SRCSET_RE = re.compile(r"\s(?:srcset|sizes)=([\"']).*?\1", re.IGNORECASE | re.DOTALL)
+
+_encoded_cache: dict[str, tuple[float, int, str]] = {}
+_encoded_lock = Lock()
+
+
+@dataclass
+class InlineResult:
+    files: dict
+    assets: set[str] = field(default_factory=set)
+    inlined: list[str] = field(default_factory=list)
+
+
+def encode_data_uri(path: Path) -> str:
+    """Data URI (base64) del archivo, memorizado por mtime y tamaño."""
+    stat = path.stat()
+    key = str(path)
+    with _encoded_lock:
+        cached = _encoded_cache.get(key)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+    mime = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    value = f"data:{mime};base64,{base64.b64encode(path.read_bytes()).decode('ascii')}"
+    with _encoded_lock:
+        _encoded_cache[key] = (stat.st_mtime, stat.st_size, value)
+    return value
+
+
+def _referenced(paths: Iterable[str], files: dict) -> set[str]:
+    texts = [content for content in files.values() if isinstance(content, str)]
+    return {path for path in paths if any(path in text for text in texts)}
+
+
+def _stylesheet_link_re(path: str) -> re.Pattern:
+    """Enlace directo o diferido (preload + noscript) a una hoja de estilo generada."""
+    href = rf"href=[\"'](?:\./)?{re.escape(path)}[\"']"
+    return re.compile(
+        rf"<link\b[^>]*rel=[\"']preload[\"'][^>]*{href}[^>]*>\s*<noscript>\s*<link\b[^>]*{href}[^>]*>\s*</noscript>"
+        rf"|<link\b[^>]*rel=[\"']stylesheet[\"'][^>]*{href}[^>]*>",
+        re.IGNORECASE,
+    )
+
+
+def inline_small_assets(
+    files: dict,
+    local_assets: Iterable[str],
+    max_bytes: int = DEFAULT_INLINE_MAX_BYTES,
+    uploads_dir: Path | None = None,
+) -> InlineResult:
+    """Incrustar imágenes locales y hojas de estilo de hasta ``max_bytes``.
+
+    Devuelve los archivos reescritos y los assets locales que siguen
+    referenciados (los que quedaron incrustados ya no hace falta subirlos).
+    """
+    assets = {(asset or "").strip().lstrip("/") for asset in local_assets if asset}
+    result = InlineResult(files=dict(files), assets=set(assets))
+    if max_bytes <= 0:
+        return result
+
+    base_dir = uploads_dir or UPLOADS_DIR
+    referenced_before = _referenced(assets, result.files)
+    encoded: dict[str, str | None] = {}
+
+    def _data_uri(relative: str) -> str | None:
+        if relative not in encoded:
+            source = publish_path(relative.split("/", 1)[1], base_dir)
+            try:
+                small = source.is_file() and source.stat().st_size <= max_bytes
+                encoded[relative] = encode_data_uri(source) if small else None
+            except OSError:
+                encoded[relative] = None
+            if encoded[relative]:
+                result.inlined.append(relative)
+        return encoded[relative]
+
+    def _rewrite_img(match: re.Match) -> str:
+        tag = match.group(0)
+        src = re.search(r"\ssrc=([\"'])(?:\./)?(images/[^\"'?#]+)\1", tag, re.IGNORECASE)
+        if not src or not _data_uri(src.group(2)):
+            return tag
+        # El srcset apuntaría a los derivados y anularía el src incrustado
+        return _SRCSET_RE.sub("", tag)
+
+    def _rewrite_attr(match: re.Match) -> str:
+        data_uri = _data_uri(match.group(3))
+        if not data_uri:
+            return match.group(0)
+        return f"{match.group(1)}{match.group(2)}{data_uri}{match.group(2)}"
+
+    def _rewrite_url(match: re.Match) -> str:
+        data_uri = _data_uri(match.group(2))
+        return f"url({data_uri})" if data_uri else match.group(0)
+
+    for path, content in list(result.files.items()):
+        if not isinstance(content, str) or not path.endswith(TEXT_SUFFIXES):
+            continue
+        if path.endswith(".html"):
+            content = _IMG_TAG_RE.sub(_rewrite_img, content)
+            content = _ATTR_REF_RE.sub(_rewrite_attr, content)
+        result.files[path] = _CSS_URL_RE.sub(_rewrite_url, content)
+
+    html = result.files.get("index.html")
+    if isinstance(html, str):
+        for path, content in list(result.files.items()):
+            if not path.endswith(".css") or not isinstance(content, str):
+                continue
+            if len(content.encode("utf-8")) > max_bytes:
+                continue
+            pattern = _stylesheet_link_re(path)
+            if not pattern.search(html):
+                continue
+            html = pattern.sub(lambda _m, css=content: f"<style>{css}</style>", html, count=1)
+            result.inlined.append(path)
+        result.files["index.html"] = html
+
+    for path in list(result.files):
+        if path in result.inlined and not _referenced([path], result.files):
+            del result.files[path]
+    # Solo se descartan los assets que dejaron de referenciarse al incrustar
+    result.assets = assets - (referenced_before - _referenced(assets, result.files))
+    return result
@@ -1,14 +1,91 @@
 import hashlib
 import mimetypes
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Tuple
+from threading import BoundedSemaphore, Lock
+from typing import Awaitable, Callable, Iterable, Iterator, Tuple
 from urllib.parse import urlparse
 
 import requests
+from requests.adapters import HTTPAdapter
+from sqlalchemy.exc import SQLAlchemyError
+from starlette.concurrency import run_in_threadpool
 
-UPLOADS_DIR = Path(__file__).parent.parent.parent / "uploads"
+from backend.database import (
+    AssetAlias,
+    AssetFailure,
+    ProcessedUpload,
+    RemoteAsset,
+    SessionLocal,
+)
+from backend.utils.circuit_breaker import HostCircuitBreaker
+
+PROJECT_ROOT = Path(__file__).parent.parent.parent
+UPLOADS_DIR = PROJECT_ROOT / "uploads"
 UPLOADS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Índices y cachés derivados (metadatos de imágenes, artefactos, etc.)
+STORAGE_DIR = Path(os.getenv("STORAGE_DIR", PROJECT_ROOT / "storage"))
+
+# Segundos que una descarga se considera vigente; 0 = reutilizarla mientras exista el archivo
+ASSET_CACHE_MAX_AGE = int(os.getenv("ASSET_CACHE_MAX_AGE", "0") or 0)
+
+# Tamaño máximo de una imagen remota; un video o un archivo enorme de Drive se aborta
+ASSET_MAX_DOWNLOAD_BYTES = int(os.getenv("ASSET_MAX_DOWNLOAD_BYTES", 15 * 1024 * 1024))
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+GENERIC_BINARY_TYPES = {"application/octet-stream", "binary/octet-stream"}
+
+# Caché negativo: espera tras el primer fallo de una URL (se duplica con cada fallo)
+ASSET_RETRY_BASE_SECONDS = int(os.getenv("ASSET_RETRY_BASE_SECONDS", 300))
+ASSET_RETRY_MAX_SECONDS = int(os.getenv("ASSET_RETRY_MAX_SECONDS", 24 * 3600))
+
+# Descargas simultáneas por lote y por host remoto (Drive limita conexiones por cliente)
+DEFAULT_DOWNLOAD_WORKERS = 8
+DEFAULT_DOWNLOADS_PER_HOST = 4
+
+# Disposición en disco: los archivos por contenido y sus derivados van en
+# subdirectorios por prefijo del hash (ab/cd/abcd…) para que ninguno crezca sin límite
+SHARD_LEVELS = 2
+SHARD_WIDTH = 2
+VARIANTS_DIRNAME = "variants"
+# Versión optimizada de una subida: mismo nombre que el original, bajo processed/
+PROCESSED_DIRNAME = "processed"
+_CONTENT_NAME_RE = re.compile(r"[0-9a-f]{64}\.[0-9a-z]+")
+_VARIANT_NAME_RE = re.compile(r"[0-9a-f]{20}-\d+w\.webp")
+
+_hash_cache: dict[str, tuple[float, int, str]] = {}
+_hash_lock = Lock()
+
+
+def content_hash(path: Path) -> str:
+    """SHA-256 del archivo, memorizado mientras no cambien mtime ni tamaño."""
+    stat = path.stat()
+    key = str(path)
+    with _hash_lock:
+        cached = _hash_cache.get(key)
+        if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+            return cached[2]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    value = digest.hexdigest()
+    with _hash_lock:
+        _hash_cache[key] = (stat.st_mtime, stat.st_size, value)
+    return value
+
+
+def _remember_hash(path: Path, value: str) -> None:
+    stat = path.stat()
+    with _hash_lock:
+        _hash_cache[str(path)] = (stat.st_mtime, stat.st_size, value)
+
 
 def _guess_extension(url_path: str, content_type: str | None) -> str:
     """Inferir extensión del archivo usando la URL o el header Content-Type."""
@@ -26,6 +103,623 @@ def _guess_extension(url_path: str, content_type: str | None) -> str:
     return "jpg"
 
 
+@dataclass
+class CachedAsset:
+    filename: str
+    content_type: str | None
+    size: int | None
+    fetched_at: datetime | None
+    etag: str | None = None
+    last_modified: str | None = None
+    max_age: int | None = None
+    checked_at: datetime | None = None
+
+    @property
+    def validated_at(self) -> datetime | None:
+        return self.checked_at or self.fetched_at
+
+    def validators(self) -> dict[str, str]:
+        """Cabeceras para un GET condicional contra el origen."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class RemoteAssetIndex:
+    """Índice persistente de uploads/: URLs remotas ya descargadas (``remote_assets``),
+    nombres anteriores de archivos subidos (``asset_aliases``) y resultado del
+    procesamiento de las subidas (``processed_uploads``).
+
+    Se consulta antes de cualquier petición de red; si la base de datos falla la
+    localización sigue funcionando, solo que sin atajo.
+    """
+
+    def __init__(self, session_factory=SessionLocal):
+        self._session_factory = session_factory
+
+    @staticmethod
+    def url_key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+    def lookup(self, url: str) -> CachedAsset | None:
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError as exc:
+            print(f"⚠️ Índice de assets remotos no disponible: {exc}")
+            return None
+        try:
+            row = session.get(RemoteAsset, self.url_key(url))
+            if row is None:
+                return None
+            return CachedAsset(
+                row.filename,
+                row.content_type,
+                row.size,
+                row.fetched_at,
+                etag=row.etag,
+                last_modified=row.last_modified,
+                max_age=row.max_age,
+                checked_at=row.checked_at,
+            )
+        except SQLAlchemyError as exc:
+            print(f"⚠️ Índice de assets remotos no disponible: {exc}")
+            return None
+        finally:
+            session.close()
+
+    def record(
+        self,
+        url: str,
+        filename: str,
+        content_type: str | None = None,
+        size: int | None = None,
+        fetched_at: datetime | None = None,
+        etag: str | None = None,
+        last_modified: str | None = None,
+        max_age: int | None = None,
+    ) -> None:
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError as exc:
+            print(f"⚠️ No se pudo registrar el asset {url}: {exc}")
+            return
+        try:
+            row = session.get(RemoteAsset, self.url_key(url)) or RemoteAsset(url_hash=self.url_key(url))
+            row.url = url
+            row.filename = filename
+            row.content_type = content_type
+            row.size = size
+            row.fetched_at = fetched_at or datetime.utcnow()
+            row.checked_at = row.fetched_at
+            row.etag = etag
+            row.last_modified = last_modified
+            row.max_age = max_age
+            session.merge(row)
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            print(f"⚠️ No se pudo registrar el asset {url}: {exc}")
+        finally:
+            session.close()
+
+    def touch(self, url: str) -> None:
+        """El origen respondió 304: el archivo sigue vigente, solo se renueva la frescura."""
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError as exc:
+            print(f"⚠️ No se pudo actualizar el asset {url}: {exc}")
+            return
+        try:
+            row = session.get(RemoteAsset, self.url_key(url))
+            if row is not None:
+                row.checked_at = datetime.utcnow()
+                session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            print(f"⚠️ No se pudo actualizar el asset {url}: {exc}")
+        finally:
+            session.close()
+
+    def failure(self, url: str) -> tuple[int, datetime | None] | None:
+        """(fallos seguidos, no reintentar antes de) de una URL que no se pudo descargar."""
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError:
+            return None
+        try:
+            row = session.get(AssetFailure, self.url_key(url))
+            return (row.failures or 0, row.retry_after) if row else None
+        except SQLAlchemyError:
+            return None
+        finally:
+            session.close()
+
+    def record_failure(self, url: str, error: str) -> datetime | None:
+        """Anotar un fallo más; la espera antes del próximo intento crece de forma exponencial."""
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError:
+            return None
+        try:
+            row = session.get(AssetFailure, self.url_key(url)) or AssetFailure(url_hash=self.url_key(url), failures=0)
+            row.url = url
+            row.failures = (row.failures or 0) + 1
+            row.last_error = error[:500]
+            row.failed_at = datetime.utcnow()
+            delay = min(ASSET_RETRY_BASE_SECONDS * 2 ** (row.failures - 1), ASSET_RETRY_MAX_SECONDS)
+            row.retry_after = row.failed_at + timedelta(seconds=delay)
+            session.merge(row)
+            session.commit()
+            return row.retry_after
+        except SQLAlchemyError as exc:
+            session.rollback()
+            print(f"⚠️ No se pudo registrar el fallo de {url}: {exc}")
+            return None
+        finally:
+            session.close()
+
+    def clear_failure(self, url: str) -> None:
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError:
+            return
+        try:
+            session.query(AssetFailure).filter(AssetFailure.url_hash == self.url_key(url)).delete()
+            session.commit()
+        except SQLAlchemyError:
+            session.rollback()
+        finally:
+            session.close()
+
+    def forget_files(self, filenames: Iterable[str]) -> None:
+        """Quitar del índice las descargas y alias de archivos que ya no existen."""
+        names = list(filenames)
+        if not names:
+            return
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError as exc:
+            print(f"⚠️ No se pudo limpiar el índice de assets: {exc}")
+            return
+        try:
+            session.query(RemoteAsset).filter(RemoteAsset.filename.in_(names)).delete(synchronize_session=False)
+            session.query(AssetAlias).filter(AssetAlias.filename.in_(names)).delete(synchronize_session=False)
+            session.query(ProcessedUpload).filter(ProcessedUpload.filename.in_(names)).delete(
+                synchronize_session=False
+            )
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            print(f"⚠️ No se pudo limpiar el índice de assets: {exc}")
+        finally:
+            session.close()
+
+    def resolve_alias(self, alias: str) -> str | None:
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError:
+            return None
+        try:
+            row = session.get(AssetAlias, alias)
+            return row.filename if row else None
+        except SQLAlchemyError:
+            return None
+        finally:
+            session.close()
+
+    def record_alias(self, alias: str, filename: str) -> None:
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError as exc:
+            print(f"⚠️ No se pudo registrar el alias {alias}: {exc}")
+            return
+        try:
+            session.merge(AssetAlias(alias=alias, filename=filename, created_at=datetime.utcnow()))
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            print(f"⚠️ No se pudo registrar el alias {alias}: {exc}")
+        finally:
+            session.close()
+
+    def processed(self, name: str) -> dict | None:
+        """Resultado del procesamiento de ``name`` (``None`` si aún no se procesó).
+
+        ``{}`` indica que no había nada que hacer (SVG, GIF, animaciones).
+        """
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError:
+            return None
+        try:
+            row = session.get(ProcessedUpload, name)
+            if row is None:
+                return None
+            if row.width is None:
+                return {}
+            return {
+                "filename": row.processed_filename,
+                "thumbnail": row.thumbnail,
+                "width": row.width,
+                "height": row.height,
+                "original_bytes": row.original_bytes,
+                "processed_bytes": row.processed_bytes,
+                "exif_stripped": bool(row.exif_stripped),
+            }
+        except SQLAlchemyError:
+            return None
+        finally:
+            session.close()
+
+    def record_processed(self, name: str, result: dict) -> None:
+        """Guardar el resultado de ``upload_processing.process_image`` para ``name``."""
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError as exc:
+            print(f"⚠️ No se pudo registrar el procesamiento de {name}: {exc}")
+            return
+        try:
+            session.merge(
+                ProcessedUpload(
+                    filename=name,
+                    processed_filename=result.get("filename"),
+                    thumbnail=result.get("thumbnail"),
+                    width=result.get("width"),
+                    height=result.get("height"),
+                    original_bytes=result.get("original_bytes"),
+                    processed_bytes=result.get("processed_bytes"),
+                    exif_stripped=bool(result.get("exif_stripped")),
+                    processed_at=datetime.utcnow(),
+                )
+            )
+            session.commit()
+        except SQLAlchemyError as exc:
+            session.rollback()
+            print(f"⚠️ No se pudo registrar el procesamiento de {name}: {exc}")
+        finally:
+            session.close()
+
+    def derived_files(self, names: Iterable[str]) -> set[str]:
+        """Versiones procesadas y miniaturas de ``names`` (para no recolectarlas)."""
+        names = list(names)
+        if not names:
+            return set()
+        try:
+            session = self._session_factory()
+        except SQLAlchemyError:
+            return set()
+        try:
+            rows = session.query(ProcessedUpload.processed_filename, ProcessedUpload.thumbnail).filter(
+                ProcessedUpload.filename.in_(names)
+            )
+            return {name for row in rows for name in row if name}
+        except SQLAlchemyError:
+            return set()
+        finally:
+            session.close()
+
+
+remote_asset_index = RemoteAssetIndex()
+
+
+def content_filename(sha256: str, extension: str) -> str:
+    """Nombre en uploads/ de un archivo: hash de sus bytes más la extensión."""
+    return f"{sha256}.{extension.lower().lstrip('.') or 'bin'}"
+
+
+def shard_relpath(name: str) -> str:
+    """Ruta dentro de uploads/ de ``images/<name>``.
+
+    ``<sha256>.<ext>`` se guarda en ``ab/cd/<sha256>.<ext>``, los derivados en
+    ``variants/ab/cd/<nombre>`` y las versiones optimizadas en
+    ``processed/ab/cd/<nombre>``; los nombres anteriores (uuid, sha1 de la URL)
+    se quedan en la raíz.
+    """
+    directory, _, filename = name.rpartition("/")
+    pattern = {"": _CONTENT_NAME_RE, VARIANTS_DIRNAME: _VARIANT_NAME_RE, PROCESSED_DIRNAME: _CONTENT_NAME_RE}.get(
+        directory
+    )
+    if pattern is None or not pattern.fullmatch(filename):
+        return name
+    shards = [filename[level * SHARD_WIDTH:(level + 1) * SHARD_WIDTH] for level in range(SHARD_LEVELS)]
+    return "/".join([*filter(None, [directory]), *shards, filename])
+
+
+def upload_path(name: str, uploads_dir: Path | None = None) -> Path:
+    """Archivo en disco de ``images/<name>``; si aún no se migró se usa la copia en la raíz."""
+    root = uploads_dir or UPLOADS_DIR
+    sharded = root / shard_relpath(name)
+    if sharded.is_file():
+        return sharded
+    flat = root / name
+    return flat if flat.is_file() else sharded
+
+
+def iter_uploads(uploads_dir: Path | None = None) -> Iterator[tuple[str, Path]]:
+    """(nombre público, archivo) de todo uploads/, esté en la raíz o en su shard."""
+    root = uploads_dir or UPLOADS_DIR
+    for directory, subdirs, files in os.walk(root):
+        subdirs.sort()
+        for filename in sorted(files):
+            path = Path(directory) / filename
+            relative = path.relative_to(root).as_posix()
+            parts = relative.split("/")
+            derived = parts[0] in (VARIANTS_DIRNAME, PROCESSED_DIRNAME) and len(parts) > 1
+            name = f"{parts[0]}/{filename}" if derived else filename
+            yield (name if shard_relpath(name) == relative else relative), path
+
+
+def store_file(temp_path: Path, sha256: str, extension: str) -> str:
+    """Mover un temporal a uploads/ con su nombre por contenido; si ya existe se descarta."""
+    filename = content_filename(sha256, extension)
+    if upload_path(filename).is_file():
+        temp_path.unlink(missing_ok=True)
+    else:
+        target = UPLOADS_DIR / shard_relpath(filename)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(temp_path, target)
+        _remember_hash(target, sha256)
+    return filename
+
+
+def store_bytes(data: bytes, extension: str) -> str:
+    """Guardar bytes en uploads/ direccionados por contenido (subidas desde el editor)."""
+    fd, temp_name = tempfile.mkstemp(dir=UPLOADS_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+    return store_file(Path(temp_name), hashlib.sha256(data).hexdigest(), extension)
+
+
+class UploadTooLarge(Exception):
+    """La subida superó el tamaño máximo mientras se recibía."""
+
+
+async def store_upload(
+    read: Callable[[int], Awaitable[bytes]],
+    extension: str,
+    max_bytes: int,
+    chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+) -> tuple[str, int]:
+    """Guardar una subida por bloques, calculando el SHA-256 mientras llega.
+
+    ``read`` es el ``read(n)`` asíncrono del archivo recibido. La memoria usada es
+    un bloque, las escrituras van al threadpool para no bloquear el event loop y
+    al pasar ``max_bytes`` se aborta con :class:`UploadTooLarge` sin dejar temporales.
+    Devuelve (nombre por contenido, bytes).
+    """
+    fd, temp_name = tempfile.mkstemp(dir=UPLOADS_DIR, suffix=".part")
+    temp_path = Path(temp_name)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            while True:
+                chunk = await read(chunk_size)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise UploadTooLarge(f"la subida supera el máximo de {max_bytes} bytes")
+                digest.update(chunk)
+                await run_in_threadpool(handle.write, chunk)
+        filename = await run_in_threadpool(store_file, temp_path, digest.hexdigest(), extension)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+    return filename, size
+
+
+def resolve_upload(name: str) -> str | None:
+    """Archivo actual de uploads/ para ``name``, siguiendo alias de nombres anteriores."""
+    if upload_path(name).is_file():
+        return name
+    target = remote_asset_index.resolve_alias(name)
+    if target and upload_path(target).is_file():
+        return target
+    return None
+
+
+def processed_name(name: str) -> str:
+    """Nombre público (``images/<...>``) de la versión optimizada de ``name``."""
+    return f"{PROCESSED_DIRNAME}/{name}"
+
+
+def processed_upload(name: str, uploads_dir: Path | None = None) -> str | None:
+    """Versión optimizada de ``name`` si ya existe en disco (sin consultar la BD)."""
+    if "/" in name:
+        return None
+    processed = processed_name(name)
+    return processed if upload_path(processed, uploads_dir).is_file() else None
+
+
+def publish_path(name: str, uploads_dir: Path | None = None) -> Path:
+    """Archivo que se publica para ``images/<name>``: la versión procesada si ya existe."""
+    processed = processed_upload(name, uploads_dir)
+    return upload_path(processed or name, uploads_dir)
+
+
+def _asset_ttl(entry: CachedAsset) -> int:
+    """TTL de un asset: ``ASSET_CACHE_MAX_AGE`` como mínimo, o el ``max-age`` del origen si es mayor.
+
+    Con ``ASSET_CACHE_MAX_AGE=0`` los assets no caducan y nunca se revalidan.
+    """
+    if ASSET_CACHE_MAX_AGE <= 0:
+        return 0
+    return max(ASSET_CACHE_MAX_AGE, entry.max_age or 0)
+
+
+def _is_fresh(entry: CachedAsset) -> bool:
+    ttl = _asset_ttl(entry)
+    if ttl <= 0:
+        return True
+    validated_at = entry.validated_at
+    return validated_at is not None and datetime.utcnow() - validated_at < timedelta(seconds=ttl)
+
+
+def cached_filename(url: str) -> str | None:
+    """Archivo de uploads/ que ya corresponde a una URL remota (índice o nombre sha1 previo), sin red."""
+    trimmed = (url or "").strip()
+    entry = remote_asset_index.lookup(trimmed)
+    if entry and upload_path(entry.filename).is_file():
+        return entry.filename
+    legacy = next((path for path in UPLOADS_DIR.glob(f"{RemoteAssetIndex.url_key(trimmed)}.*") if path.is_file()), None)
+    return legacy.name if legacy else None
+
+
+def _cached_local_asset(url: str, hashed: str) -> tuple[str | None, CachedAsset | None]:
+    """(ruta vigente, entrada caducada a revalidar) del asset ya descargado, sin tocar la red."""
+    entry = remote_asset_index.lookup(url)
+    if entry and upload_path(entry.filename).is_file():
+        if _is_fresh(entry):
+            return f"images/{entry.filename}", None
+        return None, entry
+
+    # Descargas previas al índice: mismo nombre sha1 con cualquier extensión
+    legacy = next((path for path in sorted(UPLOADS_DIR.glob(f"{hashed}.*")) if path.is_file()), None)
+    if legacy is None:
+        return None, None
+    stat = legacy.stat()
+    entry = CachedAsset(legacy.name, mimetypes.guess_type(legacy.name)[0], stat.st_size, datetime.utcfromtimestamp(stat.st_mtime))
+    remote_asset_index.record(url, entry.filename, entry.content_type, entry.size, entry.fetched_at)
+    return (f"images/{entry.filename}", None) if _is_fresh(entry) else (None, entry)
+
+
+host_breaker = HostCircuitBreaker(
+    threshold=int(os.getenv("ASSET_HOST_FAILURE_THRESHOLD", 3)),
+    cooldown_seconds=int(os.getenv("ASSET_HOST_COOLDOWN_SECONDS", 60)),
+)
+
+_http_session: requests.Session | None = None
+_http_lock = Lock()
+_host_slots: dict[tuple[str, int], BoundedSemaphore] = {}
+
+
+def http_session() -> requests.Session:
+    """Sesión HTTP compartida: reutiliza conexiones keep-alive entre descargas."""
+    global _http_session
+    with _http_lock:
+        if _http_session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=DEFAULT_DOWNLOAD_WORKERS * 2)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _http_session = session
+        return _http_session
+
+
+def _host_slot(url: str, per_host: int) -> BoundedSemaphore:
+    host = (urlparse(url).hostname or "").lower()
+    with _http_lock:
+        slot = _host_slots.get((host, per_host))
+        if slot is None:
+            slot = _host_slots[(host, per_host)] = BoundedSemaphore(per_host)
+        return slot
+
+
+class DownloadRejected(Exception):
+    """La respuesta no es una imagen o supera ``ASSET_MAX_DOWNLOAD_BYTES``."""
+
+
+@dataclass
+class Download:
+    temp_path: Path
+    content_type: str | None
+    size: int
+    sha256: str
+    etag: str | None = None
+    last_modified: str | None = None
+    max_age: int | None = None
+
+
+def _cache_max_age(cache_control: str | None) -> int | None:
+    """``max-age`` de la cabecera Cache-Control del origen, si lo declara."""
+    match = re.search(r"(?:^|[,\s])max-age=(\d+)", cache_control or "", re.IGNORECASE)
+    return int(match.group(1)) if match else None
+
+
+def _accepts_content_type(content_type: str | None, url_path: str) -> bool:
+    mime = (content_type or "").split(";")[0].strip().lower()
+    if mime.startswith("image/"):
+        return True
+    # Algunos CDN sirven imágenes como binario genérico; se confía en la extensión
+    guessed = mimetypes.guess_type(url_path)[0] or ""
+    return (not mime or mime in GENERIC_BINARY_TYPES) and guessed.startswith("image/")
+
+
+def _stream_download(url: str, max_bytes: int | None = None, validators: dict | None = None) -> Download | None:
+    """Descargar por bloques a un temporal dentro de uploads/, calculando el SHA-256.
+
+    La memoria usada no depende del tamaño del archivo; si el servidor anuncia o
+    envía más de ``max_bytes`` o no es una imagen se aborta y se borra el temporal.
+    Con ``validators`` (If-None-Match / If-Modified-Since) un 304 devuelve ``None``.
+    """
+    limit = ASSET_MAX_DOWNLOAD_BYTES if max_bytes is None else max_bytes
+    response = http_session().get(url, timeout=20, stream=True, headers=validators or {})
+    try:
+        if validators and response.status_code == 304:
+            return None
+        response.raise_for_status()
+        content_type = response.headers.get("Content-Type")
+        if not _accepts_content_type(content_type, urlparse(url).path):
+            raise DownloadRejected(f"tipo de contenido no permitido: {content_type or 'desconocido'}")
+        declared = response.headers.get("Content-Length")
+        if declared and declared.isdigit() and int(declared) > limit:
+            raise DownloadRejected(f"{declared} bytes supera el máximo de {limit}")
+
+        fd, temp_name = tempfile.mkstemp(dir=UPLOADS_DIR, suffix=".part")
+        temp_path = Path(temp_name)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as handle:
+                for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                    if not chunk:
+                        continue
+                    size += len(chunk)
+                    if size > limit:
+                        raise DownloadRejected(f"la descarga supera el máximo de {limit} bytes")
+                    digest.update(chunk)
+                    handle.write(chunk)
+        except BaseException:
+            temp_path.unlink(missing_ok=True)
+            raise
+        return Download(
+            temp_path,
+            content_type,
+            size,
+            digest.hexdigest(),
+            etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+            max_age=_cache_max_age(response.headers.get("Cache-Control")),
+        )
+    finally:
+        response.close()
+
+
+def _is_host_failure(exc: Exception) -> bool:
+    """Fallos que indican un host caído (red, timeout, 5xx/429) y no un enlace roto o privado."""
+    if isinstance(exc, DownloadRejected):
+        return False
+    if isinstance(exc, requests.HTTPError) and exc.response is not None:
+        status = exc.response.status_code
+        return status >= 500 or status in (408, 429)
+    return isinstance(exc, requests.RequestException)
+
+
+def _host_responded(exc: Exception) -> bool:
+    """El host devolvió una respuesta HTTP (4xx o contenido rechazado) antes del fallo."""
+    if isinstance(exc, DownloadRejected):
+        return True
+    return isinstance(exc, requests.HTTPError) and exc.response is not None
+
+
 def _is_remote_url(url: str) -> bool:
     try:
         parsed = urlparse(url)
@@ -34,12 +728,14 @@ def _is_remote_url(url: str) -> bool:
     return parsed.scheme in {"http", "https"}
 
 
-def ensure_local_asset(url: str) -> Tuple[str, bool]:
+def ensure_local_asset(url: str, refresh: bool = False) -> Tuple[str, bool]:
     """
     Garantiza que una URL pública esté disponible localmente dentro de /uploads.
 
     Retorna una tupla (ruta_relativa, descargado).
     Si la URL ya apunta a images/ o no se puede descargar, se devuelve tal cual y descargado=False.
+    Las URLs ya descargadas se resuelven con el índice ``remote_assets`` sin tocar la red,
+    salvo que ``refresh`` sea verdadero o la descarga supere ``ASSET_CACHE_MAX_AGE``.
     """
     if not url or not isinstance(url, str):
         return "", False
@@ -60,24 +756,92 @@ def ensure_local_asset(url: str) -> Tuple[str, bool]:
     if not _is_remote_url(trimmed):
         return trimmed, False
 
+    hashed = RemoteAssetIndex.url_key(trimmed)
+    stale = None
+    if not refresh:
+        cached, stale = _cached_local_asset(trimmed, hashed)
+        if cached:
+            return cached, True
+
+    # Mejor una copia caducada que volver a depender del host remoto
+    fallback = (f"images/{stale.filename}", True) if stale else (trimmed, False)
+    host = (urlparse(trimmed).hostname or "").lower()
+    failure = remote_asset_index.failure(trimmed)
+    if failure and not refresh and failure[1] and failure[1] > datetime.utcnow():
+        return fallback
+    if not host_breaker.allow(host):
+        return fallback
+
     try:
-        response = requests.get(trimmed, timeout=20)
-        response.raise_for_status()
+        # Una entrada caducada se revalida con un GET condicional en vez de descargarla de nuevo
+        download = _stream_download(trimmed, validators=stale.validators() if stale else None)
     except Exception as exc:  # pylint: disable=broad-except
-        print(f"⚠️ No se pudo descargar el asset remoto {trimmed}: {exc}")
-        return trimmed, False
+        retry_after = remote_asset_index.record_failure(trimmed, str(exc))
+        if _is_host_failure(exc):
+            if host_breaker.record_failure(host):
+                print(f"⚠️ Host {host} sin respuesta; se omiten sus descargas por un tiempo")
+        elif _host_responded(exc):
+            # Enlace roto o privado, pero el host contestó: cuenta como señal de vida
+            host_breaker.record_success(host)
+        retry_note = f" (reintento desde {retry_after:%Y-%m-%d %H:%M} UTC)" if retry_after else ""
+        print(f"⚠️ No se pudo descargar el asset remoto {trimmed}: {exc}{retry_note}")
+        return fallback
 
-    content_type = response.headers.get("Content-Type")
-    extension = _guess_extension(urlparse(trimmed).path, content_type)
-    hashed = hashlib.sha1(trimmed.encode("utf-8")).hexdigest()
-    filename = f"{hashed}.{extension}"
-    target_path = UPLOADS_DIR / filename
+    host_breaker.record_success(host)
+    if failure:
+        remote_asset_index.clear_failure(trimmed)
 
-    if not target_path.exists():
-        try:
-            target_path.write_bytes(response.content)
-        except Exception as exc:  # pylint: disable=broad-except
-            print(f"⚠️ Error guardando asset {trimmed}: {exc}")
-            return trimmed, False
+    if download is None:
+        remote_asset_index.touch(trimmed)
+        return f"images/{stale.filename}", True
+
+    extension = _guess_extension(urlparse(trimmed).path, download.content_type)
+    try:
+        # Misma imagen desde otra URL (u otra subida) => mismo archivo
+        filename = store_file(download.temp_path, download.sha256, extension)
+    except OSError as exc:
+        download.temp_path.unlink(missing_ok=True)
+        print(f"⚠️ Error guardando asset {trimmed}: {exc}")
+        return trimmed, False
 
+    remote_asset_index.record(
+        trimmed,
+        filename,
+        download.content_type,
+        download.size,
+        etag=download.etag,
+        last_modified=download.last_modified,
+        max_age=download.max_age,
+    )
     return f"images/{filename}", True
+
+
+def ensure_local_assets(
+    urls: Iterable[str],
+    max_workers: int = DEFAULT_DOWNLOAD_WORKERS,
+    per_host: int = DEFAULT_DOWNLOADS_PER_HOST,
+    refresh: bool = False,
+) -> list[Tuple[str, bool]]:
+    """Versión por lotes de :func:`ensure_local_asset` que conserva el orden de entrada.
+
+    Las URLs repetidas se descargan una sola vez; las descargas corren en paralelo
+    con a lo sumo ``max_workers`` en total y ``per_host`` contra un mismo host.
+    """
+    items = list(urls)
+    unique = list(dict.fromkeys(url for url in items if isinstance(url, str) and _is_remote_url(url.strip())))
+
+    def _localize(url: str) -> Tuple[str, bool]:
+        with _host_slot(url.strip(), max(1, per_host)):
+            return ensure_local_asset(url, refresh=refresh)
+
+    if len(unique) <= 1 or max_workers <= 1:
+        resolved = {url: ensure_local_asset(url, refresh=refresh) for url in unique}
+    else:
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(unique)), thread_name_prefix="assets") as pool:
+            resolved = dict(zip(unique, pool.map(_localize, unique)))
+
+    results = []
+    for url in items:
+        cached = resolved.get(url) if isinstance(url, str) else None
+        results.append(cached or ensure_local_asset(url, refresh=refresh))
+    return results
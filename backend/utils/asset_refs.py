@@ -0,0 +1,114 @@
+"""Índice de referencias sitio → archivo de uploads/ y recolección de lo que nadie usa.
+
+El índice (tabla ``site_assets``) se actualiza al crear, editar, publicar y
+eliminar sitios; los avatares de usuario se leen directamente de ``users``. Los
+nombres anteriores (alias) se resuelven a su archivo por contenido. La
+recolección borra los archivos sin referencias cuya última
+modificación supera un periodo de gracia, para no tocar subidas recientes del
+editor que aún no se guardaron en un sitio.
+"""
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable
+from urllib.parse import urlparse
+
+from backend.database import SiteAsset, User
+from backend.utils.asset_manager import (
+    PROCESSED_DIRNAME,
+    UPLOADS_DIR,
+    VARIANTS_DIRNAME,
+    content_hash,
+    iter_uploads,
+    resolve_upload,
+    upload_path,
+)
+from backend.utils.image_metadata import uploads_name
+
+# Derivados WebP: <primeros 20 hex del SHA-256 del original>-<ancho>w.webp
+VARIANT_PREFIX_LENGTH = 20
+
+@dataclass
+class GCReport:
+    removed: list[str] = field(default_factory=list)
+    reclaimed_bytes: int = 0
+    kept_recent: int = 0
+    kept_referenced: int = 0
+
+
+def sync_site_assets(db, site_id: int, filenames: Iterable[str]) -> None:
+    """Reemplazar (sin hacer commit) los archivos que referencia un sitio."""
+    wanted = set(filenames)
+    current = {row.filename for row in db.query(SiteAsset).filter(SiteAsset.site_id == site_id)}
+    stale = current - wanted
+    if stale:
+        db.query(SiteAsset).filter(SiteAsset.site_id == site_id, SiteAsset.filename.in_(stale)).delete(
+            synchronize_session=False
+        )
+    for filename in sorted(wanted - current):
+        db.add(SiteAsset(site_id=site_id, filename=filename))
+
+
+def forget_site_assets(db, site_id: int) -> None:
+    db.query(SiteAsset).filter(SiteAsset.site_id == site_id).delete()
+
+
+def referenced_assets(db) -> set[str]:
+    """Archivos de uploads/ en uso por sitios y avatares, con los alias resueltos."""
+    names = {filename for (filename,) in db.query(SiteAsset.filename).distinct()}
+    for (avatar_url,) in db.query(User.avatar_url).filter(User.avatar_url.isnot(None)):
+        name = uploads_name(urlparse(avatar_url).path)
+        if name:
+            names.add(name)
+
+    referenced = set(names)
+    for name in names:
+        # Un alias (id de subida antiguo) mantiene vivo el archivo por contenido al que apunta
+        target = resolve_upload(name)
+        if target:
+            referenced.add(target)
+    return referenced
+
+
+def collect_garbage(
+    referenced: set[str],
+    grace_seconds: float,
+    dry_run: bool = False,
+    uploads_dir: Path | None = None,
+) -> GCReport:
+    """Borrar de uploads/ (y de sus variantes) lo no referenciado más antiguo que la gracia."""
+    root = uploads_dir or UPLOADS_DIR
+    cutoff = time.time() - grace_seconds
+    report = GCReport()
+
+    live_prefixes = set()
+    for name in referenced:
+        path = upload_path(name, root)
+        if path.is_file():
+            live_prefixes.add(content_hash(path)[:VARIANT_PREFIX_LENGTH])
+
+    candidates = []
+    for name, path in iter_uploads(root):
+        if name.startswith(f"{VARIANTS_DIRNAME}/"):
+            candidates.append((path, path.name[:VARIANT_PREFIX_LENGTH] in live_prefixes))
+        elif name.startswith(f"{PROCESSED_DIRNAME}/"):
+            # La versión optimizada vive mientras se use su original
+            candidates.append((path, name in referenced or path.name in referenced))
+        elif "/" not in name:
+            candidates.append((path, name in referenced))
+
+    for path, is_referenced in sorted(candidates):
+        if is_referenced or path.name.startswith("."):
+            report.kept_referenced += int(is_referenced)
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            report.kept_recent += 1
+            continue
+        report.removed.append(path.relative_to(root).as_posix())
+        report.reclaimed_bytes += stat.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    return report
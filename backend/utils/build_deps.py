@@ -0,0 +1,114 @@
+"""Seguimiento de dependencias de cada sitio publicado para reconstrucciones incrementales.
+
+Al publicar se guarda el hash de todo lo que influyó en el resultado: plantillas
+del modelo, su entrada en ``models.json``, el código que genera el HTML, el
+contenido del sitio, sus imágenes locales y las opciones del pipeline. Una
+reconstrucción compara esos hashes con los actuales y solo republica los sitios
+en los que algo cambió.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Iterable
+
+from backend.database import SiteBuild
+from backend.utils.asset_manager import PROJECT_ROOT, content_hash, publish_path
+from backend.utils.template_engine import SHARED_PARTIALS_DIR, SUPPORTERS_TEMPLATE
+
+# Código cuyo cambio altera los archivos publicados de todos los sitios
+ENGINE_SOURCES = (
+    PROJECT_ROOT / "backend" / "template_helpers.py",
+    *(
+        PROJECT_ROOT / "backend" / "utils" / f"{name}.py"
+        for name in (
+            "template_engine",
+            "image_variants",
+            "css_optimizer",
+            "asset_inliner",
+            "minifier",
+            "fingerprint",
+            "image_metadata",
+            "upload_processing",
+        )
+    ),
+)
+MISSING = "missing"
+
+
+def _hash_json(value) -> str:
+    encoded = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _file_hash(path: Path) -> str:
+    return content_hash(path) if path.is_file() else MISSING
+
+
+def site_dependencies(
+    template_engine,
+    model_type: str,
+    site_data: dict,
+    local_assets: Iterable[str] = (),
+    options: dict | None = None,
+) -> dict[str, str]:
+    """Calcular ``{dependencia: hash}`` de un sitio tal como se renderizaría ahora."""
+    dependencies: dict[str, str] = {}
+    for filename in ("index.html", "styles.css"):
+        path = template_engine.templates_dir / model_type / filename
+        dependencies[f"template:{model_type}/{filename}"] = _file_hash(path)
+    supporters = template_engine.templates_dir / model_type / SUPPORTERS_TEMPLATE
+    if not supporters.is_file():
+        supporters = template_engine.templates_dir / SHARED_PARTIALS_DIR / SUPPORTERS_TEMPLATE
+    dependencies[f"template:{supporters.parent.name}/{SUPPORTERS_TEMPLATE}"] = _file_hash(supporters)
+
+    models = template_engine.load_models_config().get("models", [])
+    model_config = next((model for model in models if model.get("id") == model_type), None)
+    dependencies[f"model:{model_type}"] = _hash_json(model_config)
+
+    for source in ENGINE_SOURCES:
+        dependencies[f"engine:{source.name}"] = _file_hash(source)
+
+    dependencies["content"] = _hash_json(site_data)
+    for asset in sorted(local_assets):
+        name = asset.split("/", 1)[1] if asset.startswith("images/") else asset
+        dependencies[f"asset:{asset}"] = _file_hash(publish_path(name))
+
+    if options is not None:
+        dependencies["options"] = _hash_json(options)
+    return dependencies
+
+
+def changed_dependencies(recorded: dict[str, str] | None, current: dict[str, str]) -> list[str]:
+    """Claves nuevas, eliminadas o con hash distinto; sin registro previo todo cuenta como cambio."""
+    if not recorded:
+        return sorted(current)
+    keys = set(recorded) | set(current)
+    return sorted(key for key in keys if recorded.get(key) != current.get(key))
+
+
+def load_dependencies(db, site_id: int) -> dict[str, str] | None:
+    build = db.query(SiteBuild).filter(SiteBuild.site_id == site_id).first()
+    if not build:
+        return None
+    try:
+        return json.loads(build.dependencies_json or "{}")
+    except json.JSONDecodeError:
+        return None
+
+
+def record_dependencies(db, site_id: int, model_type: str, dependencies: dict[str, str]) -> None:
+    """Guardar (sin hacer commit) las dependencias de la publicación recién hecha."""
+    if not dependencies:
+        return
+    build = db.query(SiteBuild).filter(SiteBuild.site_id == site_id).first()
+    if build is None:
+        build = SiteBuild(site_id=site_id)
+        db.add(build)
+    build.model_type = model_type
+    build.dependencies_json = json.dumps(dependencies, sort_keys=True)
+
+
+def forget_dependencies(db, site_id: int) -> None:
+    db.query(SiteBuild).filter(SiteBuild.site_id == site_id).delete()
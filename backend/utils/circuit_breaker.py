@@ -0,0 +1,75 @@
+"""Circuit breaker en memoria por host remoto para las descargas de assets."""
+from __future__ import annotations
+
+import time
+from threading import Lock
+from typing import Dict
+
+
+class HostCircuitBreaker:
+    """Cortar las peticiones a un host tras varios fallos seguidos de red.
+
+    Con ``threshold`` fallos consecutivos el circuito se abre ``cooldown_seconds``;
+    al vencer se deja pasar una sola petición de prueba: si funciona se cierra,
+    si falla vuelve a abrirse con el doble de espera (hasta ``max_cooldown_seconds``).
+    """
+
+    def __init__(self, threshold: int = 3, cooldown_seconds: float = 60, max_cooldown_seconds: float = 1800) -> None:
+        self.threshold = threshold
+        self.cooldown_seconds = cooldown_seconds
+        self.max_cooldown_seconds = max_cooldown_seconds
+        self._failures: Dict[str, int] = {}
+        self._open_until: Dict[str, float] = {}
+        self._cooldowns: Dict[str, float] = {}
+        self._lock = Lock()
+
+    def allow(self, host: str, now: float | None = None) -> bool:
+        """True si se puede contactar al host (cerrado o turno de la petición de prueba)."""
+        current = now or time.time()
+        with self._lock:
+            open_until = self._open_until.get(host)
+            if open_until is None:
+                return True
+            if open_until > current:
+                return False
+            # Medio abierto: las demás peticiones esperan el resultado de esta
+            self._open_until[host] = current + self._cooldowns.get(host, self.cooldown_seconds)
+            return True
+
+    def record_success(self, host: str) -> None:
+        with self._lock:
+            self._failures.pop(host, None)
+            self._open_until.pop(host, None)
+            self._cooldowns.pop(host, None)
+
+    def record_failure(self, host: str, now: float | None = None) -> bool:
+        """Registrar un fallo de red; devuelve True si el circuito quedó abierto."""
+        current = now or time.time()
+        with self._lock:
+            failures = self._failures.get(host, 0) + 1
+            self._failures[host] = failures
+            if host in self._open_until:
+                cooldown = min(self._cooldowns.get(host, self.cooldown_seconds) * 2, self.max_cooldown_seconds)
+            elif failures >= self.threshold:
+                cooldown = self.cooldown_seconds
+            else:
+                return False
+            self._cooldowns[host] = cooldown
+            self._open_until[host] = current + cooldown
+            return True
+
+    def list_open_hosts(self) -> list[dict[str, float]]:
+        """Snapshot de los hosts con el circuito abierto y los segundos que faltan."""
+        now = time.time()
+        with self._lock:
+            hosts = [
+                {
+                    "host": host,
+                    "failures": self._failures.get(host, 0),
+                    "open_for_seconds": round(until - now, 2),
+                }
+                for host, until in self._open_until.items()
+                if until > now
+            ]
+        hosts.sort(key=lambda entry: entry["open_for_seconds"], reverse=True)
+        return hosts
@@ -0,0 +1,247 @@
+"""Purga de CSS no usado e inlining de CSS crítico para los sitios publicados.
+
+Se trabaja sobre el ``index.html`` ya renderizado: las reglas de ``styles.css``
+que no coinciden con ningún elemento se eliminan, las que aplican a la parte
+visible al cargar (header, hero y elementos fijos) se incrustan en ``<head>``
+y la hoja completa se carga de forma diferida.
+"""
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+
+from bs4 import BeautifulSoup
+
+from backend.utils.minifier import minify_css
+
+STYLESHEET_PATH = "styles.css"
+
+_PSEUDO_RE = re.compile(r"::?[a-zA-Z-]+(\([^)]*\))?")
+_IDENT_RE = re.compile(r"[.#]([A-Za-z_][\w-]*)")
+_SCRIPT_WORD_RE = re.compile(r"[A-Za-z_][\w-]*")
+_FIXED_RE = re.compile(r"position\s*:\s*(fixed|sticky)", re.IGNORECASE)
+_TRAILING_COMBINATOR_RE = re.compile(r"[\s>+~]+$")
+_FONT_AWESOME_LINK_RE = re.compile(
+    r"<link\b[^>]*href=[\"'][^\"']*font-awesome[^\"']*[\"'][^>]*>\s*",
+    re.IGNORECASE,
+)
+_GROUPING_AT_RULES = ("@media", "@supports")
+
+
+@dataclass
+class CssOptimizationReport:
+    original_bytes: int
+    purged_bytes: int
+    critical_bytes: int
+    removed_rules: int
+    deferred_stylesheets: int
+    dropped_stylesheets: int
+
+
+def _split_blocks(css: str) -> list[tuple[str, str | None]]:
+    """Dividir CSS (sin comentarios) en pares (preludio, cuerpo) de primer nivel."""
+    items: list[tuple[str, str | None]] = []
+    index, length = 0, len(css)
+    while index < length:
+        brace = css.find("{", index)
+        semicolon = css.find(";", index)
+        if brace == -1:
+            rest = css[index:].strip()
+            if rest:
+                items.append((rest, None))
+            break
+        if semicolon != -1 and semicolon < brace:
+            # Sentencias como @import o @charset
+            items.append((css[index:semicolon + 1].strip(), None))
+            index = semicolon + 1
+            continue
+
+        depth, cursor = 1, brace + 1
+        while cursor < length and depth:
+            if css[cursor] == "{":
+                depth += 1
+            elif css[cursor] == "}":
+                depth -= 1
+            cursor += 1
+        items.append((css[index:brace].strip(), css[brace + 1:cursor - 1]))
+        index = cursor
+    return items
+
+
+def _split_selectors(prelude: str) -> list[str]:
+    selectors, depth, current = [], 0, []
+    for char in prelude:
+        if char in "([":
+            depth += 1
+        elif char in ")]":
+            depth -= 1
+        if char == "," and depth == 0:
+            selectors.append("".join(current).strip())
+            current = []
+            continue
+        current.append(char)
+    selectors.append("".join(current).strip())
+    return [selector for selector in selectors if selector]
+
+
+class _SelectorMatcher:
+    """Evalúa selectores contra un documento, de forma conservadora."""
+
+    def __init__(self, soup: BeautifulSoup, script_words: set[str]):
+        self.soup = soup
+        self.script_words = script_words
+        self._cache: dict[str, bool] = {}
+
+    def matches(self, selector: str) -> bool:
+        if selector in self._cache:
+            return self._cache[selector]
+        self._cache[selector] = result = self._matches(selector)
+        return result
+
+    def _matches(self, selector: str) -> bool:
+        # Clases o ids que manipula un script en línea (menús, toggles) se conservan
+        if any(name in self.script_words for name in _IDENT_RE.findall(selector)):
+            return True
+        stripped = _PSEUDO_RE.sub("", selector).strip()
+        stripped = _TRAILING_COMBINATOR_RE.sub("", stripped)
+        if not stripped or stripped in {"*", "html", "body"}:
+            return True
+        try:
+            return self.soup.select_one(stripped) is not None
+        except Exception:  # pylint: disable=broad-except
+            # Selectores que soupsieve no entiende se conservan
+            return True
+
+
+def _filter_rules(css: str, matcher: _SelectorMatcher, stats: dict) -> str:
+    output: list[str] = []
+    for prelude, body in _split_blocks(css):
+        if body is None:
+            output.append(prelude)
+            continue
+        if prelude.startswith(_GROUPING_AT_RULES):
+            nested = _filter_rules(body, matcher, stats)
+            if nested:
+                output.append(f"{prelude}{{{nested}}}")
+            continue
+        if prelude.startswith("@"):
+            output.append(f"{prelude}{{{body}}}")
+            continue
+
+        kept = [selector for selector in _split_selectors(prelude) if matcher.matches(selector)]
+        if not kept:
+            stats["removed"] = stats.get("removed", 0) + 1
+            continue
+        output.append(f"{','.join(kept)}{{{body}}}")
+    return "".join(output)
+
+
+def _fixed_selectors(css: str) -> list[str]:
+    selectors: list[str] = []
+    for prelude, body in _split_blocks(css):
+        if body is None:
+            continue
+        if prelude.startswith(_GROUPING_AT_RULES):
+            selectors.extend(_fixed_selectors(body))
+        elif not prelude.startswith("@") and _FIXED_RE.search(body):
+            selectors.extend(_split_selectors(prelude))
+    return selectors
+
+
+def _critical_document(soup: BeautifulSoup, css: str) -> BeautifulSoup:
+    """Construir un documento con lo visible al cargar: header, primera sección y elementos fijos."""
+    body = soup.body or soup
+    fragments = []
+    header = body.find("header")
+    if header is not None:
+        fragments.append(header)
+    first_section = body.find("section")
+    if first_section is not None:
+        fragments.append(first_section)
+
+    for selector in _fixed_selectors(css):
+        stripped = _PSEUDO_RE.sub("", selector).strip()
+        try:
+            element = soup.select_one(stripped) if stripped else None
+        except Exception:  # pylint: disable=broad-except
+            element = None
+        if element is not None and element not in fragments:
+            fragments.append(element)
+
+    markup = "".join(str(fragment) for fragment in fragments)
+    return BeautifulSoup(f"<html><body>{markup}</body></html>", "html.parser")
+
+
+def _script_words(soup: BeautifulSoup) -> set[str]:
+    words: set[str] = set()
+    for script in soup.find_all("script"):
+        if script.get("src"):
+            continue
+        words.update(_SCRIPT_WORD_RE.findall(script.get_text() or ""))
+    return words
+
+
+def _deferred_link(href: str) -> str:
+    return (
+        f'<link rel="preload" href="{href}" as="style" '
+        "onload=\"this.onload=null;this.rel='stylesheet'\">"
+        f'<noscript><link rel="stylesheet" href="{href}"></noscript>'
+    )
+
+
+def _uses_font_awesome(soup: BeautifulSoup) -> bool:
+    for element in soup.find_all(class_=True):
+        classes = element.get("class") or []
+        if any(name.startswith("fa-") for name in classes):
+            return True
+    return False
+
+
+def optimize_stylesheets(files: dict) -> tuple[dict, CssOptimizationReport | None]:
+    """Purgar ``styles.css``, incrustar el CSS crítico y diferir hojas externas."""
+    html = files.get("index.html")
+    css = files.get(STYLESHEET_PATH)
+    if not html or not isinstance(html, str) or not isinstance(css, str):
+        return files, None
+
+    soup = BeautifulSoup(html, "html.parser")
+    words = _script_words(soup)
+    normalized = minify_css(css)
+
+    stats: dict = {}
+    purged = _filter_rules(normalized, _SelectorMatcher(soup, words), stats)
+    critical = _filter_rules(purged, _SelectorMatcher(_critical_document(soup, purged), words), {})
+
+    deferred = 0
+    stylesheet_link = re.compile(
+        rf"<link\b[^>]*rel=[\"']stylesheet[\"'][^>]*href=[\"'](?:\./)?{re.escape(STYLESHEET_PATH)}[\"'][^>]*>",
+        re.IGNORECASE,
+    )
+    if stylesheet_link.search(html):
+        replacement = f"<style>{critical}</style>{_deferred_link(STYLESHEET_PATH)}"
+        html = stylesheet_link.sub(lambda _m: replacement, html, count=1)
+        deferred += 1
+
+    dropped = 0
+    font_awesome = _FONT_AWESOME_LINK_RE.search(html)
+    if font_awesome:
+        if _uses_font_awesome(soup):
+            href = re.search(r"href=[\"']([^\"']+)[\"']", font_awesome.group(0)).group(1)
+            html = html.replace(font_awesome.group(0), _deferred_link(href), 1)
+            deferred += 1
+        else:
+            html = html.replace(font_awesome.group(0), "", 1)
+            dropped += 1
+
+    optimized = dict(files)
+    optimized["index.html"] = html
+    optimized[STYLESHEET_PATH] = purged
+    report = CssOptimizationReport(
+        original_bytes=len(css.encode("utf-8")),
+        purged_bytes=len(purged.encode("utf-8")),
+        critical_bytes=len(critical.encode("utf-8")),
+        removed_rules=stats.get("removed", 0),
+        deferred_stylesheets=deferred,
+        dropped_stylesheets=dropped,
+    )
+    return optimized, report
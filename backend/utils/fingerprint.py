@@ -0,0 +1,99 @@
+"""Nombres con huella (hash del contenido) para los assets de los sitios publicados.
+
+``styles.css`` pasa a ``styles.<hash>.css`` y cada imagen local a
+``images/<hash>.<ext>``; el mismo contenido produce siempre el mismo nombre, por
+lo que esos archivos pueden cachearse como inmutables y, al republicar, solo se
+suben los que cambiaron de nombre.
+"""
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass, field
+from pathlib import Path, PurePosixPath
+from typing import Iterable
+
+from backend.utils.asset_manager import UPLOADS_DIR, content_hash, publish_path
+
+FINGERPRINT_LENGTH = 12
+FINGERPRINTED_SUFFIXES = (".css", ".js")
+# Rutas que ya nacen direccionadas por contenido
+IMMUTABLE_PREFIXES = ("images/variants/",)
+
+_FINGERPRINT_RE = re.compile(rf"(^|[./])[0-9a-f]{{{FINGERPRINT_LENGTH}}}\.[A-Za-z0-9]+$")
+
+
+@dataclass
+class FingerprintResult:
+    files: dict
+    asset_files: dict[str, Path] = field(default_factory=dict)
+    renamed: dict[str, str] = field(default_factory=dict)
+
+
+def is_fingerprinted(path: str) -> bool:
+    """Indica si la ruta publicada es inmutable (su nombre depende del contenido)."""
+    cleaned = path.strip().lstrip("/")
+    return cleaned.startswith(IMMUTABLE_PREFIXES) or bool(_FINGERPRINT_RE.search(cleaned))
+
+
+def _fingerprinted_name(path: str, digest: str) -> str:
+    posix = PurePosixPath(path)
+    return str(posix.with_name(f"{posix.stem}.{digest[:FINGERPRINT_LENGTH]}{posix.suffix}"))
+
+
+def _rewrite_references(content: str, renamed: dict[str, str]) -> str:
+    if not renamed or not content:
+        return content
+    alternatives = "|".join(re.escape(old) for old in sorted(renamed, key=len, reverse=True))
+    pattern = re.compile(rf"(?<=[\"'(\s,=])(?:\./)?({alternatives})(?=[\"')\s,?#])")
+    return pattern.sub(lambda match: renamed[match.group(1)], content)
+
+
+def local_asset_files(local_assets: Iterable[str], uploads_dir: Path | None = None) -> dict[str, Path]:
+    """Mapear rutas ``images/...`` a los archivos de uploads/ (su versión procesada si existe) sin renombrarlos."""
+    base_dir = uploads_dir or UPLOADS_DIR
+    mapping: dict[str, Path] = {}
+    for asset in local_assets:
+        relative = (asset or "").strip().lstrip("/")
+        if not relative.startswith("images/"):
+            continue
+        source = publish_path(relative.split("/", 1)[1], base_dir)
+        if source.is_file():
+            mapping[relative] = source
+    return mapping
+
+
+def fingerprint_site(
+    files: dict,
+    local_assets: Iterable[str],
+    uploads_dir: Path | None = None,
+) -> FingerprintResult:
+    """Renombrar CSS/JS generados e imágenes locales por hash y reescribir sus referencias."""
+    result = FingerprintResult(files={})
+
+    for relative, source in sorted(local_asset_files(local_assets, uploads_dir).items()):
+        if is_fingerprinted(relative):
+            result.asset_files[relative] = source
+            continue
+        target = f"images/{content_hash(source)[:FINGERPRINT_LENGTH]}{source.suffix.lower()}"
+        result.renamed[relative] = target
+        result.asset_files[target] = source
+
+    # Primero los recursos de texto (pueden referenciar imágenes), luego el HTML
+    for path, content in files.items():
+        if not isinstance(content, str) or not path.endswith(FINGERPRINTED_SUFFIXES) or is_fingerprinted(path):
+            continue
+        rewritten = _rewrite_references(content, result.renamed)
+        digest = hashlib.sha256(rewritten.encode("utf-8")).hexdigest()
+        target = _fingerprinted_name(path, digest)
+        result.renamed[path] = target
+        result.files[target] = rewritten
+
+    for path, content in files.items():
+        if path in result.renamed:
+            continue
+        if isinstance(content, str):
+            content = _rewrite_references(content, result.renamed)
+        result.files[path] = content
+
+    return result
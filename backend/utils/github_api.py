@@ -2,10 +2,14 @@ from github import Github, GithubException
 import os
 import json
 import time
-from typing import Optional, Iterable
+from pathlib import Path
+from typing import Optional, Iterable, Mapping
 
 import requests
 
+from backend.utils.asset_manager import iter_uploads, upload_path
+from backend.utils.fingerprint import is_fingerprinted
+
 class GitHubPublisher:
     """Utilidad para publicar sitios en GitHub Pages"""
     
@@ -523,6 +527,7 @@ class GitHubPublisher:
         site_files: dict,
         custom_domain: Optional[str] = None,
         required_uploads: Optional[Iterable[str]] = None,
+        asset_files: Optional[Mapping[str, Path]] = None,
     ) -> dict:
         """
         Publicar sitio completo en GitHub Pages
@@ -532,23 +537,46 @@ class GitHubPublisher:
             site_files: Dict con archivos {path: content}
             custom_domain: Dominio personalizado opcional
             required_uploads: Lista opcional de archivos de uploads/ que se deben subir
+            asset_files: Mapa opcional {ruta en el repo: archivo local}; tiene prioridad
+                sobre required_uploads. Los nombres con huella ya presentes no se resuben.
         """
         try:
+            # Los archivos con huella son inmutables: si ya existen en el repo no se resuben
+            existing_paths = self._list_repo_paths(repo_name)
+            pending_files = {
+                path: content
+                for path, content in site_files.items()
+                if not (is_fingerprinted(path) and path in existing_paths)
+            }
+
             # Subir archivos del sitio
-            result = self.upload_multiple_files(repo_name, site_files, "Publish site")
+            result = self.upload_multiple_files(repo_name, pending_files, "Publish site")
             
             if not result["success"]:
                 return result
             
+            if asset_files is not None:
+                for repo_path, local_path in sorted(asset_files.items()):
+                    if is_fingerprinted(repo_path) and repo_path in existing_paths:
+                        continue
+                    try:
+                        self.upload_binary_file(
+                            repo_name=repo_name,
+                            file_path=repo_path,
+                            file_content=Path(local_path).read_bytes(),
+                            commit_message=f"Upload asset {repo_path}"
+                        )
+                    except Exception as e:
+                        print(f"Warning: Could not upload asset {repo_path}: {e}")
+
             # Subir imágenes locales desde uploads/
-            from pathlib import Path
             uploads_dir = Path(__file__).parent.parent.parent / "uploads"
-            if uploads_dir.exists():
+            if asset_files is None and uploads_dir.exists():
                 allowed_suffixes = {'.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg'}
 
                 def _iter_required_files():
                     if not required_uploads:
-                        yield from uploads_dir.glob("*")
+                        yield from iter_uploads(uploads_dir)
                         return
 
                     normalized = set()
@@ -561,13 +589,13 @@ class GitHubPublisher:
                         normalized.add(sanitized)
 
                     for filename in normalized:
-                        candidate = uploads_dir / filename
+                        candidate = upload_path(filename, uploads_dir)
                         if candidate.exists():
-                            yield candidate
+                            yield filename, candidate
                         else:
                             print(f"Warning: required asset {filename} not found in uploads/")
 
-                for image_file in _iter_required_files():
+                for relative_name, image_file in _iter_required_files():
                     if image_file.is_file() and image_file.suffix.lower() in allowed_suffixes:
                         try:
                             with open(image_file, 'rb') as f:
@@ -575,9 +603,9 @@ class GitHubPublisher:
 
                             self.upload_binary_file(
                                 repo_name=repo_name,
-                                file_path=f"images/{image_file.name}",
+                                file_path=f"images/{relative_name}",
                                 file_content=image_content,
-                                commit_message=f"Upload image {image_file.name}"
+                                commit_message=f"Upload image {relative_name}"
                             )
                         except Exception as e:
                             print(f"Warning: Could not upload image {image_file.name}: {e}")
@@ -610,6 +638,18 @@ class GitHubPublisher:
         except Exception as e:
             return {"success": False, "error": str(e)}
     
+    def _list_repo_paths(self, repo_name: str) -> set[str]:
+        """Rutas de archivos ya publicados en la rama main (vacío si el repo es nuevo)."""
+        try:
+            repo = self.user.get_repo(repo_name)
+            tree = repo.get_git_tree("main", recursive=True)
+        except GithubException:
+            return set()
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"⚠️ No se pudo listar el contenido de {repo_name}: {exc}")
+            return set()
+        return {element.path for element in tree.tree if element.type == "blob"}
+
     def delete_repository(self, repo_name: str) -> dict:
         """Eliminar repositorio"""
         try:
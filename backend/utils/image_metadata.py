@@ -0,0 +1,186 @@
+"""Índice cacheado de metadatos (dimensiones, formato) de las imágenes locales.
+
+El índice vive en ``STORAGE_DIR/image_metadata.json`` y cada entrada se valida
+con el mtime y el tamaño del archivo, así que basta con leer la cabecera de una
+imagen una sola vez. Si otro proceso reescribe el archivo se vuelve a leer antes
+de usarlo, y cada escritura se fusiona sobre lo último del disco. Es una caché:
+si aun así dos procesos escriben a la vez, la entrada perdida simplemente se
+recalcula en el siguiente render.
+"""
+from __future__ import annotations
+
+import base64
+import io
+import json
+import os
+import tempfile
+from pathlib import Path
+from threading import Lock
+
+from backend.utils.asset_manager import STORAGE_DIR, UPLOADS_DIR, upload_path
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+except ImportError:  # pragma: no cover - Pillow está en requirements.txt
+    Image = None
+    ImageFilter = None
+    ImageOps = None
+
+INDEX_FILENAME = "image_metadata.json"
+PLACEHOLDER_SIZE = 16
+
+
+def uploads_name(relative_path: str | None) -> str | None:
+    """Convertir ``images/<archivo>`` (o ``/images/...``) al nombre dentro de uploads/."""
+    cleaned = (relative_path or "").strip().lstrip("/")
+    if not cleaned.startswith("images/"):
+        return None
+    name = cleaned.split("/", 1)[1].split("?", 1)[0].split("#", 1)[0]
+    return name or None
+
+
+class ImageMetadataIndex:
+    """Metadatos de imágenes de uploads/ persistidos como JSON."""
+
+    def __init__(self, index_path: Path | None = None, uploads_dir: Path | None = None):
+        self.index_path = index_path or (STORAGE_DIR / INDEX_FILENAME)
+        self.uploads_dir = uploads_dir or UPLOADS_DIR
+        self._entries: dict[str, dict] | None = None
+        self._loaded_stamp: tuple[int, int] | None = None
+        self._lock = Lock()
+
+    def _stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = self.index_path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _load(self) -> dict[str, dict]:
+        """Entradas en memoria; se releen si el archivo cambió desde la última lectura."""
+        stamp = self._stamp()
+        if self._entries is None or stamp != self._loaded_stamp:
+            try:
+                with open(self.index_path, "r", encoding="utf-8") as handle:
+                    data = json.load(handle)
+                self._entries = data if isinstance(data, dict) else {}
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._entries = {}
+            self._loaded_stamp = stamp
+        return self._entries
+
+    def _store(self, name: str, entry: dict) -> None:
+        """Guardar una entrada sobre lo último del disco (llamar con ``self._lock`` tomado)."""
+        self._load()[name] = entry
+        self._save()
+
+    def _save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, temp_name = tempfile.mkstemp(dir=self.index_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(self._entries, handle, ensure_ascii=False, sort_keys=True)
+            os.replace(temp_name, self.index_path)
+            self._loaded_stamp = self._stamp()
+        except OSError as exc:
+            print(f"⚠️ No se pudo guardar el índice de imágenes: {exc}")
+            try:
+                os.unlink(temp_name)
+            except OSError:
+                pass
+
+    def _inspect(self, path: Path) -> dict:
+        entry: dict = {}
+        if Image is None:
+            return entry
+        try:
+            with Image.open(path) as image:
+                width, height = image.size
+                # Fotos de cámara: la orientación EXIF intercambia ancho y alto
+                orientation = image.getexif().get(0x0112, 1)
+                if orientation in (5, 6, 7, 8):
+                    width, height = height, width
+                entry.update({"width": width, "height": height, "format": image.format})
+        except Exception:  # pylint: disable=broad-except
+            pass
+        return entry
+
+    def get(self, relative_path: str | None) -> dict | None:
+        """Obtener los metadatos de ``images/<archivo>``; ``None`` si no es un asset local."""
+        name = uploads_name(relative_path)
+        if not name:
+            return None
+        path = upload_path(name, self.uploads_dir)
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+
+        with self._lock:
+            entries = self._load()
+            entry = entries.get(name)
+            if entry and entry.get("mtime") == stat.st_mtime and entry.get("size") == stat.st_size:
+                return entry
+
+        entry = {"mtime": stat.st_mtime, "size": stat.st_size, **self._inspect(path)}
+        with self._lock:
+            self._store(name, entry)
+        return entry
+
+    def _compute_placeholder(self, path: Path) -> dict:
+        """Miniatura de 16px desenfocada (data URI JPEG) y color dominante."""
+        if Image is None:
+            return {}
+        try:
+            with Image.open(path) as opened:
+                image = ImageOps.exif_transpose(opened)
+                if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+                    # Con transparencia el fondo difuminado se vería detrás del logo/ícono
+                    return {}
+                image = image.convert("RGB")
+                red, green, blue = image.resize((1, 1), Image.BOX).getpixel((0, 0))
+                image.thumbnail((PLACEHOLDER_SIZE, PLACEHOLDER_SIZE))
+                blurred = image.filter(ImageFilter.GaussianBlur(1))
+                buffer = io.BytesIO()
+                blurred.save(buffer, format="JPEG", quality=50, optimize=True)
+        except Exception:  # pylint: disable=broad-except
+            return {}
+
+        encoded = base64.b64encode(buffer.getvalue()).decode("ascii")
+        return {
+            "lqip": f"data:image/jpeg;base64,{encoded}",
+            "color": f"#{red:02x}{green:02x}{blue:02x}",
+        }
+
+    def placeholder(self, relative_path: str | None, compute: bool = True) -> dict | None:
+        """Placeholder ``{"lqip", "color"}`` de una imagen local.
+
+        Con ``compute=False`` solo se devuelve lo ya calculado (usado en cada
+        render); el cálculo se hace al publicar.
+        """
+        entry = self.get(relative_path)
+        if entry is None:
+            return None
+        if "placeholder" in entry or not compute:
+            return entry.get("placeholder") or None
+
+        name = uploads_name(relative_path)
+        placeholder = self._compute_placeholder(upload_path(name, self.uploads_dir))
+        with self._lock:
+            # Copia fusionada con la versión actual: ``entry`` pudo cambiar en otro hilo o proceso
+            current = self._load().get(name) or entry
+            self._store(name, {**current, "placeholder": placeholder})
+        return placeholder or None
+
+    def ensure_placeholders(self, paths) -> int:
+        """Precalcular placeholders para varios assets; devuelve cuántos quedaron disponibles."""
+        return sum(1 for path in paths if path and self.placeholder(path))
+
+    def dimensions(self, relative_path: str | None) -> tuple[int, int] | None:
+        entry = self.get(relative_path)
+        if not entry or not entry.get("width") or not entry.get("height"):
+            return None
+        return entry["width"], entry["height"]
+
+
+image_metadata_index = ImageMetadataIndex()
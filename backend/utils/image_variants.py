@@ -0,0 +1,169 @@
+"""Derivados responsivos (varios anchos en WebP) para las imágenes locales de uploads/.
+
+Los derivados se nombran con el hash del contenido de la imagen original, de modo
+que cada combinación imagen/ancho se genera una sola vez aunque la misma imagen
+aparezca en varios sitios o bajo varios nombres.
+"""
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from threading import Lock
+from typing import Iterable
+
+from backend.utils.asset_manager import UPLOADS_DIR, VARIANTS_DIRNAME, content_hash, shard_relpath, upload_path
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow está en requirements.txt
+    Image = None
+    ImageOps = None
+
+VARIANT_WIDTHS = (480, 960, 1600)
+VARIANT_QUALITY = 80
+RESIZABLE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+HERO_SIZES = "100vw"
+DEFAULT_SIZES = "(max-width: 768px) 100vw, 50vw"
+
+_IMG_TAG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_SRC_RE = re.compile(r"\ssrc=([\"'])(images/[^\"']+)\1", re.IGNORECASE)
+
+# Derivados por shard y hash, válidos mientras no cambie el mtime de los directorios donde viven
+_listing_cache: dict[str, tuple[tuple, list[tuple[str, int]]]] = {}
+_listing_lock = Lock()
+
+
+def _variants_dir() -> Path:
+    return UPLOADS_DIR / VARIANTS_DIRNAME
+
+
+def _source_path(relative_path: str) -> Path | None:
+    cleaned = (relative_path or "").strip().lstrip("/")
+    if not cleaned.startswith("images/"):
+        return None
+    name = cleaned.split("/", 1)[1]
+    if not name or name.startswith(f"{VARIANTS_DIRNAME}/"):
+        return None
+    path = upload_path(name, UPLOADS_DIR)
+    if path.suffix.lower() not in RESIZABLE_SUFFIXES or not path.is_file():
+        return None
+    return path
+
+
+def _variant_name(digest: str, width: int) -> str:
+    return f"{digest[:20]}-{width}w.webp"
+
+
+def _variant_path(digest: str, width: int) -> Path:
+    return UPLOADS_DIR / shard_relpath(f"{VARIANTS_DIRNAME}/{_variant_name(digest, width)}")
+
+
+def _target_widths(original_width: int) -> list[int]:
+    widths = {width for width in VARIANT_WIDTHS if width < original_width}
+    widths.add(min(original_width, max(VARIANT_WIDTHS)))
+    return sorted(widths)
+
+
+def _dir_mtime(directory: Path) -> int | None:
+    try:
+        return directory.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def existing_variants(relative_path: str) -> list[tuple[str, int]]:
+    """Listar los derivados ya generados como pares (ruta images/..., ancho).
+
+    El hash del original ya se memoriza por mtime y tamaño; el listado se
+    memoriza mientras no cambien los directorios de derivados, así que el render
+    no recorre el disco en cada ``<img>``.
+    """
+    source = _source_path(relative_path)
+    if source is None:
+        return []
+    digest = content_hash(source)
+    prefix = digest[:20]
+    # Shard del hash y, para derivados aún no migrados, la raíz de variants/
+    directories = (_variant_path(digest, 0).parent, _variants_dir())
+    stamp = tuple(_dir_mtime(directory) for directory in directories)
+    key = f"{directories[0]}/{prefix}"
+    with _listing_lock:
+        cached = _listing_cache.get(key)
+        if cached and cached[0] == stamp:
+            return list(cached[1])
+
+    found: dict[int, str] = {}
+    for directory, mtime in zip(directories, stamp):
+        if mtime is None:
+            continue
+        for candidate in directory.glob(f"{prefix}-*w.webp"):
+            width = candidate.stem.rsplit("-", 1)[-1].rstrip("w")
+            if width.isdigit():
+                found.setdefault(int(width), f"images/{VARIANTS_DIRNAME}/{candidate.name}")
+    variants = [(path, width) for width, path in sorted(found.items())]
+    with _listing_lock:
+        _listing_cache[key] = (stamp, variants)
+    return list(variants)
+
+
+def ensure_variants(relative_path: str) -> list[tuple[str, int]]:
+    """Generar (si faltan) los derivados WebP de una imagen local y devolverlos."""
+    source = _source_path(relative_path)
+    if source is None or Image is None:
+        return []
+
+    digest = content_hash(source)
+
+    try:
+        with Image.open(source) as opened:
+            image = ImageOps.exif_transpose(opened)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "transparency" in image.info else "RGB")
+
+            for width in _target_widths(image.width):
+                target = _variant_path(digest, width)
+                if target.exists() or (_variants_dir() / target.name).exists():
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                height = max(1, round(image.height * width / image.width))
+                resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+                temp_path = target.with_suffix(".tmp")
+                resized.save(temp_path, format="WEBP", quality=VARIANT_QUALITY, method=4)
+                os.replace(temp_path, target)
+    except Exception as exc:  # pylint: disable=broad-except
+        print(f"⚠️ No se pudieron generar derivados para {relative_path}: {exc}")
+
+    return existing_variants(relative_path)
+
+
+def ensure_variants_for(paths: Iterable[str]) -> set[str]:
+    """Generar derivados para un conjunto de assets y devolver las rutas a publicar."""
+    generated: set[str] = set()
+    for path in paths:
+        generated.update(variant for variant, _width in ensure_variants(path))
+    return generated
+
+
+def apply_srcset(html: str, hero_src: str | None = None) -> str:
+    """Agregar ``srcset``/``sizes`` a las imágenes locales que ya tienen derivados."""
+    def _rewrite(match: re.Match) -> str:
+        tag = match.group(0)
+        if "srcset=" in tag.lower():
+            return tag
+        src_match = _SRC_RE.search(tag)
+        if not src_match:
+            return tag
+        src = src_match.group(2)
+        variants = existing_variants(src)
+        if not variants:
+            return tag
+
+        srcset = ", ".join(f"{path} {width}w" for path, width in variants)
+        sizes = HERO_SIZES if hero_src and src == hero_src else DEFAULT_SIZES
+        closing = "/>" if tag.endswith("/>") else ">"
+        body = tag[: -len(closing)].rstrip()
+        return f'{body} srcset="{srcset}" sizes="{sizes}"{closing}'
+
+    return _IMG_TAG_RE.sub(_rewrite, html)
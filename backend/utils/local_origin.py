@@ -0,0 +1,171 @@
+"""Origen local: sitios pre-renderizados servidos desde disco por la propia app.
+
+Cada render se escribe en ``STORAGE_DIR/origin/<slug>/<build>/`` junto con sus
+variantes ``.gz``/``.br`` y un ``manifest.json`` con ETag y tipo de cada archivo;
+el archivo ``CURRENT`` apunta al build activo y se reemplaza de forma atómica,
+así que una petición nunca ve un sitio a medio escribir ni ejecuta Jinja.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import mimetypes
+import os
+import shutil
+import tempfile
+import uuid
+from dataclasses import dataclass
+from pathlib import Path, PurePosixPath
+from threading import Lock
+from typing import Mapping
+
+from backend.utils.asset_manager import STORAGE_DIR
+from backend.utils.fingerprint import is_fingerprinted
+from backend.utils.minifier import precompress
+
+ORIGIN_DIRNAME = "origin"
+CURRENT_FILENAME = "CURRENT"
+MANIFEST_FILENAME = "manifest.json"
+COMPRESSIBLE_SUFFIXES = {".html", ".css", ".js", ".svg", ".json", ".txt", ".xml"}
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "public, max-age=0, must-revalidate"
+ENCODING_SUFFIXES = {"br": ".br", "gzip": ".gz"}
+
+
+@dataclass
+class OriginFile:
+    path: Path
+    etag: str
+    media_type: str
+    cache_control: str
+    encoding: str | None = None
+
+
+def _safe_relative(path: str) -> str | None:
+    cleaned = PurePosixPath(path.strip().lstrip("/"))
+    if not cleaned.parts or any(part in ("..", "") for part in cleaned.parts) or cleaned.name.startswith("."):
+        return None
+    return cleaned.as_posix()
+
+
+def _write_atomic(target: Path, data: bytes) -> None:
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    with os.fdopen(fd, "wb") as handle:
+        handle.write(data)
+    os.replace(temp_name, target)
+
+
+class LocalOrigin:
+    """Escribe builds de sitios en disco y resuelve peticiones contra el build activo."""
+
+    def __init__(self, root: Path | None = None):
+        self.root = root or (STORAGE_DIR / ORIGIN_DIRNAME)
+        self._manifests: dict[tuple[str, str], dict] = {}
+        self._lock = Lock()
+
+    def _site_dir(self, slug: str) -> Path:
+        return self.root / slug
+
+    def current_build(self, slug: str) -> str | None:
+        try:
+            value = (self._site_dir(slug) / CURRENT_FILENAME).read_text(encoding="utf-8").strip()
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        return value or None
+
+    def write(self, slug: str, files: Mapping[str, str | bytes], asset_files: Mapping[str, Path] | None = None) -> str:
+        """Escribir un build completo y activarlo; devuelve su identificador."""
+        build_id = uuid.uuid4().hex[:12]
+        build_dir = self._site_dir(slug) / build_id
+        manifest: dict[str, dict] = {}
+
+        def _add(relative: str, data: bytes) -> None:
+            safe = _safe_relative(relative)
+            if safe is None:
+                return
+            target = build_dir / safe
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+            entry = {"etag": f'"{hashlib.sha256(data).hexdigest()[:32]}"', "encodings": []}
+            if target.suffix.lower() in COMPRESSIBLE_SUFFIXES:
+                for encoding, compressed in precompress(data).items():
+                    if len(compressed) < len(data):
+                        target.with_name(target.name + ENCODING_SUFFIXES[encoding]).write_bytes(compressed)
+                        entry["encodings"].append(encoding)
+            manifest[safe] = entry
+
+        for relative, content in files.items():
+            _add(relative, content if isinstance(content, bytes) else str(content).encode("utf-8"))
+        for relative, source in (asset_files or {}).items():
+            _add(relative, Path(source).read_bytes())
+
+        _write_atomic(build_dir / MANIFEST_FILENAME, json.dumps(manifest, sort_keys=True).encode("utf-8"))
+        previous = self.current_build(slug)
+        _write_atomic(self._site_dir(slug) / CURRENT_FILENAME, build_id.encode("utf-8"))
+        self._prune(slug, keep={build_id, previous})
+        return build_id
+
+    def _prune(self, slug: str, keep: set) -> None:
+        # Se conserva el build anterior para las peticiones que aún lo estén leyendo
+        for child in self._site_dir(slug).iterdir():
+            if child.is_dir() and child.name not in keep:
+                shutil.rmtree(child, ignore_errors=True)
+        with self._lock:
+            for key in [key for key in self._manifests if key[0] == slug and key[1] not in keep]:
+                del self._manifests[key]
+
+    def remove(self, slug: str) -> None:
+        shutil.rmtree(self._site_dir(slug), ignore_errors=True)
+        with self._lock:
+            for key in [key for key in self._manifests if key[0] == slug]:
+                del self._manifests[key]
+
+    def _manifest(self, slug: str, build_id: str) -> dict:
+        key = (slug, build_id)
+        with self._lock:
+            cached = self._manifests.get(key)
+        if cached is not None:
+            return cached
+        try:
+            with open(self._site_dir(slug) / build_id / MANIFEST_FILENAME, "r", encoding="utf-8") as handle:
+                manifest = json.load(handle)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+        with self._lock:
+            self._manifests[key] = manifest
+        return manifest
+
+    def resolve(self, slug: str, path: str, accept_encoding: str = "") -> OriginFile | None:
+        """Archivo a servir para ``/sites/<slug>/<path>`` con la mejor codificación aceptada."""
+        if _safe_relative(slug) != slug:
+            return None
+        build_id = self.current_build(slug)
+        if not path or path.endswith("/"):
+            path = f"{path or ''}index.html"
+        relative = _safe_relative(path)
+        if not build_id or relative is None:
+            return None
+        entry = self._manifest(slug, build_id).get(relative)
+        if entry is None:
+            return None
+
+        target = self._site_dir(slug) / build_id / relative
+        media_type = mimetypes.guess_type(relative)[0] or "application/octet-stream"
+        cache_control = IMMUTABLE_CACHE_CONTROL if is_fingerprinted(relative) else REVALIDATE_CACHE_CONTROL
+
+        accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+        for encoding in ("br", "gzip"):
+            if encoding in entry.get("encodings", []) and encoding in accepted:
+                return OriginFile(
+                    path=target.with_name(target.name + ENCODING_SUFFIXES[encoding]),
+                    # Cada representación comprimida tiene su propio ETag fuerte
+                    etag=f'{entry["etag"][:-1]}-{encoding}"',
+                    media_type=media_type,
+                    cache_control=cache_control,
+                    encoding=encoding,
+                )
+        return OriginFile(path=target, etag=entry["etag"], media_type=media_type, cache_control=cache_control)
+
+
+local_origin = LocalOrigin()
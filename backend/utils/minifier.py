@@ -0,0 +1,252 @@
+"""Minificación conservadora de HTML, CSS y JS para los sitios generados.
+
+Las transformaciones están pensadas para la salida de nuestras plantillas:
+reducen espacios y comentarios sin reescribir la semántica del documento.
+Cada archivo se reporta con sus bytes originales, minificados y comprimidos.
+"""
+from __future__ import annotations
+
+import gzip
+import re
+from dataclasses import asdict, dataclass
+
+try:  # Brotli es opcional; si no está instalado solo se reporta gzip
+    import brotli  # type: ignore
+except ImportError:  # pragma: no cover - depende del entorno
+    brotli = None
+
+_CSS_STRING_OR_COMMENT_RE = re.compile(
+    r"(\"(?:\\.|[^\"\\])*\"|'(?:\\.|[^'\\])*')|/\*.*?\*/", re.DOTALL
+)
+_CSS_PUNCT_RE = re.compile(r"\s*([{};,>])\s*")
+_CSS_COLON_RE = re.compile(r":\s+")
+# Espacio antes de ":" en una declaración ("color :red"); en un selector
+# ("a :hover") el espacio es un combinador y no se toca
+_CSS_PROPERTY_COLON_RE = re.compile(r"([{;][-\w]+)\s+:(?=[^{}]*(?:[;}]|$))")
+
+_HTML_COMMENT_RE = re.compile(r"<!--(?!\[if).*?-->", re.DOTALL)
+_HTML_RAW_BLOCK_RE = re.compile(
+    r"<(script|style|pre|textarea)\b([^>]*)>(.*?)</\1\s*>",
+    re.DOTALL | re.IGNORECASE,
+)
+_HTML_BETWEEN_TAGS_RE = re.compile(r"(<[^>]+>)\s+(?=<(/?)([a-zA-Z0-9]+))")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Etiquetas de bloque: los espacios entre ellas no se renderizan
+_BLOCK_TAGS = {
+    "html", "head", "body", "meta", "link", "title", "script", "style", "noscript",
+    "header", "footer", "main", "nav", "section", "article", "aside", "div", "p",
+    "ul", "ol", "li", "h1", "h2", "h3", "h4", "h5", "h6", "form", "table", "thead",
+    "tbody", "tr", "td", "th", "figure", "figcaption", "picture", "source", "iframe",
+    "!doctype", "br", "hr",
+}
+
+MINIFIABLE_SUFFIXES = (".html", ".css", ".js")
+
+
+@dataclass
+class FileOptimization:
+    path: str
+    original_bytes: int
+    optimized_bytes: int
+    gzip_bytes: int
+    brotli_bytes: int | None = None
+
+    @property
+    def saved_bytes(self) -> int:
+        return self.original_bytes - self.optimized_bytes
+
+    def as_dict(self) -> dict:
+        data = asdict(self)
+        data["saved_bytes"] = self.saved_bytes
+        return data
+
+
+def _protect_css_strings(text: str, store: list[str]) -> str:
+    """Guardar las cadenas literales y descartar los comentarios en una sola pasada."""
+    def _stash(match: re.Match) -> str:
+        if not match.group(1):
+            return ""
+        store.append(match.group(1))
+        return f"\x00{len(store) - 1}\x00"
+
+    return _CSS_STRING_OR_COMMENT_RE.sub(_stash, text)
+
+
+def _restore(text: str, store: list[str]) -> str:
+    return re.sub(r"\x00(\d+)\x00", lambda m: store[int(m.group(1))], text)
+
+
+def minify_css(css: str) -> str:
+    """Eliminar comentarios y espacios redundantes respetando cadenas literales."""
+    if not css:
+        return css
+    strings: list[str] = []
+    text = _protect_css_strings(css, strings)
+    text = _WHITESPACE_RE.sub(" ", text)
+    text = _CSS_PUNCT_RE.sub(r"\1", text)
+    text = _CSS_COLON_RE.sub(":", text)
+    text = _CSS_PROPERTY_COLON_RE.sub(r"\1:", text)
+    text = text.replace(";}", "}")
+    return _restore(text.strip(), strings)
+
+
+def _js_literal_lines(lines: list[str]) -> list[bool] | None:
+    """Para cada línea, si empieza dentro de un template literal o una cadena continuada.
+
+    Devuelve ``None`` si el código no se puede recorrer con seguridad (cadenas
+    sin cerrar, por ejemplo una expresión regular con comillas).
+    """
+    inside = [False]
+    stack: list[str] = []  # "`" por template abierto, "{" por cada llave dentro de ${...}
+    quote = None
+    block_comment = False
+    for line in lines:
+        index = 0
+        while index < len(line):
+            char = line[index]
+            if block_comment:
+                if line.startswith("*/", index):
+                    block_comment = False
+                    index += 1
+            elif stack and stack[-1] == "`":
+                if char == "\\":
+                    index += 1
+                elif char == "`":
+                    stack.pop()
+                elif line.startswith("${", index):
+                    stack.append("{")
+                    index += 1
+            elif quote:
+                if char == "\\":
+                    index += 1
+                elif char == quote:
+                    quote = None
+            elif char in "'\"":
+                quote = char
+            elif char == "`":
+                stack.append("`")
+            elif line.startswith("//", index):
+                break
+            elif line.startswith("/*", index):
+                block_comment = True
+                index += 1
+            elif char == "{" and stack:
+                stack.append("{")
+            elif char == "}" and stack:
+                stack.pop()
+            index += 1
+        if quote and not line.endswith("\\"):
+            return None
+        inside.append(bool(quote) or bool(stack and stack[-1] == "`"))
+    if quote or stack:
+        return None
+    return inside
+
+
+def minify_js(js: str) -> str:
+    """Minificación segura por líneas: quita indentación, líneas vacías y comentarios de línea.
+
+    Se conservan los saltos de línea para no depender de la inserción automática
+    de punto y coma. El contenido de los template literals (y de las cadenas
+    continuadas con ``\\``) se copia sin tocar; si el código no se puede recorrer
+    con seguridad se devuelve tal cual.
+    """
+    if not js:
+        return js
+    source = js.splitlines()
+    inside = _js_literal_lines(source)
+    if inside is None:
+        return js
+    lines = []
+    for number, line in enumerate(source):
+        starts_inside, ends_inside = inside[number], inside[number + 1]
+        if starts_inside:
+            lines.append(line if ends_inside else line.rstrip())
+            continue
+        stripped = line.lstrip() if ends_inside else line.strip()
+        if not stripped or stripped.startswith("//"):
+            continue
+        lines.append(stripped)
+    return "\n".join(lines)
+
+
+def _minify_raw_block(match: re.Match, store: list[str]) -> str:
+    tag, attrs, body = match.group(1), match.group(2), match.group(3)
+    lowered = tag.lower()
+    if lowered == "style":
+        body = minify_css(body)
+    elif lowered == "script" and "src=" not in attrs.lower() and "json" not in attrs.lower():
+        body = minify_js(body)
+    attrs = _WHITESPACE_RE.sub(" ", attrs)
+    store.append(f"<{tag}{attrs}>{body}</{tag}>")
+    return f"\x00{len(store) - 1}\x00"
+
+
+def _collapse_between_tags(match: re.Match) -> str:
+    previous_tag = match.group(1)
+    next_name = match.group(3).lower()
+    previous_name = previous_tag[1:].lstrip("/").split(None, 1)[0].rstrip(">/").lower()
+    if previous_name in _BLOCK_TAGS or next_name in _BLOCK_TAGS:
+        return previous_tag
+    return f"{previous_tag} "
+
+
+def minify_html(html: str) -> str:
+    """Quitar comentarios y colapsar espacios en la salida de Jinja.
+
+    Los bloques ``<script>`` y ``<style>`` en línea se minifican con sus
+    respectivos minificadores; ``<pre>`` y ``<textarea>`` se dejan intactos.
+    """
+    if not html:
+        return html
+    blocks: list[str] = []
+    text = _HTML_RAW_BLOCK_RE.sub(lambda m: _minify_raw_block(m, blocks), html)
+    text = _HTML_COMMENT_RE.sub("", text)
+    text = _WHITESPACE_RE.sub(" ", text)
+    text = _HTML_BETWEEN_TAGS_RE.sub(_collapse_between_tags, text)
+    return _restore(text.strip(), blocks)
+
+
+def minify_content(path: str, content: str) -> str:
+    lowered = path.lower()
+    if lowered.endswith(".html"):
+        return minify_html(content)
+    if lowered.endswith(".css"):
+        return minify_css(content)
+    if lowered.endswith(".js"):
+        return minify_js(content)
+    return content
+
+
+def precompress(content: str | bytes) -> dict[str, bytes]:
+    """Generar variantes comprimidas (gzip y, si está disponible, brotli)."""
+    raw = content.encode("utf-8") if isinstance(content, str) else content
+    variants = {"gzip": gzip.compress(raw, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        variants["br"] = brotli.compress(raw)
+    return variants
+
+
+def optimize_site_files(files: dict) -> tuple[dict, list[FileOptimization]]:
+    """Minificar los archivos de texto generados y reportar los bytes ahorrados por archivo."""
+    optimized: dict = {}
+    report: list[FileOptimization] = []
+    for path, content in files.items():
+        if not isinstance(content, str) or not path.lower().endswith(MINIFIABLE_SUFFIXES):
+            optimized[path] = content
+            continue
+
+        minified = minify_content(path, content)
+        optimized[path] = minified
+        compressed = precompress(minified)
+        report.append(
+            FileOptimization(
+                path=path,
+                original_bytes=len(content.encode("utf-8")),
+                optimized_bytes=len(minified.encode("utf-8")),
+                gzip_bytes=len(compressed["gzip"]),
+                brotli_bytes=len(compressed["br"]) if "br" in compressed else None,
+            )
+        )
+    return optimized, report
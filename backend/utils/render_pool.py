@@ -0,0 +1,105 @@
+"""Pool de renderizado para mantener Jinja fuera del event loop de FastAPI.
+
+Cada proceso worker crea su propio ``TemplateEngine`` y precompila las plantillas
+al arrancar (``init_render_worker``, el mismo arranque que usa
+``TemplateEngine.render_many``), de modo que las vistas previas no paguen la
+compilación. En modo thread todos los hilos comparten un único motor.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+from backend.utils.template_engine import init_render_worker, render_in_worker
+
+
+class RenderPoolBusy(Exception):
+    """La cola de renderizado está llena; el cliente debe reintentar."""
+
+
+class RenderTimeout(Exception):
+    """El renderizado superó el tiempo máximo permitido."""
+
+
+class RenderPool:
+    """Ejecuta ``generate_site`` en un pool acotado con backpressure y timeout."""
+
+    def __init__(
+        self,
+        mode: str = "process",
+        max_workers: int = 2,
+        max_pending: int = 16,
+        timeout_seconds: float = 15.0,
+    ) -> None:
+        self.mode = "thread" if (mode or "").strip().lower() == "thread" else "process"
+        self.max_workers = max(max_workers, 1)
+        self.max_pending = max(max_pending, self.max_workers)
+        self.timeout_seconds = max(timeout_seconds, 1.0)
+        self._executor: Executor | None = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "thread":
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="render",
+                        initializer=init_render_worker,
+                    )
+                else:
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.max_workers,
+                        initializer=init_render_worker,
+                    )
+            return self._executor
+
+    def _acquire_slot(self) -> None:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                raise RenderPoolBusy(
+                    f"Hay {self._pending} renderizados en curso; intenta de nuevo en unos segundos"
+                )
+            self._pending += 1
+
+    def _release_slot(self, _future: Future | None = None) -> None:
+        with self._lock:
+            self._pending = max(self._pending - 1, 0)
+
+    @property
+    def pending(self) -> int:
+        with self._lock:
+            return self._pending
+
+    def submit(self, model_type: str, site_data: dict) -> Future:
+        """Encolar un renderizado; el slot se libera cuando el worker termina de verdad."""
+        self._acquire_slot()
+        try:
+            future = self._get_executor().submit(render_in_worker, model_type, site_data)
+        except Exception:
+            self._release_slot()
+            raise
+        future.add_done_callback(self._release_slot)
+        return future
+
+    async def render(self, model_type: str, site_data: dict) -> dict:
+        """Renderizar sin bloquear el event loop.
+
+        Un render que excede el timeout sigue ocupando su slot hasta que el
+        worker termina, así la cola refleja la carga real del pool.
+        """
+        future = self.submit(model_type, site_data)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout_seconds)
+        except asyncio.TimeoutError as exc:
+            raise RenderTimeout(
+                f"El renderizado superó {self.timeout_seconds:g}s"
+            ) from exc
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
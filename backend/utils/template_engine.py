@@ -1,7 +1,14 @@
 from jinja2 import Template
+import hashlib
 import json
+import os
 import re
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable, Iterator
 
 from backend.template_helpers import (
     normalize_drive_image,
@@ -11,6 +18,54 @@ from backend.template_helpers import (
     supporter_initials,
     normalize_local_asset,
 )
+from backend.utils.image_variants import apply_srcset
+from backend.utils.image_metadata import ImageMetadataIndex, image_metadata_index
+
+_IMG_TAG_RE = re.compile(r"<img\b[^>]*>", re.IGNORECASE)
+_FOLD_MARKER_RE = re.compile(r"</section\s*>|</header\s*>", re.IGNORECASE)
+# Aliados por defecto: (clave en site_data para sobreescribir, nombre, logo en Drive)
+DEFAULT_SUPPORTERS = (
+    (
+        "supporter_logo_minas",
+        "Ministerio de Minas y Energía",
+        "https://drive.google.com/file/d/1Rgpfd7yZcUM4meVBcvsEax6rfGIF60Qw/view?usp=drive_link",
+    ),
+    (
+        "supporter_logo_uniguajira",
+        "Universidad de La Guajira",
+        "https://drive.google.com/file/d/1ecf6tYHrSmN_BOt2RlfyKJKa7OfNXXo0/view?usp=drive_link",
+    ),
+    (
+        "supporter_logo_project",
+        "Proyecto Reconversión Laboral",
+        "https://drive.google.com/file/d/11mfDehXVHWAY_fU5RkoKrzqz2MWNjAYF/view?usp=drive_link",
+    ),
+)
+SHARED_PARTIALS_DIR = "_partials"
+SUPPORTERS_TEMPLATE = "supporters.html"
+# Con especificidad cero: cualquier regla de la plantilla que fije el alto tiene prioridad
+INTRINSIC_SIZE_STYLE = "<style>:where(img[width][height]){height:auto}</style>"
+
+
+def _get_attr(tag: str, name: str) -> str | None:
+    match = re.search(rf"\s{name}\s*=\s*([\"'])(.*?)\1", tag, re.IGNORECASE | re.DOTALL)
+    return match.group(2) if match else None
+
+
+def _remove_attr(tag: str, name: str) -> str:
+    return re.sub(rf"\s{name}\s*=\s*([\"']).*?\1", "", tag, flags=re.IGNORECASE | re.DOTALL)
+
+
+def _set_attr(tag: str, name: str, value: str) -> str:
+    tag = _remove_attr(tag, name)
+    closing = "/>" if tag.endswith("/>") else ">"
+    body = tag[: -len(closing)].rstrip()
+    return f'{body} {name}="{value}"{closing}'
+
+
+def placeholder_style(placeholder: dict) -> str:
+    """Estilo en línea que muestra el placeholder detrás de la imagen hasta que carga."""
+    return f"background:{placeholder['color']} url({placeholder['lqip']}) center/cover no-repeat"
 
 
 def drive_preview_iframe(url: str, max_width: str = "200px", height: str = "160px") -> str:
@@ -27,11 +82,66 @@ def drive_preview_iframe(url: str, max_width: str = "200px", height: str = "160p
     return iframe
 
 
+@dataclass
+class RenderResult:
+    """Resultado de un sitio dentro de ``TemplateEngine.render_many``."""
+
+    site_id: int | None
+    model_type: str
+    files: dict | None
+    elapsed: float
+    error: str | None = None
+
+
+_worker_engine: "TemplateEngine | None" = None
+_worker_engine_lock = threading.Lock()
+
+
+def init_render_worker() -> None:
+    """Inicializador de los workers: compila las plantillas y lee models.json una sola vez.
+
+    Lo comparten ``RenderPool`` y ``TemplateEngine.render_many``. Hay un motor por
+    proceso: los hilos de un pool en modo thread reutilizan el mismo.
+    """
+    global _worker_engine
+    with _worker_engine_lock:
+        if _worker_engine is None:
+            engine = TemplateEngine()
+            engine.warm_templates()
+            _worker_engine = engine
+
+
+def _get_worker_engine() -> "TemplateEngine":
+    if _worker_engine is None:
+        init_render_worker()
+    return _worker_engine
+
+
+def render_in_worker(model_type: str, site_data: dict) -> dict:
+    return _get_worker_engine().generate_site(model_type, site_data)
+
+
+def render_batch_in_worker(chunk: list[tuple[str, dict]]) -> list[RenderResult]:
+    engine = _get_worker_engine()
+    return [engine._render_one(model_type, site_data) for model_type, site_data in chunk]
+
+
 class TemplateEngine:
     """Motor de plantillas para generar sitios"""
     
-    def __init__(self):
+    def __init__(self, image_metadata: ImageMetadataIndex | None = None):
+        self.image_metadata = image_metadata or image_metadata_index
         self.templates_dir = Path(__file__).parent.parent.parent / "templates_base"
+        self.models_config_path = Path(__file__).parent.parent / "models.json"
+        # Plantillas compiladas por (modelo, archivo); se invalidan si cambia el mtime
+        self._compiled_templates: dict[tuple[str, str], tuple[float, Template]] = {}
+        self._models_config: tuple[float, dict] | None = None
+        # Modelos sin plantilla propia: plantilla genérica compilada y CSS por paleta
+        self._generic_templates: dict[tuple[str, str], Template] = {}
+        self._palette_css: dict[str, str] = {}
+        # Aliados por defecto (idénticos en casi todos los sitios) y su HTML por modelo
+        self._default_supporter_lists: dict[tuple, list[dict]] = {}
+        self._supporter_fragments: dict[tuple, str] = {}
     
     def load_template(self, model_type: str, filename: str = "index.html") -> str:
         """Cargar plantilla desde archivo"""
@@ -42,13 +152,66 @@ class TemplateEngine:
         
         with open(template_path, 'r', encoding='utf-8') as f:
             return f.read()
-    
-    def render_template(self, template_content: str, context: dict) -> str:
-        """Renderizar plantilla con contexto"""
+
+    def get_template(self, model_type: str, filename: str = "index.html") -> Template:
+        """Obtener la plantilla compilada, reutilizándola mientras el archivo no cambie."""
+        template_path = self.templates_dir / model_type / filename
+        try:
+            mtime = template_path.stat().st_mtime
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Template no encontrado: {template_path}") from None
+
+        key = (model_type, filename)
+        cached = self._compiled_templates.get(key)
+        if cached and cached[0] == mtime:
+            return cached[1]
+
+        template = self._compile(self.load_template(model_type, filename))
+        self._compiled_templates[key] = (mtime, template)
+        return template
+
+    def warm_templates(self) -> int:
+        """Compilar por adelantado todas las plantillas disponibles y la configuración de modelos."""
+        models_config = self.load_models_config()
+        warmed = 0
+        for model_dir in sorted(self.templates_dir.iterdir()):
+            if not model_dir.is_dir():
+                continue
+            for filename in ("index.html", "styles.css", SUPPORTERS_TEMPLATE):
+                if (model_dir / filename).exists():
+                    self.get_template(model_dir.name, filename)
+                    warmed += 1
+        for model_config in models_config.get("models", []):
+            model_dir = self.templates_dir / model_config["id"]
+            if not (model_dir / "index.html").exists():
+                self.get_generic_template(model_config)
+                warmed += 1
+            if not (model_dir / "styles.css").exists():
+                self.generate_css(model_config["palette"])
+        return warmed
+
+    def load_models_config(self) -> dict:
+        """Leer models.json una sola vez mientras el archivo no cambie."""
+        mtime = self.models_config_path.stat().st_mtime
+        if self._models_config and self._models_config[0] == mtime:
+            return self._models_config[1]
+
+        with open(self.models_config_path, 'r', encoding='utf-8') as f:
+            models_config = json.load(f)
+        self._models_config = (mtime, models_config)
+        return models_config
+
+    @staticmethod
+    def _compile(template_content: str) -> Template:
         template = Template(template_content)
         template.globals["normalize_drive_image"] = normalize_drive_image
         template.globals["drive_preview_iframe"] = drive_preview_iframe
-        return template.render(**context)
+        template.globals["placeholder_style"] = placeholder_style
+        return template
+    
+    def render_template(self, template_content: str, context: dict) -> str:
+        """Renderizar plantilla con contexto"""
+        return self._compile(template_content).render(**context)
     
     def generate_site(self, model_type: str, site_data: dict) -> dict:
         """
@@ -64,9 +227,7 @@ class TemplateEngine:
         files = {}
         
         # Cargar configuración del modelo
-        models_config_path = Path(__file__).parent.parent / "models.json"
-        with open(models_config_path, 'r', encoding='utf-8') as f:
-            models_config = json.load(f)
+        models_config = self.load_models_config()
         
         model_config = next((m for m in models_config["models"] if m["id"] == model_type), None)
         if not model_config:
@@ -110,7 +271,13 @@ class TemplateEngine:
                 optimize_media_url(normalized or url, max_width=1024, quality=78)
             )
 
-        supporter_logos = self._build_supporters(site_data)
+        supporter_logos, supporters_html = self._render_supporters(model_type, site_data)
+
+        # Placeholders precalculados al publicar; en la vista previa no se calculan
+        hero_placeholder = self.image_metadata.placeholder(normalized_hero, compute=False)
+        gallery_placeholders = [
+            self.image_metadata.placeholder(url, compute=False) for url in gallery_images
+        ]
 
         context = {
             "site_name": site_data.get("name", "Mi Negocio"),
@@ -135,24 +302,29 @@ class TemplateEngine:
             "model_icon": model_config["icon"],
             "products": products,
             "gallery_images": gallery_images,
+            "hero_placeholder": hero_placeholder,
+            "gallery_placeholders": gallery_placeholders,
             "supporter_logos": supporter_logos,
+            "supporters_html": supporters_html,
             "current_year": 2025
         }
         
         # Generar index.html
         try:
-            index_template = self.load_template(model_type, "index.html")
-            files["index.html"] = self.render_template(index_template, context)
+            index_template = self.get_template(model_type, "index.html")
+            files["index.html"] = index_template.render(**context)
         except FileNotFoundError:
             # Si no existe plantilla específica, usar genérica
             files["index.html"] = self.generate_generic_template(context, model_config)
 
         files["index.html"] = self._inject_favicon_link(files["index.html"], context.get("favicon_url"))
+        files["index.html"] = apply_srcset(files["index.html"], hero_src=context.get("hero_image"))
+        files["index.html"] = self._apply_image_hints(files["index.html"], hero_src=context.get("hero_image"))
         
         # Generar CSS personalizado (permite overrides por modelo)
         try:
-            custom_css = self.load_template(model_type, "styles.css")
-            files["styles.css"] = self.render_template(custom_css, context)
+            custom_css = self.get_template(model_type, "styles.css")
+            files["styles.css"] = custom_css.render(**context)
         except FileNotFoundError:
             files["styles.css"] = self.generate_css(model_config["palette"])
         
@@ -161,6 +333,61 @@ class TemplateEngine:
         
         return files
 
+    def _render_one(self, model_type: str, site_data: dict) -> RenderResult:
+        start = time.perf_counter()
+        try:
+            files = self.generate_site(model_type, site_data)
+            error = None
+        except Exception as exc:  # pylint: disable=broad-except
+            files, error = None, f"{type(exc).__name__}: {exc}"
+        return RenderResult(site_data.get("id"), model_type, files, time.perf_counter() - start, error)
+
+    def render_many(
+        self,
+        sites: Iterable[tuple[str, dict]],
+        max_workers: int | None = None,
+        chunk_size: int = 8,
+    ) -> Iterator[RenderResult]:
+        """Renderizar muchos sitios ``(model_type, site_data)`` y entregar cada resultado al terminar.
+
+        Los sitios se reparten en lotes entre procesos que ya tienen las plantillas
+        compiladas; solo hay unos pocos lotes en vuelo, así que la entrada puede ser
+        un generador sobre toda la base de datos. Con ``max_workers=0`` se renderiza
+        en el proceso actual. El orden de salida es el de finalización.
+        """
+        workers = (os.cpu_count() or 1) if max_workers is None else max_workers
+        if workers <= 0:
+            for model_type, site_data in sites:
+                yield self._render_one(model_type, site_data)
+            return
+
+        chunk_size = max(chunk_size, 1)
+        iterator = iter(sites)
+
+        def _next_chunk() -> list[tuple[str, dict]]:
+            chunk = []
+            for item in iterator:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    break
+            return chunk
+
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_render_worker) as executor:
+            in_flight = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(in_flight) < workers * 2:
+                    chunk = _next_chunk()
+                    if not chunk:
+                        exhausted = True
+                        break
+                    in_flight.add(executor.submit(render_batch_in_worker, chunk))
+                if not in_flight:
+                    return
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+
     @staticmethod
     def normalize_media_url(url: str) -> str:
         """Normalizar URLs locales/Drive para que las plantillas usen rutas válidas."""
@@ -181,7 +408,79 @@ class TemplateEngine:
         # If the template lacks a head tag, prepend the favicon tag
         return f"{tag}{html}"
 
+    def _apply_image_hints(self, html: str, hero_src: str | None = None) -> str:
+        """Agregar pistas de carga uniformes a todas las imágenes del sitio.
+
+        Lo que está antes del cierre del primer ``<section>`` (header y hero) se
+        considera visible al cargar: se carga sin ``lazy`` y la imagen hero recibe
+        ``fetchpriority="high"``. El resto se marca ``loading="lazy"``. Las imágenes
+        locales reciben ``width``/``height`` intrínsecos desde el índice de metadatos
+        y, si ya tienen placeholder, un fondo difuminado mientras cargan.
+        """
+        sections = list(_FOLD_MARKER_RE.finditer(html))
+        section_ends = [m.end() for m in sections if m.group(0).lower().startswith("</section")]
+        if section_ends:
+            fold_offset = section_ends[0]
+        elif sections:
+            fold_offset = sections[0].end()
+        else:
+            fold_offset = 0
+        header_match = re.search(r"</header\s*>", html, re.IGNORECASE)
+        header_end = header_match.end() if header_match else 0
+
+        hero_assigned = False
+        sized = False
+        output: list[str] = []
+        cursor = 0
+        for match in _IMG_TAG_RE.finditer(html):
+            tag = match.group(0)
+            src = _get_attr(tag, "src") or ""
+            above_fold = match.start() < fold_offset
+
+            is_hero = bool(hero_src) and src == hero_src and not hero_assigned
+            if not hero_src and not hero_assigned and above_fold and match.start() > header_end:
+                is_hero = True
+
+            if is_hero:
+                hero_assigned = True
+                tag = _remove_attr(tag, "loading")
+                tag = _set_attr(tag, "fetchpriority", "high")
+            elif above_fold:
+                tag = _remove_attr(tag, "loading")
+                if _get_attr(tag, "decoding") is None:
+                    tag = _set_attr(tag, "decoding", "async")
+            else:
+                tag = _set_attr(tag, "loading", "lazy")
+                if _get_attr(tag, "decoding") is None:
+                    tag = _set_attr(tag, "decoding", "async")
+
+            if _get_attr(tag, "width") is None and _get_attr(tag, "height") is None:
+                dimensions = self.image_metadata.dimensions(src)
+                if dimensions:
+                    tag = _set_attr(tag, "width", str(dimensions[0]))
+                    tag = _set_attr(tag, "height", str(dimensions[1]))
+                    sized = True
+
+            placeholder = self.image_metadata.placeholder(src, compute=False)
+            if placeholder and _get_attr(tag, "style") is None:
+                tag = _set_attr(tag, "style", placeholder_style(placeholder))
+
+            output.append(html[cursor:match.start()])
+            output.append(tag)
+            cursor = match.end()
+        output.append(html[cursor:])
+        html = "".join(output)
+
+        if sized and INTRINSIC_SIZE_STYLE not in html:
+            head_close = re.compile(r"</head>", re.IGNORECASE)
+            if head_close.search(html):
+                html = head_close.sub(f"{INTRINSIC_SIZE_STYLE}</head>", html, count=1)
+        return html
+
     def _build_supporters(self, site_data: dict) -> list[dict]:
+        return self._custom_supporters(site_data) or self._default_supporters(site_data)
+
+    def _custom_supporters(self, site_data: dict) -> list[dict]:
         supporter_logos_input = self._load_json_list(site_data.get("supporter_logos_json", "[]"))
         if not supporter_logos_input:
             supporter_logos_input = self._load_json_list(site_data.get("supporter_logos", []))
@@ -200,37 +499,60 @@ class TemplateEngine:
                 "optimized_url": optimized or normalized,
                 "initials": supporter_initials(supporter.get("name", "Aliado"))
             })
+        return supporters
 
-        if supporters:
-            return supporters
-
-        default_entries = [
-            {
-                "name": "Ministerio de Minas y Energía",
-                "url": site_data.get("supporter_logo_minas", "") or "https://drive.google.com/file/d/1Rgpfd7yZcUM4meVBcvsEax6rfGIF60Qw/view?usp=drive_link"
-            },
-            {
-                "name": "Universidad de La Guajira",
-                "url": site_data.get("supporter_logo_uniguajira", "") or "https://drive.google.com/file/d/1ecf6tYHrSmN_BOt2RlfyKJKa7OfNXXo0/view?usp=drive_link"
-            },
-            {
-                "name": "Proyecto Reconversión Laboral",
-                "url": site_data.get("supporter_logo_project", "") or "https://drive.google.com/file/d/11mfDehXVHWAY_fU5RkoKrzqz2MWNjAYF/view?usp=drive_link"
-            }
-        ]
+    @staticmethod
+    def _default_supporter_overrides(site_data: dict) -> tuple:
+        return tuple(site_data.get(key) or "" for key, _name, _url in DEFAULT_SUPPORTERS)
+
+    def _default_supporters(self, site_data: dict) -> list[dict]:
+        """Aliados por defecto; se calculan una vez por combinación de logos sobreescritos."""
+        overrides = self._default_supporter_overrides(site_data)
+        cached = self._default_supporter_lists.get(overrides)
+        if cached is not None:
+            return cached
 
         defaults = []
-        for entry in default_entries:
-            normalized = self.normalize_media_url(entry["url"])
-            optimized = optimize_logo_url(entry["url"])
+        for (_key, name, url), override in zip(DEFAULT_SUPPORTERS, overrides):
+            source = override or url
+            normalized = self.normalize_media_url(source)
+            optimized = optimize_logo_url(source)
             defaults.append({
-                "name": entry["name"],
+                "name": name,
                 "url": normalized or optimized,
                 "optimized_url": optimized or normalized,
-                "initials": supporter_initials(entry["name"])
+                "initials": supporter_initials(name)
             })
+        self._default_supporter_lists[overrides] = defaults
         return defaults
 
+    def _supporters_template(self, model_type: str) -> tuple[str, Template] | None:
+        """Bloque de aliados del modelo (``supporters.html``) o el compartido de ``_partials``."""
+        for owner in (model_type, SHARED_PARTIALS_DIR):
+            try:
+                return owner, self.get_template(owner, SUPPORTERS_TEMPLATE)
+            except FileNotFoundError:
+                continue
+        return None
+
+    def _render_supporters(self, model_type: str, site_data: dict) -> tuple[list[dict], str]:
+        """Lista de aliados y su HTML; sin aliados propios el fragmento se reutiliza entre sitios."""
+        custom = self._custom_supporters(site_data)
+        resolved = self._supporters_template(model_type)
+        if custom:
+            return custom, resolved[1].render(supporter_logos=custom) if resolved else ""
+
+        defaults = self._default_supporters(site_data)
+        if resolved is None:
+            return defaults, ""
+        owner, template = resolved
+        mtime = self._compiled_templates[(owner, SUPPORTERS_TEMPLATE)][0]
+        key = (owner, mtime, self._default_supporter_overrides(site_data))
+        html = self._supporter_fragments.get(key)
+        if html is None:
+            html = self._supporter_fragments[key] = template.render(supporter_logos=defaults)
+        return defaults, html
+
     @staticmethod
     def _load_json_list(raw_value) -> list:
         """Convertir cadenas JSON (o listas ya parseadas) en listas seguras."""
@@ -246,7 +568,20 @@ class TemplateEngine:
     
     def generate_generic_template(self, context: dict, model_config: dict) -> str:
         """Generar plantilla HTML genérica"""
-        template = f"""<!DOCTYPE html>
+        return self.get_generic_template(model_config).render(**context)
+
+    def get_generic_template(self, model_config: dict) -> Template:
+        """Plantilla genérica compilada una sola vez por modelo (e ícono)."""
+        key = (model_config.get("id", ""), model_config.get("icon", ""))
+        template = self._generic_templates.get(key)
+        if template is None:
+            template = self._compile(self._generic_template_source(model_config))
+            self._generic_templates[key] = template
+        return template
+
+    @staticmethod
+    def _generic_template_source(model_config: dict) -> str:
+        return f"""<!DOCTYPE html>
 <html lang="es">
 <head>
     <meta charset="UTF-8">
@@ -342,11 +677,17 @@ class TemplateEngine:
     <script src="tracking.js"></script>
 </body>
 </html>"""
-        
-        return self.render_template(template, context)
-    
+
     def generate_css(self, palette: dict) -> str:
-        """Generar CSS con paleta de colores"""
+        """Generar CSS con paleta de colores (cacheado por hash de la paleta)"""
+        key = hashlib.sha256(json.dumps(palette, sort_keys=True).encode("utf-8")).hexdigest()
+        css = self._palette_css.get(key)
+        if css is None:
+            css = self._palette_css[key] = self._build_css(palette)
+        return css
+
+    @staticmethod
+    def _build_css(palette: dict) -> str:
         return f"""/* Reset y Variables */
 * {{
     margin: 0;
@@ -0,0 +1,180 @@
+"""Procesamiento en segundo plano de las imágenes subidas desde el editor.
+
+Cada subida se encola en un pool (procesos por defecto) que corrige la
+orientación EXIF, elimina los metadatos EXIF (ubicación, cámara), limita las
+dimensiones, recomprime y genera una miniatura WebP. La versión optimizada se
+guarda en ``processed/`` con el mismo nombre que el original (así servirla no
+requiere consultar la base de datos), la miniatura se guarda direccionada por
+contenido y el resultado queda en la tabla ``processed_uploads``; el original no
+se toca, así que la respuesta de la subida
+no espera y las URLs existentes siguen funcionando.
+"""
+from __future__ import annotations
+
+import io
+import os
+import tempfile
+import threading
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+
+from backend.utils.asset_manager import (
+    RemoteAssetIndex,
+    processed_name,
+    remote_asset_index,
+    store_bytes,
+    upload_path,
+)
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow está en requirements.txt
+    Image = None
+    ImageOps = None
+
+PROCESSABLE_FORMATS = {"JPEG": "jpg", "PNG": "png", "WEBP": "webp"}
+DEFAULT_MAX_DIMENSION = 2560
+PROCESSED_QUALITY = 82
+THUMBNAIL_SIZE = 320
+THUMBNAIL_QUALITY = 75
+
+
+def _encode(image, image_format: str, icc_profile: bytes | None) -> bytes:
+    buffer = io.BytesIO()
+    options = {"icc_profile": icc_profile} if icc_profile else {}
+    if image_format == "JPEG":
+        if image.mode not in ("RGB", "L"):
+            # El perfil de un CMYK no describe los píxeles ya convertidos
+            image, options = image.convert("RGB"), {}
+        image.save(buffer, format="JPEG", quality=PROCESSED_QUALITY, optimize=True, progressive=True, **options)
+    elif image_format == "WEBP":
+        image.save(buffer, format="WEBP", quality=PROCESSED_QUALITY, method=4, **options)
+    else:
+        image.save(buffer, format="PNG", optimize=True, **options)
+    return buffer.getvalue()
+
+
+def _write_processed(filename: str, data: bytes) -> str:
+    """Guardar la versión optimizada de ``filename`` en su ruta derivada (idempotente)."""
+    name = processed_name(filename)
+    target = upload_path(name)
+    if target.is_file():
+        return name
+    target.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_name = tempfile.mkstemp(dir=target.parent, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+        os.replace(temp_name, target)
+    except BaseException:
+        try:
+            os.unlink(temp_name)
+        except OSError:
+            pass
+        raise
+    return name
+
+
+def process_image(filename: str, max_dimension: int = DEFAULT_MAX_DIMENSION) -> dict:
+    """Procesar ``images/<filename>`` (se ejecuta en el worker).
+
+    Devuelve ``filename`` de la versión optimizada (``None`` si el original ya
+    era mejor), ``thumbnail``, dimensiones y bytes antes/después; ``{}`` si la
+    imagen no se procesa (SVG, GIF, animaciones o formato no soportado).
+    """
+    source = upload_path(filename)
+    original = source.read_bytes()
+    with Image.open(io.BytesIO(original)) as opened:
+        image_format = opened.format
+        if image_format not in PROCESSABLE_FORMATS or getattr(opened, "is_animated", False):
+            return {}
+        had_exif = bool(opened.getexif())
+        icc_profile = opened.info.get("icc_profile")
+        image = ImageOps.exif_transpose(opened)
+        image.load()
+
+    original_size = image.size
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+    encoded = _encode(image, image_format, icc_profile)
+    # Se publica la versión nueva si cambió la geometría, quitó EXIF o pesa menos
+    improved = image.size != original_size or had_exif or len(encoded) < len(original)
+    processed = _write_processed(filename, encoded) if improved else None
+
+    thumbnail = image.copy()
+    thumbnail.thumbnail((THUMBNAIL_SIZE, THUMBNAIL_SIZE), Image.LANCZOS)
+    if thumbnail.mode not in ("RGB", "RGBA"):
+        thumbnail = thumbnail.convert("RGBA" if "transparency" in thumbnail.info else "RGB")
+    buffer = io.BytesIO()
+    thumbnail.save(buffer, format="WEBP", quality=THUMBNAIL_QUALITY, method=4)
+
+    return {
+        "filename": processed,
+        "thumbnail": store_bytes(buffer.getvalue(), "webp"),
+        "width": image.width,
+        "height": image.height,
+        "original_bytes": len(original),
+        "processed_bytes": len(encoded) if processed else len(original),
+        "exif_stripped": had_exif,
+    }
+
+
+class UploadProcessor:
+    """Pool acotado que procesa subidas sin bloquear la respuesta del endpoint."""
+
+    def __init__(
+        self,
+        mode: str = "process",
+        max_workers: int = 1,
+        max_dimension: int = DEFAULT_MAX_DIMENSION,
+        index: RemoteAssetIndex | None = None,
+    ) -> None:
+        self.mode = "thread" if (mode or "").strip().lower() == "thread" else "process"
+        self.max_workers = max(max_workers, 1)
+        self.max_dimension = max(max_dimension, THUMBNAIL_SIZE)
+        self.index = index or remote_asset_index
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        with self._lock:
+            if self._executor is None:
+                if self.mode == "thread":
+                    self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="uploads")
+                else:
+                    self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def submit(self, filename: str) -> Future | None:
+        """Encolar una subida; ``None`` si no hace falta (sin Pillow o no es raster).
+
+        No consulta la base de datos: procesar dos veces la misma imagen produce
+        los mismos archivos. Crea el pool en la primera llamada, así que desde
+        código asíncrono conviene llamarlo en un hilo (``run_in_threadpool``).
+        """
+        if Image is None or upload_path(filename).suffix.lower() not in {".jpg", ".jpeg", ".png", ".webp"}:
+            return None
+        future = self._get_executor().submit(process_image, filename, self.max_dimension)
+        future.add_done_callback(partial(self._record, filename))
+        return future
+
+    def _record(self, filename: str, future: Future) -> None:
+        if future.cancelled():
+            return
+        try:
+            result = future.result()
+        except Exception as exc:  # pylint: disable=broad-except
+            print(f"⚠️ No se pudo procesar la imagen {filename}: {exc}")
+            return
+        self.index.record_processed(filename, result)
+        if result.get("filename"):
+            print(
+                f"🖼️ {filename}: {result['original_bytes']} → {result['processed_bytes']} bytes "
+                f"({result['width']}x{result['height']})"
+            )
+
+    def shutdown(self, wait: bool = False) -> None:
+        """Cerrar el pool; sin ``wait`` lo que seguía en cola se descarta."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait, cancel_futures=not wait)
@@ -0,0 +1,42 @@
+"""Montaje estático de ``uploads/`` que traduce las URLs públicas a la ruta en disco.
+
+``images/<sha256>.<ext>`` se sirve desde su shard (``ab/cd/...``, ver
+``scripts/shard_uploads.py``) y un archivo subido antes con nombre aleatorio (o
+deduplicado por ``scripts/dedupe_uploads.py``) sigue sirviéndose en su URL vieja
+a través de la tabla ``asset_aliases``. Una subida ya procesada en segundo plano
+se sirve con su versión optimizada (``processed/<nombre>``, ver
+``upload_processing``), sin consultar la base de datos.
+"""
+from __future__ import annotations
+
+import os
+
+from fastapi.staticfiles import StaticFiles
+
+from backend.utils.asset_manager import processed_name, resolve_upload, shard_relpath
+
+
+class UploadsStaticFiles(StaticFiles):
+    def _lookup_stored(self, name: str) -> tuple[str, os.stat_result | None]:
+        sharded = shard_relpath(name)
+        if sharded != name:
+            full_path, stat_result = super().lookup_path(sharded)
+            if stat_result is not None:
+                return full_path, stat_result
+        # Sin migrar todavía (o nombre anterior a la disposición por shards)
+        return super().lookup_path(name)
+
+    def lookup_path(self, path: str) -> tuple[str, os.stat_result | None]:
+        name = path.strip("/")
+        if "/" not in name:
+            # La versión optimizada tiene un nombre derivado del original: basta con mirar el disco
+            full_path, stat_result = self._lookup_stored(processed_name(name))
+            if stat_result is not None:
+                return full_path, stat_result
+        full_path, stat_result = self._lookup_stored(name)
+        if stat_result is not None or "/" in name:
+            return full_path, stat_result
+        target = resolve_upload(name)
+        if target is None:
+            return full_path, stat_result
+        return self._lookup_stored(target)
@@ -32,6 +32,7 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
+from backend.database import ensure_tables  # pylint: disable=wrong-import-position
 from backend.template_helpers import normalize_drive_image  # pylint: disable=wrong-import-position
 from backend.utils.asset_manager import ensure_local_asset  # pylint: disable=wrong-import-position
 
@@ -253,6 +254,7 @@ def read_csv_rows(csv_path: Path) -> List[Dict[str, str]]:
 def main() -> None:
     args = parse_args()
     password = ensure_password(args)
+    ensure_tables()
     csv_path = Path(args.csv)
     rows = read_csv_rows(csv_path)
     palettes = load_palette_defaults()
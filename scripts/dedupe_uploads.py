@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""Migrar ``uploads/`` a nombres direccionados por contenido y eliminar duplicados.
+
+Cada archivo con nombre antiguo (uuid de subida o sha1 de la URL de origen) se
+mueve a ``<sha256>.<ext>`` (en su shard ``ab/cd/``); si ese archivo ya existe, el
+viejo se borra. El
+nombre anterior queda como alias en ``asset_aliases`` (así las URLs viejas
+siguen funcionando) y se reescriben las referencias ``images/<nombre>`` de los
+sitios y del índice de descargas.
+
+Uso:
+    python scripts/dedupe_uploads.py --dry-run
+    python scripts/dedupe_uploads.py
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.database import RemoteAsset, SessionLocal, Site, ensure_tables  # noqa: E402
+from backend.utils.asset_manager import (  # noqa: E402
+    UPLOADS_DIR,
+    content_filename,
+    content_hash,
+    remote_asset_index,
+    shard_relpath,
+    upload_path,
+)
+
+SITE_ASSET_COLUMNS = (
+    "hero_image",
+    "about_image",
+    "logo_url",
+    "gallery_images",
+    "products_json",
+    "supporter_logos_json",
+)
+TEMP_SUFFIXES = {".part", ".tmp"}
+
+
+def plan_renames(uploads_dir: Path) -> tuple[dict[str, str], int, int]:
+    """``{nombre_actual: nombre_por_contenido}``, cuántos son duplicados y los bytes que liberan."""
+    renames: dict[str, str] = {}
+    targets: set[str] = {path.name for path in uploads_dir.iterdir() if path.is_file()}
+    duplicates, saved = 0, 0
+    for path in sorted(uploads_dir.iterdir()):
+        if not path.is_file() or path.name.startswith(".") or path.suffix in TEMP_SUFFIXES:
+            continue
+        target = content_filename(content_hash(path), path.suffix)
+        if target == path.name:
+            continue
+        renames[path.name] = target
+        if target in targets or upload_path(target, uploads_dir).is_file():
+            duplicates += 1
+            saved += path.stat().st_size
+        targets.add(target)
+    return renames, duplicates, saved
+
+
+def rewrite_references(value: str | None, renames: dict[str, str], pattern: re.Pattern) -> str | None:
+    if not value:
+        return value
+    return pattern.sub(lambda match: match.group(1) + renames[match.group(2)], value)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Deduplicar uploads/ por contenido")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar qué se renombraría sin tocar nada")
+    args = parser.parse_args()
+
+    ensure_tables()
+    renames, duplicates, saved = plan_renames(UPLOADS_DIR)
+    if not renames:
+        print("✅ uploads/ ya está direccionado por contenido")
+        return
+
+    print(f"🔍 {len(renames)} archivo(s) por renombrar; {duplicates} duplicados ({saved / 1024:.0f} KB)")
+    if args.dry_run:
+        for old, new in list(renames.items())[:20]:
+            print(f" · {old} → {new}")
+        return
+
+    for old, new in renames.items():
+        source = UPLOADS_DIR / old
+        if upload_path(new).is_file():
+            source.unlink()
+        else:
+            target = UPLOADS_DIR / shard_relpath(new)
+            target.parent.mkdir(parents=True, exist_ok=True)
+            source.rename(target)
+        remote_asset_index.record_alias(old, new)
+
+    pattern = re.compile(r"(images/)(" + "|".join(re.escape(name) for name in renames) + r")(?![\w.-])")
+    session = SessionLocal()
+    try:
+        for row in session.query(RemoteAsset).filter(RemoteAsset.filename.in_(list(renames))):
+            row.filename = renames[row.filename]
+        updated_sites = 0
+        for site in session.query(Site):
+            changed = False
+            for column in SITE_ASSET_COLUMNS:
+                value = getattr(site, column)
+                rewritten = rewrite_references(value, renames, pattern)
+                if rewritten != value:
+                    setattr(site, column, rewritten)
+                    changed = True
+            updated_sites += int(changed)
+        session.commit()
+    finally:
+        session.close()
+
+    print(f"✅ {len(renames)} archivo(s) migrados ({duplicates} duplicados eliminados), {updated_sites} sitio(s) actualizados")
+
+
+if __name__ == "__main__":
+    main()
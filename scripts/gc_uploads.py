@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""Eliminar de ``uploads/`` los archivos que ningún sitio ni avatar usa.
+
+Primero se recalcula el índice ``site_assets`` a partir de todos los sitios (así
+el resultado no depende de que cada edición lo haya mantenido al día); los
+avatares de usuario y los nombres anteriores (alias) también cuentan como
+referencias. Luego se borran los archivos sin referencias, y sus variantes WebP
+y versiones procesadas, con más antigüedad que el periodo de gracia, y las
+entradas del índice de descargas que apuntaban a ellos.
+
+Uso:
+    python scripts/gc_uploads.py --dry-run
+    python scripts/gc_uploads.py --grace-days 14
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.database import SessionLocal, Site, ensure_tables  # noqa: E402
+from backend.main import _sync_site_asset_refs  # type: ignore  # noqa: E402
+from backend.utils.asset_manager import remote_asset_index  # noqa: E402
+from backend.utils.asset_refs import collect_garbage, referenced_assets  # noqa: E402
+
+DEFAULT_GRACE_DAYS = float(os.getenv("UPLOADS_GC_GRACE_DAYS", 7))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recolectar archivos sin referencias en uploads/")
+    parser.add_argument(
+        "--grace-days",
+        type=float,
+        default=DEFAULT_GRACE_DAYS,
+        help="No borrar archivos modificados hace menos de estos días (subidas aún sin guardar)",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Solo informar qué se borraría")
+    args = parser.parse_args()
+
+    ensure_tables()
+    session = SessionLocal()
+    try:
+        sites = session.query(Site).all()
+        for site in sites:
+            _sync_site_asset_refs(session, site)
+        session.commit()
+        referenced = referenced_assets(session)
+        referenced |= remote_asset_index.derived_files(referenced)
+    finally:
+        session.close()
+
+    report = collect_garbage(referenced, grace_seconds=args.grace_days * 86400, dry_run=args.dry_run)
+    if not args.dry_run:
+        remote_asset_index.forget_files(name for name in report.removed if "/" not in name)
+
+    verb = "se eliminarían" if args.dry_run else "eliminados"
+    for name in report.removed[:20]:
+        print(f" · {name}")
+    if len(report.removed) > 20:
+        print(f"   … y {len(report.removed) - 20} más")
+    print(
+        f"🧹 {len(sites)} sitio(s), {len(referenced)} archivo(s) en uso; "
+        f"{len(report.removed)} {verb} ({report.reclaimed_bytes / (1024 * 1024):.1f} MB recuperados), "
+        f"{report.kept_recent} sin referencias dentro del periodo de gracia"
+    )
+
+
+if __name__ == "__main__":
+    main()
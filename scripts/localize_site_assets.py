@@ -24,7 +24,7 @@ REPO_ROOT = Path(__file__).resolve().parents[1]
 if str(REPO_ROOT) not in sys.path:
     sys.path.insert(0, str(REPO_ROOT))
 
-from backend.database import SessionLocal, Site
+from backend.database import SessionLocal, Site, ensure_tables
 from backend.template_helpers import normalize_drive_image, normalize_local_asset
 from backend.utils.asset_manager import ensure_local_asset
 
@@ -64,20 +64,20 @@ def _parse_json_list(raw_value) -> list:
     return parsed if isinstance(parsed, list) else []
 
 
-def _localize_asset(value: str | None) -> tuple[str, bool]:
+def _localize_asset(value: str | None, refresh: bool = False) -> tuple[str, bool]:
     canonical = _canonicalize(value)
     if not canonical:
         return "", False
-    return ensure_local_asset(canonical)
+    return ensure_local_asset(canonical, refresh=refresh)
 
 
-def localize_site(site: Site) -> tuple[bool, LocalizationReport]:
+def localize_site(site: Site, refresh: bool = False) -> tuple[bool, LocalizationReport]:
     """Descarga assets remotos para un sitio específico."""
     report = LocalizationReport(site_id=site.id, name=site.name)
     changed = False
 
     for field in ("hero_image", "about_image", "logo_url"):
-        new_value, downloaded = _localize_asset(getattr(site, field, ""))
+        new_value, downloaded = _localize_asset(getattr(site, field, ""), refresh)
         if downloaded and new_value:
             setattr(site, field, new_value)
             report.mark_updated(field)
@@ -92,7 +92,7 @@ def localize_site(site: Site) -> tuple[bool, LocalizationReport]:
         if not isinstance(item, str):
             localized_gallery.append(item)
             continue
-        new_value, downloaded = _localize_asset(item)
+        new_value, downloaded = _localize_asset(item, refresh)
         localized_gallery.append(new_value or item)
         gallery_changed = gallery_changed or downloaded
     if gallery_changed:
@@ -107,7 +107,7 @@ def localize_site(site: Site) -> tuple[bool, LocalizationReport]:
         if not isinstance(product, dict):
             continue
         entry = product.copy()
-        new_value, downloaded = _localize_asset(entry.get("image"))
+        new_value, downloaded = _localize_asset(entry.get("image"), refresh)
         if downloaded and new_value:
             entry["image"] = new_value
             products_changed = True
@@ -148,11 +148,17 @@ def parse_args() -> argparse.Namespace:
         action="store_true",
         help="Calcula los cambios sin escribir en la base de datos.",
     )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Vuelve a descargar los assets aunque ya estén en el índice de uploads/.",
+    )
     return parser.parse_args()
 
 
 def main() -> None:
     args = parse_args()
+    ensure_tables()
     session = SessionLocal()
     try:
         targets = _iter_sites(session, args.site_id)
@@ -163,7 +169,7 @@ def main() -> None:
         print(f"🔍 Procesando {len(targets)} sitio(s)...")
         reports: list[LocalizationReport] = []
         for site in targets:
-            changed, report = localize_site(site)
+            changed, report = localize_site(site, refresh=args.refresh)
             reports.append(report)
             if changed and not args.dry_run:
                 session.add(site)
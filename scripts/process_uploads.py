@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""Procesar las imágenes de ``uploads/`` que aún no tienen versión optimizada.
+
+Las subidas nuevas se procesan solas al recibirse; este script cubre las
+anteriores (y las que quedaron en cola al reiniciar el servidor): corrige la
+orientación, elimina EXIF, limita dimensiones, recomprime y genera miniaturas.
+
+Uso:
+    python scripts/process_uploads.py --dry-run
+    python scripts/process_uploads.py --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.database import ensure_tables  # noqa: E402
+from backend.utils.asset_manager import iter_uploads, remote_asset_index  # noqa: E402
+from backend.utils.upload_processing import DEFAULT_MAX_DIMENSION, UploadProcessor  # noqa: E402
+
+
+def pending_uploads() -> list[str]:
+    """Imágenes de uploads/ sin procesar, excluyendo las versiones y miniaturas ya generadas."""
+    names = [name for name, _path in iter_uploads() if "/" not in name and not name.startswith(".")]
+    derived = remote_asset_index.derived_files(names)
+    return [name for name in names if name not in derived and remote_asset_index.processed(name) is None]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Optimizar las imágenes subidas que faltan")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Procesos en paralelo")
+    parser.add_argument(
+        "--max-dimension",
+        type=int,
+        default=int(os.getenv("UPLOAD_MAX_DIMENSION", DEFAULT_MAX_DIMENSION)),
+        help="Lado máximo en píxeles de la versión optimizada",
+    )
+    parser.add_argument("--dry-run", action="store_true", help="Solo listar lo pendiente")
+    args = parser.parse_args()
+
+    ensure_tables()
+    pending = pending_uploads()
+    print(f"🔍 {len(pending)} imagen(es) sin procesar")
+    if args.dry_run or not pending:
+        for name in pending[:20]:
+            print(f" · {name}")
+        return
+
+    processor = UploadProcessor(max_workers=args.workers, max_dimension=args.max_dimension)
+    try:
+        futures = [future for future in map(processor.submit, pending) if future is not None]
+    finally:
+        # Esperar a que cada resultado quede guardado en el índice
+        processor.shutdown(wait=True)
+
+    before = after = 0
+    for name in pending:
+        result = remote_asset_index.processed(name) or {}
+        before += result.get("original_bytes", 0)
+        after += result.get("processed_bytes", 0)
+    print(f"✅ {len(futures)} imagen(es) procesadas: {before / 1024:.0f} KB → {after / 1024:.0f} KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""Renderizar todos los sitios de la base de datos a un directorio, en paralelo.
+
+Útil tras cambiar una plantilla o models.json para revisar (o auditar) el HTML
+de toda la flota sin publicar nada. Al final se imprime el throughput.
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from backend.database import SessionLocal, Site  # noqa: E402  pylint: disable=wrong-import-position
+from backend.main import (  # noqa: E402  pylint: disable=wrong-import-position
+    _build_site_data,  # type: ignore
+    _serialize_site_for_publish,  # type: ignore
+)
+from backend.utils.template_engine import TemplateEngine  # noqa: E402  pylint: disable=wrong-import-position
+
+
+def _iter_sites(session, model_type: str | None, batch_size: int = 200):
+    query = session.query(Site).order_by(Site.id)
+    if model_type:
+        query = query.filter(Site.model_type == model_type)
+    for site in query.yield_per(batch_size):
+        yield site.model_type, _build_site_data(_serialize_site_for_publish(site))
+
+
+def _write_site(output_dir: Path, site_id, files: dict) -> int:
+    site_dir = output_dir / f"site-{site_id}"
+    written = 0
+    for relative, content in files.items():
+        target = site_dir / relative
+        target.parent.mkdir(parents=True, exist_ok=True)
+        data = content if isinstance(content, bytes) else str(content).encode("utf-8")
+        target.write_bytes(data)
+        written += len(data)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renderizar todos los sitios sin publicarlos")
+    parser.add_argument("--output-dir", default=str(PROJECT_ROOT / "storage" / "fleet"), help="Directorio destino")
+    parser.add_argument("--model-type", dest="model_type", help="Renderizar solo un modelo de negocio")
+    parser.add_argument("--workers", type=int, default=None, help="Procesos (0 = en el proceso actual)")
+    parser.add_argument("--chunk-size", type=int, default=8, help="Sitios por lote enviado a cada proceso")
+    args = parser.parse_args()
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+
+    session = SessionLocal()
+    rendered, failed, total_bytes = 0, 0, 0
+    timings: list[float] = []
+    start = time.perf_counter()
+    try:
+        engine = TemplateEngine()
+        sites = _iter_sites(session, args.model_type)
+        for result in engine.render_many(sites, max_workers=args.workers, chunk_size=args.chunk_size):
+            if result.error:
+                failed += 1
+                print(f"    ✗ Site {result.site_id} ({result.model_type}): {result.error}")
+                continue
+            rendered += 1
+            timings.append(result.elapsed)
+            total_bytes += _write_site(output_dir, result.site_id, result.files)
+    finally:
+        session.close()
+
+    elapsed = time.perf_counter() - start
+    if not timings:
+        print(f"No se renderizó ningún sitio ({failed} errores)")
+        return
+
+    ordered = sorted(timings)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(f"✅ {rendered} sitios renderizados en {elapsed:.2f}s ({rendered / elapsed:.1f} sitios/s), {failed} errores")
+    print(
+        f"   por sitio: mediana {statistics.median(timings) * 1000:.1f} ms, p95 {p95 * 1000:.1f} ms; "
+        f"{total_bytes / 1024:.0f} KB escritos en {output_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,8 @@
-"""Republish already published sites so they point to the current GitHub account."""
+"""Republish already published sites so they point to the current GitHub account.
+
+Con ``--only-changed`` solo se republican los sitios cuyas plantillas, modelo,
+contenido, imágenes u opciones de publicación cambiaron desde la última vez.
+"""
 from __future__ import annotations
 
 import argparse
@@ -15,15 +19,30 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from backend.database import SessionLocal, Site
+from backend.database import SessionLocal, Site, ensure_tables
 from backend.main import (  # noqa: E402  pylint: disable=wrong-import-position
     PublishPipelineError,
+    _build_site_data,  # type: ignore
     _execute_publish_pipeline,  # type: ignore
     _serialize_site_for_publish,  # type: ignore
+    _site_dependencies,  # type: ignore
+    _sync_site_asset_refs,  # type: ignore
+)
+from backend.utils.build_deps import (  # noqa: E402  pylint: disable=wrong-import-position
+    changed_dependencies,
+    load_dependencies,
+    record_dependencies,
 )
 
 
-def _republish_site(site: Site) -> dict:
+def _pending_changes(session, site: Site) -> list[str]:
+    """Dependencias del sitio que cambiaron desde su última publicación."""
+    site_data = _build_site_data(_serialize_site_for_publish(site))
+    current = _site_dependencies(site.model_type, site_data)
+    return changed_dependencies(load_dependencies(session, site.id), current)
+
+
+def _republish_site(session, site: Site) -> dict:
     payload = _serialize_site_for_publish(site)
     result = _execute_publish_pipeline(payload)
 
@@ -39,6 +58,8 @@ def _republish_site(site: Site) -> dict:
     site.github_repo = result["repo_name"]
     site.github_url = result.get("pages_url")
     site.is_published = True
+    record_dependencies(session, site.id, site.model_type, result.get("dependencies"))
+    _sync_site_asset_refs(session, site)
     return result
 
 
@@ -82,8 +103,19 @@ def main():
         action="store_true",
         help="Incluir sitios que aún no estén marcados como publicados (útil tras migraciones/importaciones)",
     )
+    parser.add_argument(
+        "--only-changed",
+        action="store_true",
+        help="Republicar solo los sitios cuyas dependencias (plantillas, modelo, contenido, imágenes) cambiaron",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Con --only-changed: listar qué se republicaría y por qué, sin publicar",
+    )
     args = parser.parse_args()
 
+    ensure_tables()
     session = SessionLocal()
     try:
         targets = _iter_target_sites(
@@ -99,11 +131,24 @@ def main():
             print(f"No hay sitios que republicar{scope}")
             return
 
+        if args.only_changed:
+            changed_targets = []
+            for site in targets:
+                changes = _pending_changes(session, site)
+                if changes:
+                    changed_targets.append(site)
+                    preview = ", ".join(changes[:4]) + (" …" if len(changes) > 4 else "")
+                    print(f" • Site {site.id}: {len(changes)} cambio(s) ({preview})")
+            print(f"{len(changed_targets)} de {len(targets)} sitio(s) con cambios; {len(targets) - len(changed_targets)} omitidos")
+            targets = changed_targets
+            if args.dry_run or not targets:
+                return
+
         print(f"Republishing {len(targets)} site(s)...")
         for site in targets:
             print(f" → Site {site.id}: {site.name}")
             try:
-                result = _republish_site(site)
+                result = _republish_site(session, site)
                 session.commit()
                 print(
                     f"    ✓ OK -> {site.github_url} (repo {result['repo_name']})"
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""Mover ``uploads/`` a la disposición por shards (``ab/cd/<sha256>.<ext>``).
+
+Los archivos direccionados por contenido de la raíz y los derivados de
+``variants/`` pasan a subdirectorios según el prefijo de su hash. Las URLs
+públicas (``images/<nombre>``) no cambian: el montaje estático, la publicación y
+el render resuelven el nombre a su shard, así que no hay que tocar los sitios.
+Se puede interrumpir y volver a ejecutar; lo ya migrado se omite.
+
+Los nombres antiguos (uuid de subida, sha1 de la URL) se quedan en la raíz:
+``scripts/dedupe_uploads.py`` los convierte primero a nombres por contenido.
+
+Uso:
+    python scripts/shard_uploads.py --dry-run
+    python scripts/shard_uploads.py
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+from backend.utils.asset_manager import UPLOADS_DIR, VARIANTS_DIRNAME, shard_relpath  # noqa: E402
+
+
+def plan_moves(uploads_dir: Path) -> tuple[list[tuple[Path, Path]], int]:
+    """Pares (archivo plano, destino en su shard) y cuántos nombres antiguos quedan sin migrar."""
+    moves: list[tuple[Path, Path]] = []
+    legacy = 0
+    for prefix, directory in (("", uploads_dir), (f"{VARIANTS_DIRNAME}/", uploads_dir / VARIANTS_DIRNAME)):
+        if not directory.is_dir():
+            continue
+        for path in sorted(directory.iterdir()):
+            if not path.is_file() or path.name.startswith("."):
+                continue
+            name = prefix + path.name
+            sharded = shard_relpath(name)
+            if sharded == name:
+                legacy += int(not prefix and path.suffix not in {".part", ".tmp"})
+                continue
+            moves.append((path, uploads_dir / sharded))
+    return moves, legacy
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Repartir uploads/ en subdirectorios por hash")
+    parser.add_argument("--dry-run", action="store_true", help="Mostrar qué se movería sin tocar nada")
+    args = parser.parse_args()
+
+    moves, legacy = plan_moves(UPLOADS_DIR)
+    if legacy:
+        print(f"ℹ️ {legacy} archivo(s) con nombre antiguo; ejecuta antes scripts/dedupe_uploads.py para migrarlos")
+    if not moves:
+        print("✅ uploads/ ya está repartido por shards")
+        return
+
+    print(f"🔍 {len(moves)} archivo(s) por mover a su shard")
+    if args.dry_run:
+        for source, target in moves[:20]:
+            print(f" · {source.relative_to(UPLOADS_DIR)} → {target.relative_to(UPLOADS_DIR)}")
+        return
+
+    duplicates = 0
+    for source, target in moves:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        if target.exists():
+            # Mismo nombre por contenido => mismos bytes; la copia plana sobra
+            source.unlink()
+            duplicates += 1
+        else:
+            os.replace(source, target)
+    print(f"✅ {len(moves)} archivo(s) movidos a su shard ({duplicates} copias repetidas eliminadas)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Fixtures compartidas por los tests del motor de plantillas y de uploads/."""
+import os
+from pathlib import Path
+import sys
+
+# Fuerza una base de datos SQLite aislada ANTES de que cualquier test importe la app
+TEST_DB_PATH = Path(__file__).resolve().parent / "test_db.sqlite3"
+os.environ["DATABASE_URL"] = f"sqlite:///{TEST_DB_PATH}"
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+import pytest
+
+
+def _sample_site(**overrides):
+    data = {
+        "id": 7,
+        "name": "Cocina de Prueba",
+        "description": "Sitio generado en pruebas",
+        "hero_image": "images/hero.jpg",
+        "products": [{"name": "Arepa", "description": "Casera", "image": "images/arepa.jpg"}],
+        "gallery_images": ["images/galeria-1.jpg"],
+    }
+    data.update(overrides)
+    return data
+
+
+@pytest.fixture
+def sample_site():
+    """Fábrica de datos mínimos de un sitio; acepta campos a sobrescribir."""
+    return _sample_site
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, content_type: str, headers: dict | None = None, status_code: int = 200):
+        self.body = body
+        self.status_code = status_code
+        self.headers = {"Content-Type": content_type, **(headers or {})}
+        self.closed = False
+
+    def raise_for_status(self):
+        return None
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self.body), chunk_size):
+            yield self.body[start:start + chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class FakeHttp:
+    """Sesión HTTP falsa: ``handler(url, headers)`` construye cada respuesta."""
+
+    Response = FakeResponse
+
+    def __init__(self):
+        self.handler = None
+        self.requests = []
+
+    def get(self, url, timeout, stream, headers=None):
+        assert stream
+        self.requests.append((url, headers or {}))
+        return self.handler(url, headers or {})
+
+    @property
+    def urls(self):
+        return [url for url, _headers in self.requests]
+
+
+@pytest.fixture
+def uploads_dir(tmp_path, monkeypatch):
+    """uploads/ vacío en un directorio temporal."""
+    from backend.utils import asset_manager
+
+    uploads = tmp_path / "uploads"
+    uploads.mkdir()
+    monkeypatch.setattr(asset_manager, "UPLOADS_DIR", uploads)
+    return uploads
+
+
+@pytest.fixture
+def remote_index(tmp_path, monkeypatch):
+    """Índice de descargas y alias sobre una base SQLite propia del test."""
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.database import ensure_tables
+    from backend.utils import asset_manager
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'index.db'}")
+    ensure_tables(engine)
+    index = asset_manager.RemoteAssetIndex(sessionmaker(bind=engine))
+    monkeypatch.setattr(asset_manager, "remote_asset_index", index)
+    return index
+
+
+@pytest.fixture
+def fake_http(monkeypatch):
+    """Reemplaza la sesión HTTP compartida; el test asigna ``fake_http.handler``."""
+    from backend.utils import asset_manager
+
+    http = FakeHttp()
+    monkeypatch.setattr(asset_manager, "http_session", lambda: http)
+    return http
@@ -0,0 +1,47 @@
+def test_artifact_store_versions_renders_and_diffs_for_rollback(tmp_path):
+    from backend.utils.artifact_store import ArtifactStore
+
+    store = ArtifactStore(root=tmp_path / "artifacts")
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"logo-v1")
+
+    first = store.save(7, {"index.html": "<h1>v1</h1>", "styles.css": "a{}"}, {"images/logo.png": logo})
+    assert store.save(7, {"index.html": "<h1>v1</h1>", "styles.css": "a{}"}, {"images/logo.png": logo}).version == first.version
+    store.set_current(7, first.version)
+
+    second = store.save(7, {"index.html": "<h1>v2</h1>", "styles.css": "a{}"})
+    store.set_current(7, second.version)
+
+    assert store.versions(7) == [1, 2]
+    assert store.read_files(store.load_manifest(7))["index.html"] == "<h1>v2</h1>"
+    diff = store.diff(store.load_manifest(7), store.load_manifest(7, first.version))
+    assert diff.files == {"index.html": "<h1>v1</h1>"}
+    assert diff.assets["images/logo.png"].read_bytes() == b"logo-v1"
+    assert sum(1 for path in (tmp_path / "artifacts" / "objects").rglob("*") if path.is_file()) == 4
+
+
+def test_artifact_store_prunes_old_versions_links_uploads_and_forgets_sites(tmp_path):
+    from backend.utils.artifact_store import ArtifactStore
+
+    store = ArtifactStore(root=tmp_path / "artifacts", keep_versions=2)
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"logo")
+    objects = tmp_path / "artifacts" / "objects"
+
+    first = store.save(7, {"index.html": "<h1>v1</h1>"}, {"images/logo.png": logo})
+    assert store.asset_paths(first)["images/logo.png"].stat().st_ino == logo.stat().st_ino
+    store.set_current(7, first.version)
+    for number in (2, 3, 4):
+        store.save(7, {"index.html": f"<h1>v{number}</h1>"})
+
+    # Se conservan las dos últimas y la publicada; sus objetos siguen, los demás no
+    assert store.versions(7) == [1, 3, 4]
+    contents = {path.read_bytes() for path in objects.rglob("*") if path.is_file()}
+    assert contents == {b"<h1>v1</h1>", b"logo", b"<h1>v3</h1>", b"<h1>v4</h1>"}
+
+    store.save(8, {"index.html": "<h1>v4</h1>"})
+    store.forget(7)
+    assert store.versions(7) == []
+    assert store.current_version(7) is None
+    assert [path.read_bytes() for path in objects.rglob("*") if path.is_file()] == [b"<h1>v4</h1>"]
+    assert logo.read_bytes() == b"logo"
@@ -0,0 +1,26 @@
+def test_inline_small_assets_embeds_data_uris_and_drops_uploads(tmp_path):
+    from backend.utils.asset_inliner import inline_small_assets
+
+    (tmp_path / "logo.png").write_bytes(b"\x89PNG-small")
+    (tmp_path / "hero.jpg").write_bytes(b"x" * 5000)
+    files = {
+        "index.html": (
+            '<head><link rel="icon" href="images/logo.png">'
+            '<link rel="preload" href="styles.css" as="style"><noscript><link rel="stylesheet" href="styles.css"></noscript></head>'
+            '<img src="images/logo.png" srcset="images/variants/abc-64w.webp 64w" sizes="50vw"><img src="images/hero.jpg">'
+        ),
+        "styles.css": ".brand{background:url('images/logo.png')}",
+    }
+    assets = {"images/logo.png", "images/hero.jpg", "images/variants/abc-64w.webp"}
+
+    result = inline_small_assets(files, assets, max_bytes=4096, uploads_dir=tmp_path)
+
+    html = result.files["index.html"]
+    assert "images/logo.png" not in html
+    assert html.count("data:image/png;base64,") == 3
+    assert "srcset" not in html
+    assert '<img src="images/hero.jpg">' in html
+    assert "styles.css" not in result.files
+    assert "<style>.brand{background:url(data:image/png" in html
+    assert result.assets == {"images/hero.jpg"}
+    assert sorted(result.inlined) == ["images/logo.png", "styles.css"]
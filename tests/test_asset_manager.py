@@ -0,0 +1,218 @@
+import asyncio
+import hashlib
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from backend.utils import asset_manager
+from backend.utils.circuit_breaker import HostCircuitBreaker
+
+
+def test_ensure_local_asset_reuses_index_before_network(uploads_dir, remote_index, fake_http):
+    fake_http.handler = lambda url, headers: fake_http.Response(b"png", "image/png")
+
+    url = "https://example.com/foto"
+    first = asset_manager.ensure_local_asset(url)
+    assert first[1]
+    assert asset_manager.upload_path(first[0].split("/", 1)[1]).read_bytes() == b"png"
+    assert asset_manager.ensure_local_asset(url) == first
+    assert len(fake_http.requests) == 1
+
+    asset_manager.ensure_local_asset(url, refresh=True)
+    assert len(fake_http.requests) == 2
+
+    # Archivos descargados antes de que existiera el índice
+    legacy_url = "https://example.com/antigua.jpg"
+    legacy = uploads_dir / f"{asset_manager.RemoteAssetIndex.url_key(legacy_url)}.jpg"
+    legacy.write_bytes(b"jpg")
+    assert asset_manager.ensure_local_asset(legacy_url) == (f"images/{legacy.name}", True)
+    assert len(fake_http.requests) == 2
+    assert remote_index.lookup(legacy_url).filename == legacy.name
+
+
+def test_ensure_local_assets_downloads_in_parallel_preserving_order(uploads_dir, remote_index, fake_http):
+    lock = threading.Lock()
+    active = {"now": 0, "peak": 0}
+
+    def handler(url, headers):
+        with lock:
+            active["now"] += 1
+            active["peak"] = max(active["peak"], active["now"])
+        time.sleep(0.05)
+        with lock:
+            active["now"] -= 1
+        return fake_http.Response(url.encode("utf-8"), "image/jpeg")
+
+    fake_http.handler = handler
+    urls = [f"https://cdn.example.com/{number}.jpg" for number in range(6)]
+    results = asset_manager.ensure_local_assets(
+        [urls[0], "images/local.jpg", *urls, urls[0], None], max_workers=6, per_host=2
+    )
+
+    assert results[1] == ("images/local.jpg", False)
+    assert results[-1] == ("", False)
+    assert results[0] == results[2] == results[-2]
+    for url, (local_path, downloaded) in zip(urls, results[2:8]):
+        assert downloaded
+        assert asset_manager.upload_path(local_path.split("/", 1)[1]).read_bytes() == url.encode("utf-8")
+    assert sorted(fake_http.urls) == sorted(urls)
+    assert active["peak"] == 2
+
+
+def test_stream_download_hashes_and_rejects_oversized_or_non_images(uploads_dir, fake_http, monkeypatch):
+    responses = {
+        "https://example.com/foto.jpg": fake_http.Response(b"x" * 300, "image/jpeg"),
+        "https://example.com/video": fake_http.Response(b"v" * 10, "video/mp4"),
+        "https://example.com/grande.jpg": fake_http.Response(b"g" * 600, "image/jpeg"),
+        "https://example.com/anunciada.jpg": fake_http.Response(b"", "image/jpeg", {"Content-Length": "5000"}),
+        "https://example.com/binario.png": fake_http.Response(b"p" * 10, "application/octet-stream"),
+    }
+    fake_http.handler = lambda url, headers: responses[url]
+    monkeypatch.setattr(asset_manager, "DOWNLOAD_CHUNK_SIZE", 128)
+
+    download = asset_manager._stream_download("https://example.com/foto.jpg", max_bytes=500)
+    assert download.size == 300
+    assert download.sha256 == hashlib.sha256(b"x" * 300).hexdigest()
+    assert download.temp_path.read_bytes() == b"x" * 300
+    assert asset_manager._stream_download("https://example.com/binario.png", max_bytes=500).size == 10
+
+    for url in ("https://example.com/video", "https://example.com/grande.jpg", "https://example.com/anunciada.jpg"):
+        with pytest.raises(asset_manager.DownloadRejected):
+            asset_manager._stream_download(url, max_bytes=500)
+        assert responses[url].closed
+    # Solo quedan los temporales de las dos descargas aceptadas
+    assert len(list(uploads_dir.iterdir())) == 2
+
+
+def test_uploads_are_content_addressed_and_old_names_resolve_through_aliases(uploads_dir, remote_index, fake_http):
+    fake_http.handler = lambda url, headers: fake_http.Response(b"misma imagen", "image/png")
+
+    uploaded = asset_manager.store_bytes(b"misma imagen", "PNG")
+    assert asset_manager.store_bytes(b"misma imagen", "png") == uploaded
+    assert asset_manager.ensure_local_asset("https://a.example.com/uno.png") == (f"images/{uploaded}", True)
+    assert asset_manager.ensure_local_asset("https://b.example.com/dos.png") == (f"images/{uploaded}", True)
+    assert [path.relative_to(uploads_dir).as_posix() for path in uploads_dir.rglob("*") if path.is_file()] == [
+        f"{uploaded[:2]}/{uploaded[2:4]}/{uploaded}"
+    ]
+
+    remote_index.record_alias("0b5c3e.png", uploaded)
+    assert asset_manager.resolve_upload("0b5c3e.png") == uploaded
+    assert asset_manager.resolve_upload("desconocido.png") is None
+
+
+def test_expired_remote_assets_are_revalidated_with_conditional_requests(uploads_dir, remote_index, fake_http, monkeypatch):
+    monkeypatch.setattr(asset_manager, "ASSET_CACHE_MAX_AGE", 600)
+    origin = {"etag": '"v1"', "body": b"v1"}
+
+    def handler(url, headers):
+        if headers.get("If-None-Match") == origin["etag"]:
+            return fake_http.Response(b"", "image/png", status_code=304)
+        return fake_http.Response(origin["body"], "image/png", {"ETag": origin["etag"], "Cache-Control": "max-age=60"})
+
+    fake_http.handler = handler
+    url = "https://cdn.example.com/logo.png"
+
+    def expire():
+        entry = remote_index.lookup(url)
+        remote_index.record(url, entry.filename, entry.content_type, entry.size,
+                            fetched_at=datetime.utcnow() - timedelta(hours=1), etag=entry.etag, max_age=entry.max_age)
+
+    first, _ = asset_manager.ensure_local_asset(url)
+    assert remote_index.lookup(url).etag == '"v1"'
+    assert remote_index.lookup(url).max_age == 60
+    asset_manager.ensure_local_asset(url)
+    assert len(fake_http.requests) == 1  # vigente: sin red
+
+    expire()
+    assert asset_manager.ensure_local_asset(url) == (first, True)
+    entry = remote_index.lookup(url)
+    assert fake_http.requests[-1][1] == {"If-None-Match": '"v1"'}
+    assert datetime.utcnow() - entry.checked_at < timedelta(minutes=1) < datetime.utcnow() - entry.fetched_at
+
+    expire()
+    origin.update(etag='"v2"', body=b"v2")
+    second, _ = asset_manager.ensure_local_asset(url)
+    assert second != first
+    assert asset_manager.upload_path(second.split("/", 1)[1]).read_bytes() == b"v2"
+    assert remote_index.lookup(url).etag == '"v2"'
+
+
+def test_failing_assets_back_off_and_open_the_host_circuit(uploads_dir, remote_index, fake_http, monkeypatch):
+    monkeypatch.setattr(asset_manager, "host_breaker", HostCircuitBreaker(threshold=2, cooldown_seconds=60))
+
+    def handler(url, headers):
+        if "privado" in url:
+            response = fake_http.Response(b"", "text/html", status_code=403)
+            response.raise_for_status = lambda: (_ for _ in ()).throw(requests.HTTPError("403", response=response))
+            return response
+        raise requests.ConnectTimeout("timeout")
+
+    fake_http.handler = handler
+
+    private = "https://drive.example.com/privado.jpg"
+    assert asset_manager.ensure_local_asset(private) == (private, False)
+    assert asset_manager.ensure_local_asset(private) == (private, False)
+    failures, retry_after = remote_index.failure(private)
+    assert failures == 1
+    assert retry_after is not None
+    assert len(fake_http.requests) == 1
+
+    for number in range(4):
+        asset_manager.ensure_local_asset(f"https://caido.example.com/{number}.jpg")
+    assert "https://caido.example.com/2.jpg" not in fake_http.urls
+    assert len(fake_http.requests) == 3
+    assert [entry["host"] for entry in asset_manager.host_breaker.list_open_hosts()] == ["caido.example.com"]
+
+    # Un 4xx o una respuesta rechazada prueban que el host está vivo: reinician la cuenta
+    def flaky(url, headers):
+        if url.endswith("roto.jpg"):
+            return handler("https://mixto.example.com/privado.jpg", headers)
+        if url.endswith(".txt"):
+            return fake_http.Response(b"texto", "text/plain")
+        raise requests.ConnectTimeout("timeout")
+
+    fake_http.handler = flaky
+    for path in ("a.jpg", "roto.jpg", "b.jpg", "nota.txt", "c.jpg"):
+        asset_manager.ensure_local_asset(f"https://mixto.example.com/{path}")
+    assert "mixto.example.com" not in [entry["host"] for entry in asset_manager.host_breaker.list_open_hosts()]
+    asset_manager.ensure_local_asset("https://mixto.example.com/d.jpg")
+    assert "mixto.example.com" in [entry["host"] for entry in asset_manager.host_breaker.list_open_hosts()]
+
+    # Medio abierto: vencida la espera pasa una sola petición de prueba
+    breaker = HostCircuitBreaker(threshold=1, cooldown_seconds=10)
+    breaker.record_failure("cdn", now=100)
+    assert not breaker.allow("cdn", now=105)
+    assert breaker.allow("cdn", now=111)
+    assert not breaker.allow("cdn", now=112)
+    breaker.record_success("cdn")
+    assert breaker.allow("cdn", now=113)
+
+
+def test_store_upload_streams_hashes_and_aborts_over_the_limit(uploads_dir):
+    def reader(data: bytes):
+        reads = []
+
+        async def read(size: int) -> bytes:
+            chunk = data[len(reads) * size:(len(reads) + 1) * size]
+            reads.append(len(chunk))
+            return chunk
+
+        return read, reads
+
+    body = b"imagen" * 100
+    read, reads = reader(body)
+    filename, size = asyncio.run(asset_manager.store_upload(read, "PNG", max_bytes=1000, chunk_size=64))
+    assert filename == f"{hashlib.sha256(body).hexdigest()}.png"
+    assert size == len(body)
+    assert asset_manager.upload_path(filename).read_bytes() == body
+    assert max(reads) == 64
+    assert asyncio.run(asset_manager.store_upload(reader(body)[0], "png", max_bytes=1000))[0] == filename
+
+    read, reads = reader(b"x" * 5000)
+    with pytest.raises(asset_manager.UploadTooLarge):
+        asyncio.run(asset_manager.store_upload(read, "png", max_bytes=1000, chunk_size=256))
+    assert sum(reads) <= 1024
+    assert not list(uploads_dir.glob("*.part"))
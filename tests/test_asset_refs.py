@@ -0,0 +1,74 @@
+def test_collect_garbage_keeps_referenced_and_recent_files(tmp_path):
+    import os
+    import time
+
+    from backend.utils.asset_manager import content_hash
+    from backend.utils.asset_refs import collect_garbage
+
+    (tmp_path / "variants").mkdir()
+    used, orphan, recent = tmp_path / "usada.jpg", tmp_path / "huerfana.jpg", tmp_path / "reciente.jpg"
+    for path in (used, orphan, recent):
+        path.write_bytes(path.name.encode("utf-8"))
+    used_variant = tmp_path / "variants" / f"{content_hash(used)[:20]}-480w.webp"
+    orphan_variant = tmp_path / "variants" / f"{content_hash(orphan)[:20]}-480w.webp"
+    for path in (used_variant, orphan_variant):
+        path.write_bytes(b"webp")
+    old = time.time() - 10 * 86400
+    for path in (used, orphan, used_variant, orphan_variant):
+        os.utime(path, (old, old))
+
+    preview = collect_garbage({"usada.jpg"}, grace_seconds=7 * 86400, dry_run=True, uploads_dir=tmp_path)
+    assert orphan.exists()
+    assert preview.removed == ["huerfana.jpg", f"variants/{orphan_variant.name}"]
+
+    report = collect_garbage({"usada.jpg"}, grace_seconds=7 * 86400, uploads_dir=tmp_path)
+    assert report.removed == preview.removed
+    assert report.reclaimed_bytes == len(b"huerfana.jpg") + 4
+    assert report.kept_recent == 1
+    assert used.exists()
+    assert used_variant.exists()
+    assert recent.exists()
+    assert not orphan.exists()
+    assert not orphan_variant.exists()
+
+
+def test_avatars_and_alias_references_survive_collect_garbage(tmp_path, uploads_dir, remote_index):
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+
+    from backend.database import SiteAsset, User, ensure_tables
+    from backend.utils import asset_manager
+    from backend.utils.asset_refs import collect_garbage, referenced_assets
+
+    avatar = asset_manager.store_bytes(b"avatar", "png")
+    aliased = asset_manager.store_bytes(b"subida antigua", "jpg")
+    orphan = asset_manager.store_bytes(b"huerfana", "jpg")
+    remote_index.record_alias("0b5c3e.jpg", aliased)
+    for original in (avatar, orphan):
+        processed = asset_manager.upload_path(asset_manager.processed_name(original))
+        processed.parent.mkdir(parents=True)
+        processed.write_bytes(b"optimizada")
+
+    engine = create_engine(f"sqlite:///{tmp_path / 'refs.db'}")
+    ensure_tables(engine)
+    db = sessionmaker(bind=engine)()
+    try:
+        db.add(SiteAsset(site_id=1, filename="0b5c3e.jpg"))
+        db.add(User(username="ana", email="ana@example.com", hashed_password="x", role_id=1,
+                    avatar_url=f"/images/{avatar}"))
+        db.add(User(username="luis", email="luis@example.com", hashed_password="x", role_id=1,
+                    avatar_url="https://cdn.example.com/foto.png"))
+        db.commit()
+        referenced = referenced_assets(db)
+    finally:
+        db.close()
+
+    assert {avatar, aliased} <= referenced
+    report = collect_garbage(referenced, grace_seconds=0, uploads_dir=uploads_dir)
+    assert sorted(report.removed) == sorted([
+        asset_manager.shard_relpath(orphan),
+        asset_manager.shard_relpath(asset_manager.processed_name(orphan)),
+    ])
+    assert asset_manager.processed_upload(avatar) == asset_manager.processed_name(avatar)
+    assert asset_manager.upload_path(avatar).is_file()
+    assert asset_manager.upload_path(aliased).is_file()
@@ -419,3 +419,49 @@ def test_admin_user_avatar_can_be_set_and_cleared(client):
         html = preview_response.text
         assert "footer-supporters" in html
         assert "thumbnail?id=1abc123drive" in html or "uc?export=view&id=1abc123drive" in html
+
+
+def test_upload_extension_comes_from_the_content_type(client, uploads_dir, monkeypatch):
+    from backend import main
+
+    def broken_pool(filename):
+        raise RuntimeError("pool roto")
+
+    # Si no se puede encolar el procesamiento, la subida (ya guardada) sigue siendo válida
+    monkeypatch.setattr(main, "UPLOAD_PROCESSING_ENABLED", True)
+    monkeypatch.setattr(main.upload_processor, "submit", broken_pool)
+    creds = create_superadmin()
+    token, _ = login(client, creds["email"], creds["password"])
+
+    response = client.post(
+        "/api/upload-image",
+        headers=auth_header(token),
+        files={"file": ("a./x", b"\x89PNG falso", "image/png")},
+    )
+    assert response.status_code == 200, response.text
+    assert response.json()["processing"] is False
+    filename = response.json()["filename"]
+    assert filename.endswith(".png")
+    assert "/" not in filename
+    assert [path.name for path in uploads_dir.rglob("*") if path.is_file()] == [filename]
+
+
+def test_upload_rejected_by_content_length_before_parsing(client, uploads_dir, monkeypatch):
+    from backend import main
+
+    def unexpected_store(*args, **kwargs):
+        raise AssertionError("el formulario no debería leerse")
+
+    monkeypatch.setattr(main, "store_upload", unexpected_store)
+    creds = create_superadmin()
+    token, _ = login(client, creds["email"], creds["password"])
+
+    oversized = b"\0" * (main.UPLOAD_MAX_BYTES + main.UPLOAD_MULTIPART_OVERHEAD + 1)
+    response = client.post(
+        "/api/upload-image",
+        headers=auth_header(token),
+        files={"file": ("grande.png", oversized, "image/png")},
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == main.UPLOAD_TOO_LARGE_DETAIL
+    assert not [path for path in uploads_dir.rglob("*") if path.is_file()]
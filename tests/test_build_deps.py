@@ -0,0 +1,37 @@
+from pathlib import Path
+
+from backend.utils.template_engine import TemplateEngine
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_site_dependencies_only_flag_inputs_that_changed(tmp_path, sample_site):
+    import shutil
+
+    from backend.utils.build_deps import changed_dependencies, site_dependencies
+
+    shutil.copytree(PROJECT_ROOT / "templates_base" / "cocina", tmp_path / "cocina")
+    engine = TemplateEngine()
+    engine.templates_dir = tmp_path
+    site = sample_site()
+
+    recorded = site_dependencies(engine, "cocina", site, options={"minify": True})
+    assert changed_dependencies(recorded, site_dependencies(engine, "cocina", sample_site(), options={"minify": True})) == []
+    assert changed_dependencies(None, recorded) == sorted(recorded)
+
+    template = tmp_path / "cocina" / "index.html"
+    template.write_text(template.read_text(encoding="utf-8") + "<!-- cambio -->", encoding="utf-8")
+    current = site_dependencies(engine, "cocina", site, options={"minify": False})
+    assert changed_dependencies(recorded, current) == ["options", "template:cocina/index.html"]
+
+
+def test_engine_sources_and_downloaded_supporter_logos_are_dependencies(monkeypatch, sample_site):
+    from backend import main
+    from backend.utils.build_deps import ENGINE_SOURCES
+
+    assert {"image_metadata.py", "upload_processing.py"} <= {source.name for source in ENGINE_SOURCES}
+
+    monkeypatch.setattr(main, "cached_filename", lambda url: "aliado.png" if "aliado" in url else None)
+    site = sample_site(supporter_logos_json='[{"name": "Aliado", "url": "https://example.com/aliado.png"}]')
+    dependencies = main._site_dependencies("cocina", site)
+    assert {"asset:images/aliado.png", "asset:images/hero.jpg"} <= set(dependencies)
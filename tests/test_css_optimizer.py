@@ -0,0 +1,36 @@
+from backend.utils.css_optimizer import optimize_stylesheets
+
+
+def test_optimize_stylesheets_purges_and_inlines_critical_css():
+    files = {
+        "index.html": (
+            '<html><head><link rel="stylesheet" href="https://cdnjs.cloudflare.com/ajax/libs/font-awesome/6.4.0/css/all.min.css">'
+            '<link rel="stylesheet" href="styles.css"></head><body>'
+            '<header class="header"><nav class="nav"></nav></header>'
+            '<section class="hero"><h2>Hola</h2></section>'
+            '<section class="about"><p>Texto</p></section>'
+            "<script>menu.classList.toggle('is-open');</script></body></html>"
+        ),
+        "styles.css": (
+            ".header { color: red; }\n.hero h2:hover { color: blue; }\n.about p { margin: 0; }\n"
+            ".gallery-item { width: 10px; }\n.nav.is-open { display: block; }\n"
+            "@media (max-width: 768px) { .gallery-item { width: 5px; } .hero { padding: 0; } }"
+        ),
+    }
+
+    optimized, report = optimize_stylesheets(files)
+
+    css = optimized["styles.css"]
+    assert ".gallery-item" not in css
+    assert ".about p" in css
+    assert ".nav.is-open" in css
+    assert "@media" in css
+    assert report.removed_rules == 2
+    assert report.dropped_stylesheets == 1
+
+    html = optimized["index.html"]
+    critical = html.split("<style>", 1)[1].split("</style>", 1)[0]
+    assert ".header{color:red}" in critical
+    assert ".about p" not in critical
+    assert 'rel="preload" href="styles.css"' in html
+    assert "font-awesome" not in html
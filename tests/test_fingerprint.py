@@ -0,0 +1,24 @@
+from backend.utils.fingerprint import fingerprint_site, is_fingerprinted
+
+
+def test_fingerprint_site_renames_assets_by_content(tmp_path):
+    (tmp_path / "logo.png").write_bytes(b"same-bytes")
+    (tmp_path / "copy.png").write_bytes(b"same-bytes")
+    files = {
+        "index.html": '<link rel="stylesheet" href="styles.css"><img src="images/logo.png"><img src="images/copy.png">',
+        "styles.css": ".hero{background:url('images/logo.png')}",
+        ".nojekyll": "",
+    }
+
+    result = fingerprint_site(files, {"images/logo.png", "images/copy.png"}, uploads_dir=tmp_path)
+
+    image_name = result.renamed["images/logo.png"]
+    assert result.renamed["images/copy.png"] == image_name
+    assert set(result.asset_files) == {image_name}
+    css_name = result.renamed["styles.css"]
+    assert is_fingerprinted(css_name)
+    assert is_fingerprinted(image_name)
+    assert image_name in result.files[css_name]
+    assert f'href="{css_name}"' in result.files["index.html"]
+    assert "images/logo.png" not in result.files["index.html"]
+    assert fingerprint_site(files, {"images/logo.png"}, uploads_dir=tmp_path).renamed["styles.css"] == css_name
@@ -0,0 +1,45 @@
+from backend.utils import image_variants
+
+
+def test_responsive_variants_are_generated_once_and_emitted_as_srcset(tmp_path, monkeypatch):
+    from PIL import Image
+
+    from backend.utils import asset_manager
+
+    monkeypatch.setattr(image_variants, "UPLOADS_DIR", tmp_path)
+    Image.new("RGB", (2000, 1000), "orange").save(tmp_path / "hero.jpg")
+
+    variants = image_variants.ensure_variants("images/hero.jpg")
+    assert [width for _path, width in variants] == [480, 960, 1600]
+
+    first_mtime = asset_manager.upload_path(variants[0][0].split("/", 1)[1], tmp_path).stat().st_mtime_ns
+    assert image_variants.ensure_variants("images/hero.jpg") == variants
+    assert asset_manager.upload_path(variants[0][0].split("/", 1)[1], tmp_path).stat().st_mtime_ns == first_mtime
+
+    html = image_variants.apply_srcset('<img src="images/hero.jpg" alt="Hero">', hero_src="images/hero.jpg")
+    assert 'sizes="100vw"' in html
+    assert f'srcset="{variants[0][0]} 480w' in html
+
+
+def test_existing_variants_listing_is_cached_until_the_directory_changes(tmp_path, monkeypatch):
+    from pathlib import Path
+
+    from PIL import Image
+
+    from backend.utils import asset_manager
+
+    monkeypatch.setattr(image_variants, "UPLOADS_DIR", tmp_path)
+    Image.new("RGB", (1000, 500), "teal").save(tmp_path / "foto.jpg")
+    variants = image_variants.ensure_variants("images/foto.jpg")
+    assert [width for _path, width in variants] == [480, 960, 1000]
+
+    real_glob = Path.glob
+    calls = []
+    monkeypatch.setattr(Path, "glob", lambda self, pattern: calls.append(pattern) or real_glob(self, pattern))
+    for _ in range(3):
+        image_variants.apply_srcset('<img src="images/foto.jpg">')
+    assert calls == []
+
+    asset_manager.upload_path(variants[0][0].split("/", 1)[1], tmp_path).unlink()
+    assert image_variants.existing_variants("images/foto.jpg") == variants[1:]
+    assert calls
@@ -0,0 +1,23 @@
+def test_local_origin_serves_active_build_with_etag_and_encodings(tmp_path):
+    from backend.utils.local_origin import IMMUTABLE_CACHE_CONTROL, LocalOrigin
+
+    origin = LocalOrigin(root=tmp_path)
+    logo = tmp_path / "logo.png"
+    logo.write_bytes(b"png")
+    html = "<html>" + "contenido " * 200 + "</html>"
+    origin.write("mi-sitio", {"index.html": html, "styles.0123456789ab.css": "a{}", ".nojekyll": ""}, {"images/logo.png": logo})
+
+    index = origin.resolve("mi-sitio", "", "gzip, br")
+    assert index.encoding in {"gzip", "br"}
+    assert index.path.suffix in {".gz", ".br"}
+    assert index.etag != origin.resolve("mi-sitio", "index.html").etag
+    assert origin.resolve("mi-sitio", "styles.0123456789ab.css").cache_control == IMMUTABLE_CACHE_CONTROL
+    assert origin.resolve("mi-sitio", "images/logo.png").path.read_bytes() == b"png"
+    assert origin.resolve("mi-sitio", "../logo.png") is None
+    assert origin.resolve("mi-sitio", ".nojekyll") is None
+
+    first_build = origin.current_build("mi-sitio")
+    origin.write("mi-sitio", {"index.html": "<p>v2</p>"})
+    origin.write("mi-sitio", {"index.html": "<p>v3</p>"})
+    assert origin.resolve("mi-sitio", "index.html").path.read_text() == "<p>v3</p>"
+    assert not (tmp_path / "mi-sitio" / first_build).exists()
@@ -0,0 +1,22 @@
+from backend.utils.minifier import minify_css, minify_js, optimize_site_files
+from backend.utils.template_engine import TemplateEngine
+
+
+def test_optimize_site_files_minifies_and_reports_savings(sample_site):
+    files = TemplateEngine().generate_site("cocina", sample_site(whatsapp_number="3001234567"))
+    optimized, report = optimize_site_files(files)
+
+    by_path = {entry.path: entry for entry in report}
+    assert set(by_path) == {"index.html", "styles.css", "tracking.js"}
+    assert all(entry.saved_bytes > 0 for entry in report)
+    assert "/*" not in optimized["styles.css"]
+    assert "Cocina de Prueba" in optimized["index.html"]
+    assert minify_css('a { content: "x  /* y */" ; color : red ; }') == 'a{content:"x  /* y */";color:red}'
+    assert minify_css("div :first-child { margin :0 }") == "div :first-child{margin:0}"
+
+
+def test_minify_js_keeps_template_literals_and_strings_intact():
+    js = "  // fuera\n  const html = `\n    // dentro   \n  `;\n  const url = 'https://a.example.com'; // fin\n"
+    assert minify_js(js) == "const html = `\n    // dentro   \n  `;\nconst url = 'https://a.example.com'; // fin"
+    # Sin poder recorrerlo con seguridad (comilla dentro de una regex) se deja igual
+    assert minify_js("var r = /'/;\n  // c\n") == "var r = /'/;\n  // c\n"
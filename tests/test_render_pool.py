@@ -0,0 +1,53 @@
+import asyncio
+
+import pytest
+
+from backend.utils.render_pool import RenderPool, RenderPoolBusy
+
+
+@pytest.mark.parametrize("mode", ["thread", "process"])
+def test_render_pool_renders_off_the_event_loop(mode, sample_site):
+    pool = RenderPool(mode=mode, max_workers=1, max_pending=2, timeout_seconds=30)
+    try:
+        files = asyncio.run(pool.render("cocina", sample_site()))
+    finally:
+        pool.shutdown()
+
+    assert "Cocina de Prueba" in files["index.html"]
+    assert set(files) >= {"index.html", "styles.css", "tracking.js"}
+    assert pool.pending == 0
+
+
+def test_render_pool_rejects_when_queue_is_full(sample_site):
+    pool = RenderPool(mode="thread", max_workers=1, max_pending=1)
+    try:
+        pool._acquire_slot()
+        with pytest.raises(RenderPoolBusy):
+            pool.submit("cocina", sample_site())
+    finally:
+        pool._release_slot()
+        pool.shutdown()
+
+
+def test_thread_pool_workers_share_one_engine(monkeypatch, sample_site):
+    from backend.utils import template_engine
+
+    built = []
+    original_init = template_engine.TemplateEngine.__init__
+
+    def counting_init(self, *args, **kwargs):
+        built.append(self)
+        original_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(template_engine, "_worker_engine", None)
+    monkeypatch.setattr(template_engine.TemplateEngine, "__init__", counting_init)
+    pool = RenderPool(mode="thread", max_workers=4, max_pending=8, timeout_seconds=30)
+    try:
+        futures = [pool.submit("cocina", sample_site()) for _ in range(8)]
+        for future in futures:
+            future.result(timeout=30)
+    finally:
+        pool.shutdown()
+
+    assert len(built) == 1
+    assert template_engine._worker_engine is built[0]
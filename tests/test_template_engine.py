@@ -0,0 +1,134 @@
+import re
+
+import pytest
+
+from backend.utils.image_metadata import ImageMetadataIndex
+from backend.utils.template_engine import INTRINSIC_SIZE_STYLE, TemplateEngine
+
+
+def test_compiled_templates_are_reused_between_renders(sample_site):
+    engine = TemplateEngine()
+    first = engine.get_template("cocina", "index.html")
+    engine.generate_site("cocina", sample_site())
+
+    assert engine.get_template("cocina", "index.html") is first
+    assert engine.warm_templates() >= 5
+
+
+def test_image_hints_mark_hero_priority_lazy_below_fold_and_intrinsic_size(tmp_path):
+    from PIL import Image
+
+    Image.new("RGB", (640, 480), "green").save(tmp_path / "producto.png")
+    index = ImageMetadataIndex(index_path=tmp_path / "index.json", uploads_dir=tmp_path)
+    engine = TemplateEngine(image_metadata=index)
+
+    html = engine._apply_image_hints(
+        "<html><head></head><body><header><img src=\"images/logo.png\" loading=\"lazy\"></header>"
+        "<section class=\"hero\"><img src=\"images/hero.jpg\" loading=\"lazy\"></section>"
+        "<section><img src=\"images/producto.png\"></section></body></html>",
+        hero_src="images/hero.jpg",
+    )
+
+    logo, hero, product = re.findall(r"<img[^>]*>", html)
+    assert "loading" not in logo
+    assert 'decoding="async"' in logo
+    assert 'fetchpriority="high"' in hero
+    assert "loading" not in hero
+    assert 'loading="lazy"' in product
+    assert 'width="640"' in product
+    assert 'height="480"' in product
+    assert INTRINSIC_SIZE_STYLE in html
+    assert "producto.png" in (tmp_path / "index.json").read_text()
+
+
+def test_placeholders_are_computed_on_publish_and_exposed_to_templates(tmp_path, sample_site):
+    from PIL import Image
+
+    Image.new("RGB", (800, 400), (200, 40, 40)).save(tmp_path / "hero.jpg")
+    Image.new("RGBA", (64, 64), (0, 0, 0, 0)).save(tmp_path / "logo.png")
+    index = ImageMetadataIndex(index_path=tmp_path / "index.json", uploads_dir=tmp_path)
+    engine = TemplateEngine(image_metadata=index)
+
+    assert engine.generate_site("cocina", sample_site())["index.html"].count("data:image/jpeg") == 0
+    assert index.ensure_placeholders(["images/hero.jpg", "images/logo.png", "https://example.com/x.jpg"]) == 1
+
+    placeholder = index.placeholder("images/hero.jpg", compute=False)
+    assert placeholder["lqip"].startswith("data:image/jpeg;base64,")
+    assert placeholder["color"].startswith("#c")
+    assert index.placeholder("images/logo.png") is None
+
+    html = engine.generate_site("cocina", sample_site())["index.html"]
+    hero_tag = next(tag for tag in re.findall(r"<img[^>]*>", html) if "images/hero.jpg" in tag)
+    assert f"url({placeholder['lqip']})" in hero_tag
+
+
+@pytest.mark.parametrize("workers", [0, 2])
+def test_render_many_streams_every_site_and_reports_errors(workers, sample_site):
+    sites = [("cocina", sample_site(id=index, name=f"Sitio {index}")) for index in range(5)]
+    sites.append(("no-existe", sample_site(id=99)))
+
+    results = {result.site_id: result for result in TemplateEngine().render_many(iter(sites), max_workers=workers, chunk_size=2)}
+
+    assert set(results) == {0, 1, 2, 3, 4, 99}
+    assert "Sitio 3" in results[3].files["index.html"]
+    assert results[99].files is None
+    assert "Modelo no encontrado" in results[99].error
+
+
+def test_image_metadata_index_reloads_and_merges_writes_from_other_processes(tmp_path):
+    from PIL import Image
+
+    Image.new("RGB", (800, 400), "red").save(tmp_path / "hero.jpg")
+    Image.new("RGB", (300, 200), "blue").save(tmp_path / "producto.jpg")
+    publisher = ImageMetadataIndex(index_path=tmp_path / "index.json", uploads_dir=tmp_path)
+    renderer = ImageMetadataIndex(index_path=tmp_path / "index.json", uploads_dir=tmp_path)
+    assert renderer.placeholder("images/hero.jpg", compute=False) is None
+
+    placeholder = publisher.placeholder("images/hero.jpg")
+    assert renderer.placeholder("images/hero.jpg", compute=False) == placeholder
+
+    # Lo que escribe uno no pisa lo que guardó el otro
+    assert renderer.dimensions("images/producto.jpg") == (300, 200)
+    fresh = ImageMetadataIndex(index_path=tmp_path / "index.json", uploads_dir=tmp_path)
+    assert fresh.placeholder("images/hero.jpg", compute=False) == placeholder
+    assert fresh.dimensions("images/producto.jpg") == (300, 200)
+
+
+def test_generic_template_and_palette_css_are_built_once(tmp_path, monkeypatch, sample_site):
+    engine = TemplateEngine()
+    engine.templates_dir = tmp_path  # ningún modelo tiene plantilla propia
+    builds = []
+    original_build_css = TemplateEngine._build_css
+    monkeypatch.setattr(TemplateEngine, "_build_css", staticmethod(lambda palette: builds.append(palette) or original_build_css(palette)))
+
+    first = engine.generate_site("cocina", sample_site())
+    template = engine.get_generic_template(next(m for m in engine.load_models_config()["models"] if m["id"] == "cocina"))
+    second = engine.generate_site("cocina", sample_site(name="Otro Sitio"))
+
+    assert "Otro Sitio" in second["index.html"]
+    assert "Cocina de Prueba" in first["index.html"]
+    assert first["styles.css"] == second["styles.css"]
+    assert len(builds) == 1
+    assert engine.get_generic_template(next(m for m in engine.load_models_config()["models"] if m["id"] == "cocina")) is template
+
+
+def test_default_supporters_fragment_is_shared_and_custom_ones_are_not(monkeypatch, sample_site):
+    from backend.utils import template_engine as engine_module
+
+    engine = TemplateEngine()
+    calls = []
+    original = engine_module.optimize_logo_url
+    monkeypatch.setattr(engine_module, "optimize_logo_url", lambda url: calls.append(url) or original(url))
+
+    first = engine.generate_site("artesanias", sample_site())
+    second = engine.generate_site("artesanias", sample_site(name="Otro Sitio"))
+    assert "supporter-badge" in first["index.html"]
+    assert "Ministerio de Minas" in second["index.html"]
+    assert len([url for url in calls if url]) == len(engine_module.DEFAULT_SUPPORTERS)
+    assert len(engine._supporter_fragments) == 1
+
+    custom = sample_site(supporter_logos_json='[{"name": "Aliado Local", "url": "https://example.com/aliado.png"}]')
+    html = engine.generate_site("cocina", custom)["index.html"]
+    assert "example.com/aliado.png" in html
+    assert "footer-supporters" in html
+    assert len(engine._supporter_fragments) == 1
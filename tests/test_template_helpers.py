@@ -0,0 +1,14 @@
+def test_url_helpers_are_memoized_with_hit_counters():
+    from backend import template_helpers
+
+    template_helpers.clear_url_caches()
+    url = "https://drive.google.com/file/d/abc123/view?usp=sharing"
+    for _ in range(5):
+        assert template_helpers.optimize_logo_url(url) == "https://drive.google.com/thumbnail?id=abc123&sz=w420"
+    assert template_helpers.optimize_logo_url(url, max_width=64).endswith("sz=w64")
+    assert template_helpers.normalize_local_asset(None) == ""
+
+    stats = template_helpers.url_cache_stats()
+    assert stats["optimize_logo_url"]["hits"] == 4
+    assert stats["optimize_logo_url"]["misses"] == 2
+    assert stats["normalize_local_asset"]["misses"] == 0
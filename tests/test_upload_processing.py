@@ -0,0 +1,60 @@
+import io
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from PIL import Image
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.utils import asset_manager, uploads_static
+from backend.utils.upload_processing import UploadProcessor
+
+
+def test_upload_processor_normalizes_and_records_optimized_versions(tmp_path, uploads_dir, remote_index, monkeypatch):
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Rotada 90°: el ancho real es el alto almacenado
+    buffer = io.BytesIO()
+    Image.new("RGB", (1200, 600), "navy").save(buffer, format="JPEG", exif=exif)
+    photo = asset_manager.store_bytes(buffer.getvalue(), "jpg")
+    logo = asset_manager.store_bytes(b"<svg xmlns='http://www.w3.org/2000/svg'/>", "svg")
+
+    processor = UploadProcessor(mode="thread", max_dimension=800, index=remote_index)
+    assert processor.submit(logo) is None
+    future = processor.submit(photo)
+    processor.shutdown(wait=True)
+    assert future.done()
+
+    result = remote_index.processed(photo)
+    assert result["exif_stripped"]
+    assert (result["width"], result["height"]) == (400, 800)
+    with Image.open(asset_manager.upload_path(result["filename"])) as optimized:
+        assert optimized.size == (400, 800)
+        assert not optimized.getexif()
+    with Image.open(asset_manager.upload_path(result["thumbnail"])) as thumbnail:
+        assert thumbnail.format == "WEBP"
+        assert max(thumbnail.size) == 320
+
+    assert asset_manager.publish_path(photo) == asset_manager.upload_path(result["filename"])
+    assert remote_index.derived_files({photo}) == {result["filename"], result["thumbnail"]}
+    assert result["filename"] == f"processed/{photo}"
+
+    # Otro proceso (otra instancia del índice sobre la misma base) ve el resultado
+    other = asset_manager.RemoteAssetIndex(sessionmaker(bind=create_engine(f"sqlite:///{tmp_path / 'index.db'}")))
+    assert other.processed(photo) == result
+    other.record_processed(logo, {})
+    assert remote_index.processed(logo) == {}
+    assert remote_index.processed(photo) == result
+
+    remote_index.forget_files([photo])
+    assert other.processed(photo) is None
+
+    # Servir la versión optimizada no consulta la base de datos
+    def no_db(*_args):
+        raise AssertionError("consulta a la BD al servir una imagen")
+
+    monkeypatch.setattr(remote_index, "processed", no_db)
+    app = FastAPI()
+    app.mount("/images", uploads_static.UploadsStaticFiles(directory=uploads_dir), name="images")
+    served = TestClient(app).get(f"/images/{photo}").content
+    assert served == asset_manager.upload_path(result["filename"]).read_bytes()
+    assert asset_manager.publish_path(photo) == asset_manager.upload_path(result["filename"])
@@ -0,0 +1,53 @@
+import importlib.util
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.utils import asset_manager, uploads_static
+from backend.utils.asset_refs import collect_garbage
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_sharded_uploads_keep_flat_public_urls(uploads_dir, monkeypatch):
+    spec = importlib.util.spec_from_file_location("shard_uploads", PROJECT_ROOT / "scripts" / "shard_uploads.py")
+    shard_uploads = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(shard_uploads)
+
+    monkeypatch.setattr(uploads_static, "resolve_upload", lambda name: None)
+    flat_name = asset_manager.content_filename("ab" * 32, "png")
+    variant_name = f"{'cd' * 10}-480w.webp"
+    (uploads_dir / "variants").mkdir()
+    (uploads_dir / flat_name).write_bytes(b"plana")
+    (uploads_dir / "variants" / variant_name).write_bytes(b"webp")
+    (uploads_dir / "0b5c3e.png").write_bytes(b"antigua")
+    stored = asset_manager.store_bytes(b"nueva", "png")
+
+    assert (uploads_dir / stored[:2] / stored[2:4] / stored).is_file()
+    assert asset_manager.upload_path(flat_name) == uploads_dir / flat_name
+
+    moves, legacy = shard_uploads.plan_moves(uploads_dir)
+    assert legacy == 1
+    assert [target.relative_to(uploads_dir).as_posix() for _source, target in moves] == [
+        f"ab/ab/{flat_name}",
+        f"variants/cd/cd/{variant_name}",
+    ]
+    for source, target in moves:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        source.rename(target)
+    assert shard_uploads.plan_moves(uploads_dir) == ([], 1)
+    assert dict(asset_manager.iter_uploads(uploads_dir)).keys() == {
+        "0b5c3e.png", flat_name, stored, f"variants/{variant_name}"
+    }
+
+    app = FastAPI()
+    app.mount("/images", uploads_static.UploadsStaticFiles(directory=uploads_dir), name="images")
+    client = TestClient(app)
+    assert client.get(f"/images/{flat_name}").content == b"plana"
+    assert client.get(f"/images/variants/{variant_name}").content == b"webp"
+    assert client.get("/images/0b5c3e.png").content == b"antigua"
+    assert client.get(f"/images/{'ef' * 32}.png").status_code == 404
+
+    report = collect_garbage({stored}, grace_seconds=0, dry_run=True, uploads_dir=uploads_dir)
+    assert sorted(report.removed) == ["0b5c3e.png", f"ab/ab/{flat_name}", f"variants/cd/cd/{variant_name}"]